@@ -0,0 +1,146 @@
+import os
+import json
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "tts_cache")
+
+
+class AudioCache:
+    """
+    Content-addressed TTS audio cache.
+
+    Key = sha256(text, voice_id, voice_settings) → same phrase with the
+    same voice is rendered only once.
+
+    Layout:
+        <cache_dir>/fixed/<key>.mp3   pinned phrases (never evicted)
+        <cache_dir>/lru/<key>.mp3     dynamic phrases, LRU with a byte cap
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=None):
+        self.fixed_dir = os.path.join(cache_dir, "fixed")
+        self.lru_dir = os.path.join(cache_dir, "lru")
+        os.makedirs(self.fixed_dir, exist_ok=True)
+        os.makedirs(self.lru_dir, exist_ok=True)
+
+        self.max_bytes = int(max_bytes if max_bytes is not None
+                             else os.getenv("TTS_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()   # key → size, oldest first
+        self._lru_bytes = 0
+        self._load_lru()
+
+    # ------------------------------------------------------
+    # Key
+    # ------------------------------------------------------
+    @staticmethod
+    def make_key(text, voice_id, voice_settings):
+        blob = json.dumps([text, voice_id, voice_settings], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------
+    # Rebuild LRU order from disk (mtime = last use)
+    # ------------------------------------------------------
+    def _load_lru(self):
+        entries = []
+        for fname in os.listdir(self.lru_dir):
+            if not fname.endswith(".mp3"):
+                continue
+            path = os.path.join(self.lru_dir, fname)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, fname[:-4], st.st_size))
+
+        for _, key, size in sorted(entries):
+            self._lru[key] = size
+            self._lru_bytes += size
+
+        self._evict()
+
+    # ------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------
+    def get(self, key):
+        fixed_path = os.path.join(self.fixed_dir, key + ".mp3")
+        if os.path.exists(fixed_path):
+            return self._read(fixed_path)
+
+        with self._lock:
+            if key not in self._lru:
+                return None
+            self._lru.move_to_end(key)
+
+        path = os.path.join(self.lru_dir, key + ".mp3")
+        data = self._read(path)
+        if data is None:
+            with self._lock:
+                self._lru_bytes -= self._lru.pop(key, 0)
+            return None
+
+        try:
+            os.utime(path, None)  # persist recency for the next process
+        except OSError:
+            pass
+        return data
+
+    def contains(self, key):
+        if os.path.exists(os.path.join(self.fixed_dir, key + ".mp3")):
+            return True
+        with self._lock:
+            return key in self._lru
+
+    # ------------------------------------------------------
+    # Store
+    # ------------------------------------------------------
+    def put(self, key, data, pinned=False):
+        if not data:
+            return
+
+        folder = self.fixed_dir if pinned else self.lru_dir
+        path = os.path.join(folder, key + ".mp3")
+
+        try:
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)  # atomic → readers never see partial audio
+        except Exception as e:
+            logging.error(f"[TTS CACHE WRITE ERROR] {e}")
+            return
+
+        if pinned:
+            return
+
+        with self._lock:
+            self._lru_bytes -= self._lru.pop(key, 0)
+            self._lru[key] = len(data)
+            self._lru_bytes += len(data)
+            self._evict()
+
+    # ------------------------------------------------------
+    # Evict oldest dynamic entries above the byte cap
+    # ------------------------------------------------------
+    def _evict(self):
+        while self._lru_bytes > self.max_bytes and self._lru:
+            key, size = self._lru.popitem(last=False)
+            self._lru_bytes -= size
+            try:
+                os.remove(os.path.join(self.lru_dir, key + ".mp3"))
+            except OSError:
+                pass
+            logging.info(f"[TTS CACHE EVICT] {key[:12]} ({size} bytes)")
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
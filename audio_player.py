@@ -0,0 +1,87 @@
+import os
+import atexit
+import shlex
+import logging
+import threading
+import subprocess
+
+
+# Reads MP3 from stdin; -autoexit only fires once stdin is closed
+DEFAULT_PLAYER_CMD = "ffplay -nodisp -autoexit -loglevel quiet -fflags nobuffer -i pipe:0"
+
+
+class AudioPlayer:
+    """
+    One long-lived audio player process fed through a pipe.
+
+    - Started lazily on the first write, reused for every utterance
+    - Audio chunks are written as they arrive → playback starts
+      after the first chunk, no temp files, no per-utterance spawn
+    - Restarted automatically if the process dies
+    - close() ends the stream and waits for queued audio to finish
+
+    Command can be overridden with TTS_PLAYER_CMD.
+    """
+
+    def __init__(self, command=None):
+        self.command = shlex.split(command or os.getenv("TTS_PLAYER_CMD", DEFAULT_PLAYER_CMD))
+        self._proc = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    # ---------------------------------------------------
+    # Process management
+    # ---------------------------------------------------
+    def _ensure_started(self):
+        if self._proc and self._proc.poll() is None:
+            return self._proc
+
+        self._proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        logging.info(f"[PLAYER] Started {self.command[0]} (pid {self._proc.pid})")
+        return self._proc
+
+    # ---------------------------------------------------
+    # Write audio
+    # ---------------------------------------------------
+    def write(self, chunk):
+        """Pipes one chunk to the player. Returns False on failure."""
+        if not chunk:
+            return True
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    proc = self._ensure_started()
+                    proc.stdin.write(chunk)
+                    proc.stdin.flush()
+                    return True
+                except (BrokenPipeError, OSError) as e:
+                    # player died → drop it and retry once with a fresh one
+                    logging.error(f"[PLAYER ERROR] {e}")
+                    self._proc = None
+        return False
+
+    def play(self, audio):
+        return self.write(audio)
+
+    # ---------------------------------------------------
+    # Shutdown: flush remaining audio
+    # ---------------------------------------------------
+    def close(self, timeout=30):
+        with self._lock:
+            proc, self._proc = self._proc, None
+
+        if not proc:
+            return
+
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=timeout)
+        except Exception as e:
+            logging.error(f"[PLAYER CLOSE ERROR] {e}")
+            proc.kill()
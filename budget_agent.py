@@ -53,6 +53,23 @@ class BudgetAgent:
         # Nothing detected
         return None
 
+    # ------------------------------------------------------
+    # EXACT RUPEE BUDGET (for dish-level price queries)
+    # ------------------------------------------------------
+    def extract_rupees(self, text: str):
+        """
+        Returns the rupee amount in the text, or None.
+
+        Examples:
+            "something under 200" → 200
+            "cheap food" → None
+        """
+        if not text:
+            return None
+
+        nums = re.findall(r"\d+", text)
+        return int(nums[0]) if nums else None
+
     # ------------------------------------------------------
     # CONVERT RUPEES → PRICE LEVEL
     # ------------------------------------------------------
@@ -0,0 +1,481 @@
+"""
+Versioned binary catalog snapshot, read through mmap.
+
+    python -m agents.catalog_snapshot compile [restaurants.json] [restaurants.snap]
+    python -m agents.catalog_snapshot bench --restaurants 200000
+
+Layout (native byte order, recorded in the TOC; sections 64-byte aligned):
+
+    header   magic | format | toc offset | toc length
+    columns  rating, popularity, latitude, longitude (f64), price_level (i8)
+    strings  name, cuisine, dishes, price dishes (offsets u32 + utf-8 blob)
+    records  one compact JSON document per restaurant (what decode() returns)
+    CSR      menu_offsets → dishes, price_offsets → price dishes / price values
+    indexes  name_order (rows sorted by name), price index (sorted price keys)
+    masks    one bitmap per mood / weather / preference key
+    toc      JSON: section offsets, masks, source version, catalog stats
+
+Opening a snapshot parses only the header + TOC; columns are memoryview
+casts over the mapping (no copies), records are decoded on access.
+Processes mapping the same file share its page-cache pages.
+"""
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import argparse
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+from agents.filter_planner import CatalogStats
+
+
+MAGIC = b"FRSNAP\x00\x00"
+FORMAT = 2  # 2: whole records stored as compact JSON (one C-level parse per decode)
+HEADER = struct.Struct("<8sIIQQ")
+ALIGN = 64
+SNAPSHOT_EXT = ".snap"
+RECORD_CACHE = int(os.getenv("SNAPSHOT_RECORD_CACHE", "4096"))
+
+_MISSING = float("nan")
+
+
+def foods_digest(foods):
+    return hashlib.sha1("\x1f".join(f.lower() for f in foods).encode("utf-8")).hexdigest()[:16]
+
+
+def default_contexts():
+    """Vocabularies whose candidate masks are compiled into the snapshot."""
+    from agents.preference_agent import PreferenceAgent
+    from agents.tastemood_agent import TasteMoodAgent
+    from agents.weather_food_agent import WeatherFoodAgent
+
+    return {
+        "mood": TasteMoodAgent().mood_map,
+        "weather": WeatherFoodAgent().weather_map(),
+        "preference": PreferenceAgent().pref_map,
+    }
+
+
+# ------------------------------------------------------------
+# Compile
+# ------------------------------------------------------------
+class _Writer:
+    def __init__(self, f):
+        self.f = f
+        self.sections = {}
+        f.write(b"\0" * ALIGN)  # header, filled in last
+
+    def _pad(self):
+        pad = -self.f.tell() % ALIGN
+        if pad:
+            self.f.write(b"\0" * pad)
+
+    def raw(self, name, data, typecode="B"):
+        self._pad()
+        offset = self.f.tell()
+        self.f.write(data)
+        self.sections[name] = [offset, len(data), typecode]
+
+    def column(self, name, typecode, values):
+        self.raw(name, array(typecode, values).tobytes(), typecode)
+
+    def strings(self, name, values):
+        offsets = array("I", [0])
+        blob = bytearray()
+        for v in values:
+            blob += v.encode("utf-8")
+            offsets.append(len(blob))
+        self.column(name + ".offsets", "I", offsets)
+        self.raw(name + ".blob", bytes(blob))
+
+
+def compile_snapshot(restaurants, out_path, contexts=None, source=None):
+    """Writes the snapshot atomically (tmp file + rename)."""
+    n = len(restaurants)
+    contexts = default_contexts() if contexts is None else contexts
+
+    def num(r, key, default=_MISSING):
+        v = r.get(key)
+        return float(v) if isinstance(v, (int, float)) else default
+
+    menu_offsets, dishes = array("I", [0]), []
+    price_offsets, price_dishes, price_values = array("I", [0]), [], array("d")
+    for r in restaurants:
+        dishes.extend(r.get("menu_items") or [])
+        menu_offsets.append(len(dishes))
+        for dish, price in (r.get("dish_prices") or {}).items():
+            price_dishes.append(dish)
+            price_values.append(float(price))
+        price_offsets.append(len(price_dishes))
+
+    # price index: every priced dish, sorted by price
+    pidx = sorted(
+        (price_values[j], row, j)
+        for row in range(n)
+        for j in range(price_offsets[row], price_offsets[row + 1])
+    )
+
+    name_order = sorted(range(n), key=lambda i: restaurants[i]["name"].encode("utf-8"))
+
+    version = hashlib.sha1(
+        json.dumps(restaurants, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        w = _Writer(f)
+        w.column("rating", "d", [num(r, "rating") for r in restaurants])
+        w.column("popularity", "d", [num(r, "popularity") for r in restaurants])
+        w.column("latitude", "d", [num(r, "latitude") for r in restaurants])
+        w.column("longitude", "d", [num(r, "longitude") for r in restaurants])
+        w.column("price_level", "b", [int(r["price_level"]) if "price_level" in r else -1 for r in restaurants])
+        w.strings("name", [r["name"] for r in restaurants])
+        w.strings("cuisine", [r.get("cuisine") or "" for r in restaurants])
+        w.strings("dishes", dishes)
+        w.column("menu_offsets", "I", menu_offsets)
+        w.strings("price_dishes", price_dishes)
+        w.column("price_values", "d", price_values)
+        w.column("price_offsets", "I", price_offsets)
+        w.strings("records", [json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in restaurants])
+        w.column("name_order", "I", name_order)
+        w.column("pidx_key", "d", [p for p, _, _ in pidx])
+        w.column("pidx_row", "I", [row for _, row, _ in pidx])
+        w.column("pidx_dish", "I", [j for _, _, j in pidx])
+
+        masks = {}
+        menus = [
+            " ".join(dishes[menu_offsets[i]:menu_offsets[i + 1]]).lower()
+            for i in range(n)
+        ]
+        for kind, mapping in contexts.items():
+            for key, foods in mapping.items():
+                foods_l = [f.lower() for f in foods]
+                bits = bytearray((n + 7) // 8)
+                for i, menu in enumerate(menus):
+                    if any(food in menu for food in foods_l):
+                        bits[i >> 3] |= 1 << (i & 7)
+                name = f"mask:{kind}:{key}"
+                w.raw(name, bytes(bits))
+                masks[f"{kind}:{key}"] = {"section": name, "foods": foods_digest(foods)}
+
+        toc = json.dumps({
+            "format": FORMAT,
+            "byteorder": sys.byteorder,
+            "count": n,
+            "version": version,
+            "source": source,
+            "compiled_at": time.time(),
+            "sections": w.sections,
+            "masks": masks,
+            "stats": CatalogStats.from_restaurants(restaurants).to_dict(),
+        }).encode("utf-8")
+        w._pad()
+        toc_offset = f.tell()
+        f.write(toc)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT, 0, toc_offset, len(toc)))
+
+    os.replace(tmp, out_path)
+    logging.info(f"[SNAPSHOT] Compiled {n} restaurants → {out_path} ({os.path.getsize(out_path)} bytes)")
+    return out_path
+
+
+def compile_file(json_path, out_path=None, contexts=None):
+    out_path = out_path or os.path.splitext(json_path)[0] + SNAPSHOT_EXT
+    with open(json_path, "r", encoding="utf-8") as f:
+        restaurants = json.load(f)
+    return compile_snapshot(restaurants, out_path, contexts, source=os.path.abspath(json_path))
+
+
+# ------------------------------------------------------------
+# Read
+# ------------------------------------------------------------
+class _StringTable(Sequence):
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+def _number(v):
+    return int(v) if v.is_integer() else v
+
+
+class SnapshotRecords(Sequence):
+    """
+    Restaurant dicts decoded on access (bounded LRU cache).
+    override() keeps live values (e.g. popularity) on top of the file.
+    """
+
+    def __init__(self, snap, cache_size=RECORD_CACHE):
+        self.snap = snap
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._overrides = {}
+
+    def __len__(self):
+        return self.snap.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        r = self._cache.get(i)
+        if r is None:
+            r = self.snap.decode(i)
+            r.update(self._overrides.get(i, ()))
+            self._cache[i] = r
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(i)
+        return r
+
+    def override(self, i, **fields):
+        self._overrides.setdefault(i, {}).update(fields)
+        if i in self._cache:
+            self._cache[i].update(fields)
+
+
+class SnapshotNames(Mapping):
+    """name → record, via binary search over the sorted name index."""
+
+    def __init__(self, snap, records):
+        self.snap = snap
+        self.records = records
+
+    def row(self, name):
+        key = name.encode("utf-8")
+        order, names = self.snap.name_order, self.snap.names
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if names.raw(order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and names.raw(order[lo]) == key:
+            return order[lo]
+        return None
+
+    def __getitem__(self, name):
+        i = self.row(name) if isinstance(name, str) else None
+        if i is None:
+            raise KeyError(name)
+        return self.records[i]
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self.row(name) is not None
+
+    def __iter__(self):
+        return iter(self.snap.names)
+
+    def __len__(self):
+        return self.snap.count
+
+
+class _PriceEntries(Sequence):
+    """(restaurant name, dish lower) in price-index order."""
+
+    def __init__(self, snap):
+        self.snap = snap
+
+    def __len__(self):
+        return len(self.snap.pidx_row)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        s = self.snap
+        return s.names[s.pidx_row[i]], s.price_dishes[s.pidx_dish[i]].lower()
+
+
+class CatalogSnapshot:
+    """
+    Zero-copy view over a compiled snapshot.
+    source: file path (mmap'ed read-only) or any buffer (e.g. shared memory).
+    """
+
+    def __init__(self, source):
+        self.path = None
+        self._mmap = None
+        if isinstance(source, str):
+            self.path = source
+            with open(source, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            buf = self._mmap
+        else:
+            buf = source
+        self.buf = memoryview(buf)
+
+        magic, fmt, _, toc_offset, toc_len = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not a catalog snapshot: {source!r}")
+        if fmt != FORMAT:
+            raise ValueError(f"snapshot format {fmt}, expected {FORMAT} (recompile)")
+
+        self.toc = json.loads(bytes(self.buf[toc_offset:toc_offset + toc_len]))
+        if self.toc["byteorder"] != sys.byteorder:
+            raise ValueError("snapshot was compiled on a different byte order")
+
+        self.count = self.toc["count"]
+        self.version = self.toc["version"]
+        self.stats = self.toc.get("stats")  # filter planner statistics (absent in older files)
+
+        self.rating = self._col("rating")
+        self.popularity = self._col("popularity")
+        self.latitude = self._col("latitude")
+        self.longitude = self._col("longitude")
+        self.price_level = self._col("price_level")
+        self.names = self._strings("name")
+        self.cuisines = self._strings("cuisine")
+        self.dishes = self._strings("dishes")
+        self.menu_offsets = self._col("menu_offsets")
+        self.price_dishes = self._strings("price_dishes")
+        self.price_values = self._col("price_values")
+        self.price_offsets = self._col("price_offsets")
+        self.record_json = self._strings("records")
+        self.name_order = self._col("name_order")
+        self.pidx_key = self._col("pidx_key")
+        self.pidx_row = self._col("pidx_row")
+        self.pidx_dish = self._col("pidx_dish")
+
+        self.records = SnapshotRecords(self)
+        self.by_name = SnapshotNames(self, self.records)
+        self.price_entries = _PriceEntries(self)
+
+    def _col(self, name):
+        offset, length, typecode = self.toc["sections"][name]
+        return self.buf[offset:offset + length].cast(typecode)
+
+    def _strings(self, name):
+        offset, length, _ = self.toc["sections"][name + ".blob"]
+        return _StringTable(self._col(name + ".offsets"), self.buf[offset:offset + length])
+
+    # --------------------------------------------------------
+    def decode(self, i):
+        return json.loads(self.record_json[i])
+
+    def base_popularity(self, name):
+        i = self.by_name.row(name)
+        if i is None or self.popularity[i] != self.popularity[i]:
+            return 0
+        return _number(self.popularity[i])
+
+    def context_set(self, kind, key, foods):
+        """Names in the compiled mask, or None if absent / built from other foods."""
+        entry = self.toc["masks"].get(f"{kind}:{key}")
+        if entry is None or entry["foods"] != foods_digest(foods):
+            return None
+        bits = self._col(entry["section"])
+        return frozenset(
+            self.names[(b << 3) + k]
+            for b in range(len(bits)) if bits[b]
+            for k in range(8) if bits[b] >> k & 1
+        )
+
+
+# ------------------------------------------------------------
+# Benchmark: startup time + RSS, JSON vs snapshot
+# ------------------------------------------------------------
+def _rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _startup(path):
+    import subprocess
+
+    code = (
+        "import time, json, logging; logging.disable(50); t = time.perf_counter();"
+        "from agents.food_recommender_agent import FoodRecommenderAgent;"
+        f"rec = FoodRecommenderAgent({path!r}); rec.by_name['restaurant 1'];"
+        "from agents.catalog_snapshot import _rss_kb;"
+        "print(json.dumps([time.perf_counter() - t, _rss_kb()]))"
+    )
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench(sizes=(1000, 10000, 100000), workdir=None):
+    import random
+    import tempfile
+
+    workdir = workdir or tempfile.mkdtemp(prefix="snapbench")
+    rng = random.Random(7)
+    rows = []
+    for n in sizes:
+        restaurants = [
+            {
+                "name": f"restaurant {i}",
+                "cuisine": rng.choice(["north indian", "chinese", "italian", "street food"]),
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "popularity": rng.randint(0, 5000),
+                "price_level": rng.randint(1, 4),
+                "latitude": 28.6 + rng.uniform(-0.2, 0.2),
+                "longitude": 77.2 + rng.uniform(-0.2, 0.2),
+                "menu_items": [f"dish {rng.randint(0, 5000)}" for _ in range(12)],
+                "dish_prices": {f"dish {rng.randint(0, 5000)}": rng.randint(50, 600) for _ in range(6)},
+            }
+            for i in range(n)
+        ]
+        json_path = os.path.join(workdir, f"catalog_{n}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(restaurants, f)
+        snap_path = compile_file(json_path, contexts={})
+
+        json_s, json_rss = _startup(json_path)
+        snap_s, snap_rss = _startup(snap_path)
+        rows.append({
+            "restaurants": n,
+            "json_startup_ms": round(json_s * 1000, 1),
+            "json_rss_mb": round(json_rss / 1024, 1) if json_rss else None,
+            "snapshot_startup_ms": round(snap_s * 1000, 1),
+            "snapshot_rss_mb": round(snap_rss / 1024, 1) if snap_rss else None,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Binary catalog snapshot")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compile", help="restaurants.json → restaurants.snap")
+    c.add_argument("json_path", nargs="?", default=os.path.join(os.path.dirname(__file__), "..", "data", "restaurants.json"))
+    c.add_argument("out_path", nargs="?")
+    b = sub.add_parser("bench", help="startup time + RSS, JSON vs snapshot")
+    b.add_argument("--restaurants", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    if args.cmd == "compile":
+        print(compile_file(args.json_path, args.out_path))
+    else:
+        for row in bench(args.restaurants):
+            print(json.dumps(row))
@@ -0,0 +1,215 @@
+"""
+Per-backend circuit breakers (Groq chat, Groq Whisper, ElevenLabs).
+
+    br = breaker("groq_chat")
+    if not br.allow():
+        return fallback()            # open: no network call at all
+    start = time.perf_counter()
+    try:
+        reply = call()
+    except Exception:
+        br.record(False, time.perf_counter() - start)
+        raise
+    br.record(True, time.perf_counter() - start)
+
+States:
+    closed     calls go through; the last `window` outcomes are kept
+    open       error rate (slow calls count as errors) crossed the
+               threshold → every call short-circuits for `open_s`
+    half_open  after open_s, `probes` trial calls go through;
+               success closes the circuit, a failure re-opens it
+
+Config (constructor arg > env > default):
+    BREAKER_WINDOW=20  BREAKER_MIN_CALLS=5  BREAKER_ERROR_RATE=0.5
+    BREAKER_SLOW_S=8   BREAKER_OPEN_S=30    BREAKER_PROBES=1
+
+State is published to metrics as the gauge breaker.<name>.state plus
+counters breaker.<name>.opened / .short_circuit / .slow_call.
+
+Fault-injection demo (local stand-in server, no network):
+    python -m agents.circuit_breaker --demo
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+
+from agents.metrics import metrics
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def _env(name, default, cast=float):
+    return cast(os.getenv(name, default))
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=None, min_calls=None, error_rate=None,
+                 slow_s=None, open_s=None, probes=None, clock=time.monotonic):
+        self.name = name
+        self.window = int(window if window is not None else _env("BREAKER_WINDOW", 20, int))
+        self.min_calls = int(min_calls if min_calls is not None else _env("BREAKER_MIN_CALLS", 5, int))
+        self.error_rate = float(error_rate if error_rate is not None else _env("BREAKER_ERROR_RATE", 0.5))
+        self.slow_s = float(slow_s if slow_s is not None else _env("BREAKER_SLOW_S", 8.0))
+        self.open_s = float(open_s if open_s is not None else _env("BREAKER_OPEN_S", 30.0))
+        self.probes = int(probes if probes is not None else _env("BREAKER_PROBES", 1, int))
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=self.window)  # True = failure or slow
+        self._opened_at = 0.0
+        self._probes_left = 0
+        self._set(CLOSED)
+
+    # --------------------------------------------------------
+    def _set(self, state):
+        self.state = state
+        metrics.gauge(f"breaker.{self.name}.state", state)
+
+    def _open(self):
+        self._set(OPEN)
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        metrics.incr(f"breaker.{self.name}.opened")
+        logging.warning(f"[BREAKER] {self.name} OPEN for {self.open_s:.0f}s")
+
+    def allow(self):
+        """True if a call may go out now; False → use the fallback."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self.open_s:
+                self._set(HALF_OPEN)
+                self._probes_left = self.probes
+                logging.info(f"[BREAKER] {self.name} HALF-OPEN (probing)")
+
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes_left > 0:
+                self._probes_left -= 1
+                return True
+
+        metrics.incr(f"breaker.{self.name}.short_circuit")
+        return False
+
+    def record(self, success, latency_s=None):
+        """Outcome of a call that allow() let through."""
+        slow = latency_s is not None and latency_s > self.slow_s
+        if slow:
+            metrics.incr(f"breaker.{self.name}.slow_call")
+        failed = not success or slow
+
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open()
+                elif self._probes_left == 0:
+                    self._set(CLOSED)
+                    logging.info(f"[BREAKER] {self.name} CLOSED (probe succeeded)")
+                return
+
+            if self.state == OPEN:
+                return  # a call that started before the circuit opened
+
+            self._outcomes.append(failed)
+            n = len(self._outcomes)
+            if n >= self.min_calls and sum(self._outcomes) / n >= self.error_rate:
+                self._open()
+
+    def snapshot(self):
+        with self._lock:
+            n = len(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self.state,
+                "calls": n,
+                "error_rate": round(sum(self._outcomes) / n, 3) if n else 0.0,
+            }
+
+
+# ------------------------------------------------------------
+# Process-wide registry (one breaker per backend)
+# ------------------------------------------------------------
+GROQ_CHAT = "groq_chat"
+GROQ_WHISPER = "groq_whisper"
+ELEVENLABS = "elevenlabs"
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def breaker(name, **config):
+    """Shared breaker for a backend; config only applies on first use."""
+    with _registry_lock:
+        br = _breakers.get(name)
+        if br is None:
+            br = _breakers[name] = CircuitBreaker(name, **config)
+        return br
+
+
+# ------------------------------------------------------------
+# Demo: Whisper stand-in with an injected outage
+# ------------------------------------------------------------
+def demo(calls=40, outage=(8, 24), open_s=1.0, interval_s=0.1):
+    """
+    Sends `calls` transcriptions through SpeechAgent; the stand-in
+    returns 503 for calls in the `outage` range. Reports, per call:
+    breaker state, whether the request reached the server, latency.
+    """
+    import io
+    import wave
+    import tempfile
+    import speech_recognition as sr
+    from agents import circuit_breaker as registry  # not __main__'s copy
+    from agents.speech_agent import SpeechAgent
+    from agents.standin_servers import WhisperStandin
+
+    with tempfile.TemporaryDirectory() as fixtures:
+        server = WhisperStandin(fixtures).start()
+        os.environ["GROQ_BASE_URL"] = server.url
+        br = registry._breakers[GROQ_WHISPER] = registry.CircuitBreaker(
+            GROQ_WHISPER, window=8, min_calls=4, open_s=open_s
+        )
+        agent = SpeechAgent(groq_api_key="standin", compression="16k")
+        agent.groq = agent.groq.with_options(max_retries=0)
+
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b"\x00\x01" * 1600)
+        audio = sr.AudioData(buf.getvalue()[44:], 16000, 2)
+
+        rows = []
+        for i in range(calls):
+            server.set_faults(error_rate=1.0 if outage[0] <= i < outage[1] else 0.0, status=503)
+            before = server.requests
+            start = time.perf_counter()
+            agent.audio_to_text(audio)
+            rows.append({
+                "call": i,
+                "state": br.state,
+                "reached_server": server.requests > before,
+                "ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+            time.sleep(interval_s)
+
+        server.stop()
+    return rows
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Backend circuit breakers")
+    parser.add_argument("--demo", action="store_true", help="fault-injection run against a local stand-in")
+    parser.add_argument("--calls", type=int, default=40)
+    args = parser.parse_args()
+
+    if args.demo:
+        for row in demo(args.calls):
+            print(json.dumps(row))
+        print(json.dumps(metrics.snapshot()["counters"]))
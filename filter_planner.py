@@ -0,0 +1,177 @@
+"""
+Selectivity-aware filter ordering for recommend_by_text.
+
+- CatalogStats: per-price-level counts, cuisine counts, dish-term
+  frequencies and the veg ratio, collected once per catalog (stored in
+  the snapshot TOC so mapped catalogs skip the pass)
+- Predicate: one filter step evaluated on the ORIGINAL record, with an
+  estimated selectivity (fraction kept) and a relative per-record cost
+- order(): cheapest-per-rejected-record first (cost / (1 - selectivity))
+
+Predicates only prune; the dish-level transforms (diet → allergy →
+price) still run afterwards in their original order, so the results
+are identical to the fixed pipeline.
+"""
+import re
+import logging
+
+
+# Dish words removed in veg mode (filter_diet)
+MEAT_WORDS = ["chicken", "mutton", "fish", "beef", "egg", "prawn"]
+
+# Relative per-record cost of each predicate kind
+COST = {
+    "names": 1.0,      # set membership
+    "cuisine": 1.0,
+    "price": 2.0,
+    "menu": 3.0,       # substring scan over the joined menu
+    "dishes": 4.0,     # per-dish loop (diet / allergy)
+    "distance": 5.0,   # haversine
+}
+
+# No statistics for coordinates: assume half the catalog is in range
+NEARBY_SELECTIVITY = 0.5
+
+
+def _words(text):
+    return re.findall(r"[a-z]+", text.lower())
+
+
+# ------------------------------------------------------------
+# Catalog statistics
+# ------------------------------------------------------------
+class CatalogStats:
+    """
+    count          restaurants
+    price_levels   level → restaurants (missing level counts as 3)
+    unpriced       level → restaurants without dish_prices
+    cuisines       cuisine (lower) → restaurants
+    terms          dish word → restaurants with it anywhere on the menu
+    every_dish     dish word → restaurants with it in every dish
+    veg            restaurants with at least one veg dish
+    """
+
+    FIELDS = ("count", "price_levels", "unpriced", "cuisines", "terms", "every_dish", "veg")
+
+    def __init__(self, **fields):
+        self.count = fields.get("count", 0)
+        self.price_levels = {int(k): v for k, v in fields.get("price_levels", {}).items()}
+        self.unpriced = {int(k): v for k, v in fields.get("unpriced", {}).items()}
+        self.cuisines = dict(fields.get("cuisines", {}))
+        self.terms = dict(fields.get("terms", {}))
+        self.every_dish = dict(fields.get("every_dish", {}))
+        self.veg = fields.get("veg", 0)
+
+    @classmethod
+    def from_restaurants(cls, restaurants):
+        stats = cls()
+        for r in restaurants:
+            stats.count += 1
+            level = r.get("price_level", 3)
+            stats.price_levels[level] = stats.price_levels.get(level, 0) + 1
+            if not r.get("dish_prices"):
+                stats.unpriced[level] = stats.unpriced.get(level, 0) + 1
+
+            cuisine = (r.get("cuisine") or "").lower()
+            stats.cuisines[cuisine] = stats.cuisines.get(cuisine, 0) + 1
+
+            menu = r.get("menu_items") or []
+            per_dish = [set(_words(d)) for d in menu]
+            for w in set().union(*per_dish):
+                stats.terms[w] = stats.terms.get(w, 0) + 1
+            for w in set.intersection(*per_dish) if per_dish else ():
+                stats.every_dish[w] = stats.every_dish.get(w, 0) + 1
+
+            if any(not any(m in d.lower() for m in MEAT_WORDS) for d in menu):
+                stats.veg += 1
+        return stats
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    @property
+    def veg_ratio(self):
+        return self.veg / self.count if self.count else 1.0
+
+    # --------------------------------------------------------
+    # Selectivity estimates (fraction of the catalog kept)
+    # --------------------------------------------------------
+    def _fraction(self, n):
+        return min(1.0, n / self.count) if self.count else 1.0
+
+    def names(self, names):
+        return self._fraction(len(names))
+
+    def price_level(self, level):
+        return self._fraction(sum(c for l, c in self.price_levels.items() if l <= level))
+
+    def max_rupees(self, fits, level=None):
+        unpriced = sum(c for l, c in self.unpriced.items() if not level or l <= level)
+        return self._fraction(len(fits) + unpriced)
+
+    def cuisine(self, word):
+        return self._fraction(sum(c for k, c in self.cuisines.items() if word in k))
+
+    def menu_terms(self, foods):
+        """Any of the foods on the menu; a phrase is as rare as its rarest word."""
+        total = 0
+        for food in foods:
+            words = _words(food)
+            total += min((self.terms.get(w, 0) for w in words), default=self.count)
+        return self._fraction(total)
+
+    def allergy(self, allergens):
+        """Only restaurants where every dish contains an allergen are dropped."""
+        dropped = sum(self.every_dish.get(w, 0) for a in allergens for w in _words(a))
+        return 1.0 - self._fraction(dropped)
+
+
+# ------------------------------------------------------------
+# Predicates + ordering
+# ------------------------------------------------------------
+class Predicate:
+    """
+    keep(record) → bool on the original record.
+    names = the exact set of restaurant names kept, when known
+    (context / semantic sets); usable as the access path.
+    pruning = a dish transform enforces the same condition afterwards;
+    only worth running if later predicates see fewer records.
+    """
+
+    def __init__(self, name, keep, selectivity, cost, names=None, pruning=False):
+        self.name = name
+        self.keep = keep
+        self.selectivity = selectivity
+        self.cost = cost
+        self.names = names
+        self.pruning = pruning
+
+    @property
+    def rank(self):
+        rejected = 1.0 - self.selectivity
+        return self.cost / rejected if rejected > 0 else float("inf")
+
+    def __repr__(self):
+        return f"{self.name}(sel={self.selectivity:.3f}, cost={self.cost:g})"
+
+
+def order(predicates):
+    """
+    Most records rejected per unit of cost first (stable for ties).
+    Trailing pruning predicates are dropped: nothing runs after them
+    and their transform re-checks the same records anyway.
+    """
+    plan = sorted(predicates, key=lambda p: p.rank)
+    while plan and plan[-1].pruning:
+        plan.pop()
+    return plan
+
+
+def run(records, predicates, debug=False):
+    """Applies predicates in order; logs per-stage cardinalities in debug mode."""
+    for p in predicates:
+        before = len(records)
+        records = [r for r in records if p.keep(r)]
+        if debug:
+            logging.info(f"[FILTER STAGE] {p.name}: {before} → {len(records)}")
+    return records
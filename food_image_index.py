@@ -0,0 +1,227 @@
+import io
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    from PIL import Image
+except ImportError:  # optional: content recognition disabled without Pillow
+    Image = None
+
+
+REFS_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "food_refs")
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+# ------------------------------------------------------------
+# 128-bit perceptual descriptor
+# ------------------------------------------------------------
+def image_hash(img):
+    """
+    High 64 bits: colour signature (which of 4x4x4 RGB bins are
+    well populated) → separates dish types.
+    Low 64 bits: dHash (gradient structure / texture).
+    """
+    rgb = img.convert("RGB").resize((32, 32), Image.BILINEAR).tobytes()
+    bins = [0] * 64
+    for i in range(0, len(rgb), 3):
+        bins[(rgb[i] >> 6) * 16 + (rgb[i + 1] >> 6) * 4 + (rgb[i + 2] >> 6)] += 1
+    mean = len(rgb) / 3 / 64
+    colour = 0
+    for count in bins:
+        colour = (colour << 1) | (count > mean)
+
+    px = img.convert("L").resize((9, 8), Image.BILINEAR).tobytes()
+    dhash = 0
+    for row in range(8):
+        for col in range(8):
+            dhash = (dhash << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+
+    return (colour << 64) | dhash
+
+
+_LOW64 = (1 << 64) - 1
+COLOUR_WEIGHT = 4
+
+
+def distance(a, b):
+    """
+    Weighted Hamming distance (still a metric → BK-tree safe).
+    Colour bits count 4x: they carry most of the dish identity.
+    """
+    x = a ^ b
+    return COLOUR_WEIGHT * bin(x >> 64).count("1") + bin(x & _LOW64).count("1")
+
+
+def content_key(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+# ------------------------------------------------------------
+# BK-tree over the descriptor distance
+# ------------------------------------------------------------
+class BKTree:
+    """Metric tree: lookups only visit children within the search radius."""
+
+    def __init__(self):
+        self.root = None  # [hash, label, {distance: child}]
+        self.size = 0
+
+    def add(self, h, label):
+        self.size += 1
+        if self.root is None:
+            self.root = [h, label, {}]
+            return
+
+        node = self.root
+        while True:
+            d = distance(h, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, label, {}]
+                return
+            node = child
+
+    def search(self, h, radius):
+        """Returns [(distance, label)] within radius, nearest first."""
+        if self.root is None:
+            return []
+
+        out = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = distance(h, node[0])
+            if d <= radius:
+                out.append((d, node[1]))
+            for dist, child in node[2].items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+
+        out.sort(key=lambda x: x[0])
+        return out
+
+
+# ------------------------------------------------------------
+# Labelled reference index
+# ------------------------------------------------------------
+class FoodImageIndex:
+    """
+    CPU-only food recognizer.
+
+    Reference set: <refs_dir>/<label>/<any>.jpg  (e.g. food_refs/biryani/1.jpg)
+    Reference hashes are persisted in <refs_dir>/hashes.json keyed by
+    content hash, so unchanged images are never decoded again.
+    Query results are cached by image content hash.
+    """
+
+    def __init__(self, refs_dir=REFS_DIR, max_distance=64, k=3, cache_size=1024):
+        self.refs_dir = refs_dir
+        self.max_distance = max_distance
+        self.k = k
+        self.tree = BKTree()
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.available = Image is not None
+
+        if not self.available:
+            logging.warning("[VISION INDEX] Pillow not installed → content recognition disabled")
+            return
+        self._build()
+
+    # --------------------------------------------------------
+    def _build(self):
+        if not os.path.isdir(self.refs_dir):
+            logging.info(f"[VISION INDEX] No reference set at {self.refs_dir}")
+            return
+
+        store_path = os.path.join(self.refs_dir, "hashes.json")
+        try:
+            with open(store_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+
+        fresh = {}
+        for label in sorted(os.listdir(self.refs_dir)):
+            folder = os.path.join(self.refs_dir, label)
+            if not os.path.isdir(folder):
+                continue
+            for fname in sorted(os.listdir(folder)):
+                if not fname.lower().endswith(IMAGE_EXTS):
+                    continue
+                try:
+                    with open(os.path.join(folder, fname), "rb") as f:
+                        data = f.read()
+                    key = content_key(data)
+                    h = int(stored[key], 16) if key in stored else self._hash_bytes(data)
+                except Exception as e:
+                    logging.warning(f"[VISION INDEX] Skipping {label}/{fname}: {e}")
+                    continue
+                fresh[key] = format(h, "x")
+                self.tree.add(h, label.replace("_", " "))
+
+        if fresh != stored:
+            try:
+                with open(store_path, "w", encoding="utf-8") as f:
+                    json.dump(fresh, f)
+            except OSError as e:
+                logging.warning(f"[VISION INDEX] Could not persist hashes: {e}")
+
+        logging.info(f"[VISION INDEX] {self.tree.size} reference images indexed")
+
+    @staticmethod
+    def _hash_bytes(data):
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft("RGB", (64, 64))  # JPEG: decode at reduced scale
+            return image_hash(img)
+
+    # --------------------------------------------------------
+    def recognize(self, image_path):
+        """Returns the best label or None."""
+        if not self.available or self.tree.size == 0:
+            return None
+
+        try:
+            with open(image_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            logging.info(f"[VISION INDEX] Cannot read {image_path}: {e}")
+            return None
+
+        return self.recognize_bytes(data)
+
+    def recognize_bytes(self, data):
+        key = content_key(data)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        try:
+            h = self._hash_bytes(data)
+        except Exception as e:
+            logging.info(f"[VISION INDEX] Decode failed: {e}")
+            return None
+
+        label = self._vote(self.tree.search(h, self.max_distance)[:self.k])
+
+        with self._lock:
+            self._cache[key] = label
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return label
+
+    @staticmethod
+    def _vote(neighbours):
+        """Distance-weighted vote among the k nearest references."""
+        if not neighbours:
+            return None
+        scores = {}
+        for d, label in neighbours:
+            scores[label] = scores.get(label, 0.0) + 1.0 / (1 + d)
+        return max(scores, key=scores.get)
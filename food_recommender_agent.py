@@ -1,10 +1,25 @@
 import json
 import os
+import hashlib
 import logging
+from bisect import bisect_right
 from math import radians, cos, sin, asin, sqrt
 
+from agents.scoring_engine import ScoringEngine, np, personalizes
+from agents.semantic_index import SemanticMenuIndex, tokens
+from agents.fuzzy_lookup import TrigramIndex
+from agents.catalog_snapshot import CatalogSnapshot, SNAPSHOT_EXT
+from agents.filter_planner import CatalogStats, Predicate, MEAT_WORDS, COST, NEARBY_SELECTIVITY, order, run
+from agents.pagination import (
+    PAGE_SIZE, RankedStream, StreamCache, CursorError,
+    query_digest, history_digest, encode_cursor, decode_cursor
+)
 
-DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "restaurants.json")
+
+# restaurants.json, or a compiled snapshot (python -m agents.catalog_snapshot compile)
+DATA_PATH = os.getenv("CATALOG_PATH") or os.path.join(os.path.dirname(__file__), "..", "data", "restaurants.json")
+
+NEARBY_KM = 5.0
 
 
 def haversine(lon1, lat1, lon2, lat2):
@@ -25,32 +40,321 @@ class FoodRecommenderAgent:
        - Nearby filtering
        - Diet filtering
        - Allergy filtering
+       - Spelling correction against the dish vocabulary (trigram index)
        - Keyword filtering
+       - Semantic menu match (char n-gram vectors + IVF index)
        - Mood/weather preference support
        - Budget-level filtering
+       - Exact rupee budgets via a dish price index
        - Trending / popularity sorting
+       - Personalized scoring from the user profile (ScoringEngine)
+
+    Optional per-dish prices in the catalog:
+        "dish_prices": {"veg biryani": 180, "chicken biryani": 240}
+
+    Context candidate sets:
+        Mood / weather / preference vocabularies are registered once
+        (register_contexts) and their candidate restaurant sets are
+        materialized at load time and on every catalog change.
+
+    Binary snapshot (data_path ending in .snap, see catalog_snapshot):
+        opened via mmap; records are decoded on access and the price
+        index / context masks are read from the file, not rebuilt.
+
+    Filter planning (see filter_planner):
+        predicates run in order of estimated selectivity / cost from
+        catalog statistics; debug=True (or RECOMMENDER_DEBUG=1) logs
+        the plan and per-stage cardinalities.
     """
 
-    def __init__(self, data_path=DATA_PATH):
-        with open(data_path, "r", encoding="utf-8") as f:
-            self.restaurants = json.load(f)
+    def __init__(self, data_path=DATA_PATH, snapshot=None, debug=None):
+        self.data_path = data_path
+        self.debug = os.getenv("RECOMMENDER_DEBUG", "0") == "1" if debug is None else debug
+
+        # (kind, key) → foods, e.g. ("weather", "rain") → ["pakora", ...]
+        self._context_foods = {}
+        self._context_sets = {}
+        self.catalog_version = 0
+        self.popularity_version = ""  # chained digest of the popularity changes
+        self._pages = StreamCache()  # ranked streams for recommend_page
+
+        # an already-open CatalogSnapshot (e.g. over shared memory)
+        if snapshot is not None:
+            self.set_catalog(snapshot.records, snapshot=snapshot)
+        else:
+            self.reload()
+
+    # ---------------------------------------------------------
+    # Catalog (re)load → rebuild every derived structure
+    # ---------------------------------------------------------
+    def reload(self):
+        if self.data_path.endswith(SNAPSHOT_EXT):
+            snapshot = CatalogSnapshot(self.data_path)
+            logging.info(f"[SNAPSHOT] Mapped {snapshot.count} restaurants (version {snapshot.version}).")
+            self.set_catalog(snapshot.records, snapshot=snapshot)
+            return
+
+        with open(self.data_path, "r", encoding="utf-8") as f:
+            self.set_catalog(json.load(f))
+
+    def set_catalog(self, restaurants, snapshot=None):
+        self.restaurants = restaurants
+        self.snapshot = snapshot
+
+        # Live demand (published by OrderEventIngestor)
+        if snapshot is not None:
+            self.by_name = snapshot.by_name
+            self._name_rows = None  # binary search over the snapshot name index
+            self._base_popularity = None  # read from the snapshot column
+        else:
+            self.by_name = {r["name"]: r for r in self.restaurants}
+            self._name_rows = {}
+            for i, r in enumerate(self.restaurants):
+                self._name_rows.setdefault(r["name"], []).append(i)
+            self._base_popularity = {r["name"]: r.get("popularity", 0) for r in self.restaurants}
+        self.dish_demand = {}
+        self._applied_counts = {}  # name → recent order count on top of the catalog
+
+        self._build_indexes()
+        self.catalog_version += 1
+        self._pages.clear()
+
+    @property
+    def version(self):
+        """
+        Catalog identity for cursors: the snapshot content hash (else the
+        load counter) plus the live popularity applied on top of it, which
+        is part of the sort key.
+        """
+        base = self.snapshot.version if self.snapshot is not None else str(self.catalog_version)
+        return f"{base}:{self.popularity_version}" if self.popularity_version else base
+
+    def _build_indexes(self):
+        self._build_stats()
+        self._build_price_index()
+        self._build_context_sets()
+        self._dish_words = {d: frozenset(tokens(d)) for r in self.restaurants for d in r.get("menu_items", [])}
+        self._dish_vocabulary = frozenset(d.lower() for d in self._dish_words)
+        self._scorer = None  # rebuilt lazily for the new catalog
+        self._fuzzy = None
+        # built with the catalog, not on the first request that needs it
+        self._semantic = SemanticMenuIndex(self.restaurants) if np is not None else None
+
+    @property
+    def scorer(self):
+        """Feature matrix over the catalog; preference sets are the dish-category flags."""
+        if self._scorer is None and np is not None:
+            categories = {key: names for (kind, key), names in self._context_sets.items() if kind == "preference"}
+            self._scorer = ScoringEngine(self.restaurants, categories)
+        return self._scorer
+
+    @property
+    def semantic_index(self):
+        if self._semantic is None and np is not None:
+            self._semantic = SemanticMenuIndex(self.restaurants)
+        return self._semantic
+
+    @property
+    def fuzzy_index(self):
+        """
+        Dish names and dish words ("biriyani" → "biryani"). Cuisine and
+        restaurant names are left out: a query is never rewritten to one.
+        """
+        if self._fuzzy is None:
+            terms = ["pizza", "chai", "tea"]  # keyword_filter triggers
+            for r in self.restaurants:
+                for dish in r.get("menu_items", []):
+                    terms.append(dish)
+                    terms.extend(dish.split())
+            self._fuzzy = TrigramIndex(terms)
+        return self._fuzzy
+
+    # ---------------------------------------------------------
+    # Catalog statistics (filter planner)
+    # ---------------------------------------------------------
+    def _build_stats(self):
+        stats = self.snapshot.stats if self.snapshot is not None else None
+        if stats:
+            self.stats = CatalogStats(**stats)
+            return
+        self.stats = CatalogStats.from_restaurants(self.restaurants)
+        logging.info(
+            f"[CATALOG STATS] {self.stats.count} restaurants, {len(self.stats.terms)} dish terms, "
+            f"veg ratio {self.stats.veg_ratio:.2f}"
+        )
+
+    def _records_named(self, names):
+        """Records with these names, in catalog order."""
+        if self._name_rows is None:
+            rows = [self.by_name.row(n) for n in names]
+            rows = [i for i in rows if i is not None]
+        else:
+            rows = [i for n in names for i in self._name_rows.get(n, ())]
+        return [self.restaurants[i] for i in sorted(rows)]
+
+    # ---------------------------------------------------------
+    # Dish price index (sorted once at load time)
+    # ---------------------------------------------------------
+    def _build_price_index(self):
+        if self.snapshot is not None:
+            self._price_keys = self.snapshot.pidx_key
+            self._price_entries = self.snapshot.price_entries
+            return
+
+        entries = []
+        for r in self.restaurants:
+            for dish, price in (r.get("dish_prices") or {}).items():
+                entries.append((price, r["name"], dish.lower()))
+        entries.sort()
+
+        self._price_keys = [e[0] for e in entries]
+        self._price_entries = [(e[1], e[2]) for e in entries]
+        logging.info(f"[PRICE INDEX] {len(entries)} priced dishes indexed.")
+
+    def dishes_under(self, max_rupees):
+        """
+        Range query: {restaurant name: {dish, ...}} with price <= max_rupees.
+        O(log n + matches) via bisect.
+        """
+        end = bisect_right(self._price_keys, max_rupees)
+        fits = {}
+        for name, dish in self._price_entries[:end]:
+            fits.setdefault(name, set()).add(dish)
+        return fits
+
+    # ---------------------------------------------------------
+    # Live popularity (no catalog reload)
+    # ---------------------------------------------------------
+    def dish_vocabulary(self):
+        """Lower-case dish names of the catalog (built with it)."""
+        return self._dish_vocabulary
+
+    def apply_popularity(self, restaurant_counts, dish_counts=None):
+        """
+        popularity = catalog popularity + recent order count.
+        Updates records in place; the catalog is not reloaded. Names (and
+        dishes) left out keep their last count, so a publisher may send
+        only the ones that changed.
+        Counts that differ from the applied ones change the version (same
+        digest on every worker that applied the same updates); streams
+        ranked with the old popularity stay cached, so their cursors keep
+        paging in the old order. A publish without changes keeps it.
+        """
+        restaurant_counts = {
+            name: count for name, count in restaurant_counts.items()
+            if self._applied_counts.get(name, 0) != count
+        }
+        self._applied_counts.update(restaurant_counts)
+
+        for name, count in restaurant_counts.items():
+            if self.snapshot is not None:
+                i = self.by_name.row(name)
+                if i is not None:
+                    self.restaurants.override(i, popularity=self.snapshot.base_popularity(name) + count)
+                continue
+            r = self.by_name.get(name)
+            if r is not None:
+                r["popularity"] = self._base_popularity.get(name, 0) + count
+
+        if dish_counts:
+            self.dish_demand.update(dish_counts)
+            for dish in [d for d, count in dish_counts.items() if not count]:
+                del self.dish_demand[dish]
+
+        if self._scorer is not None:
+            self._scorer.update_popularity(
+                {name: self.by_name[name]["popularity"] for name in restaurant_counts if name in self.by_name}
+            )
+
+        if restaurant_counts:
+            blob = json.dumps([self.popularity_version, restaurant_counts], sort_keys=True)
+            self.popularity_version = hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+        logging.info(f"[LIVE POPULARITY] Updated {len(restaurant_counts)} restaurants.")
+
+    # ---------------------------------------------------------
+    # Materialized mood / weather / preference candidate sets
+    # ---------------------------------------------------------
+    def register_contexts(self, kind, mapping):
+        """
+        mapping: key → list of foods, e.g. TasteMoodAgent.mood_map.
+        Candidate sets for every key are computed right away.
+        """
+        for key, foods in mapping.items():
+            self._context_foods[(kind, key)] = [f.lower() for f in foods]
+        self._build_context_sets(kind)
+        if kind == "preference":
+            self._scorer = None
+
+    def _build_context_sets(self, kind=None):
+        menus = None
+
+        for (k, key), foods in self._context_foods.items():
+            if kind and k != kind:
+                continue
+            if self.snapshot is not None:
+                names = self.snapshot.context_set(k, key, foods)
+                if names is not None:  # compiled mask for the same foods
+                    self._context_sets[(k, key)] = names
+                    continue
+            if menus is None:
+                menus = [(r["name"], " ".join(r["menu_items"]).lower()) for r in self.restaurants]
+            self._context_sets[(k, key)] = frozenset(
+                name for name, menu in menus if any(f in menu for f in foods)
+            )
+
+        if self._context_sets:
+            logging.info(f"[CONTEXT SETS] {len(self._context_sets)} candidate sets materialized.")
+
+    def context_candidates(self, contexts):
+        """
+        contexts: {"weather": "rain", "preference": ["spicy", "sweet"], ...}
+            - several keys of one kind → union
+            - different kinds → intersection
+        Returns a set of restaurant names, or None if nothing applies.
+        """
+        candidates = None
+        for kind, keys in (contexts or {}).items():
+            if keys is None:
+                continue
+            if isinstance(keys, str):
+                keys = [keys]
+
+            known = [self._context_sets[(kind, k)] for k in keys if (kind, k) in self._context_sets]
+            if not known:
+                continue
+
+            names = frozenset().union(*known)
+            candidates = names if candidates is None else candidates & names
+
+        return candidates
 
     # ---------------------------------------------------------
     # Nearby logic
     # ---------------------------------------------------------
-    def _nearby(self, lat, lon, radius_km=5.0):
+    @staticmethod
+    def _distance(r, lat, lon):
+        try:
+            return haversine(lon, lat, r["longitude"], r["latitude"])
+        except:
+            return 9999
+
+    def _nearby(self, lat, lon, radius_km=NEARBY_KM, restaurants=None):
+        """
+        restaurants = subset to order (catalog order); default: whole catalog.
+        Both sorts are stable, so ordering a filtered subset gives the same
+        relative order as filtering the ordered catalog.
+        """
+        restaurants = self.restaurants if restaurants is None else restaurants
         if lat is None or lon is None:
             return sorted(
-                self.restaurants,
+                restaurants,
                 key=lambda r: (-r["rating"], -r["popularity"])
             )
 
         out = []
-        for r in self.restaurants:
-            try:
-                d = haversine(lon, lat, r["longitude"], r["latitude"])
-            except:
-                d = 9999
+        for r in restaurants:
+            d = self._distance(r, lat, lon)
 
             if d <= radius_km:
                 out.append((d, r))
@@ -72,8 +376,7 @@ class FoodRecommenderAgent:
         for r in restaurants:
             veg_items = [
                 item for item in r["menu_items"]
-                if not any(meat in item.lower() for meat in
-                           ["chicken", "mutton", "fish", "beef", "egg", "prawn"])
+                if not any(meat in item.lower() for meat in MEAT_WORDS)
             ]
             if veg_items:
                 new_r = r.copy()
@@ -122,23 +425,182 @@ class FoodRecommenderAgent:
         logging.info(f"[BUDGET FILTER] price_level <= {price_level} → {len(filtered)} left.")
         return filtered
 
+    # ---------------------------------------------------------
+    # Exact rupee budget
+    # ---------------------------------------------------------
+    def filter_price(self, restaurants, max_rupees, price_level=None, fits=None):
+        """
+        Restaurants with dish prices → keep only dishes <= max_rupees.
+        Restaurants without dish prices → price_level fallback.
+        fits = precomputed dishes_under(max_rupees)
+        """
+        if not max_rupees:
+            return self.filter_budget(restaurants, price_level)
+
+        fits = self.dishes_under(max_rupees) if fits is None else fits
+        filtered = []
+        for r in restaurants:
+            if r.get("dish_prices"):
+                ok = fits.get(r["name"])
+                dishes = [d for d in r["menu_items"] if ok and d.lower() in ok]
+                if dishes:
+                    new_r = r.copy()
+                    new_r["menu_items"] = dishes
+                    filtered.append(new_r)
+            elif not price_level or r.get("price_level", 3) <= price_level:
+                filtered.append(r)
+
+        logging.info(f"[PRICE FILTER] dishes <= ₹{max_rupees} → {len(filtered)} left.")
+        return filtered
+
     # ---------------------------------------------------------
     # Keyword based filtering
     # ---------------------------------------------------------
-    def keyword_filter(self, restaurants, text):
+    def _keyword_predicates(self, text):
         t = (text or "").lower()
+        preds = []
 
         # Italian
         if "pizza" in t:
-            restaurants = [r for r in restaurants if "italian" in r["cuisine"].lower()]
+            preds.append(Predicate(
+                "keyword:pizza", lambda r: "italian" in r["cuisine"].lower(),
+                self.stats.cuisine("italian"), COST["cuisine"]
+            ))
 
         # Chai
         if "chai" in t or "tea" in t:
-            restaurants = [r for r in restaurants if
-                           "chai" in " ".join(r["menu_items"]).lower()]
+            preds.append(Predicate(
+                "keyword:chai", lambda r: "chai" in " ".join(r["menu_items"]).lower(),
+                self.stats.menu_terms(["chai"]), COST["menu"]
+            ))
 
+        return preds
+
+    def keyword_filter(self, restaurants, text):
+        for p in self._keyword_predicates(text):
+            restaurants = [r for r in restaurants if p.keep(r)]
         return restaurants
 
+    # ---------------------------------------------------------
+    # Dish match ("biryani", "biryani jaisa kuch", "something cheesy")
+    # ---------------------------------------------------------
+    def dish_filter(self, restaurants, text, semantic=True):
+        """
+        Keeps restaurants with a dish named in the text (every dish word
+        of one comma-separated part); only if none has one, and semantic
+        is on, restaurants serving a dish close to the text.
+        Soft: if nothing in the list matches, it is returned unchanged.
+        """
+        return self._dish_match(restaurants, text, semantic)[0]
+
+    def _dish_match(self, restaurants, text, semantic):
+        """(restaurants, matched?)"""
+        parts = [
+            words for words in (
+                frozenset(w for w in tokens(part) if w in self.stats.terms) for part in (text or "").split(",")
+            ) if words
+        ]
+        if parts:
+            dish_words = self._dish_words
+            matched = [
+                r for r in restaurants
+                if any(words <= dish_words.get(d, frozenset()) for d in r["menu_items"] for words in parts)
+            ]
+            if matched:
+                logging.info(f"[DISH MATCH] {len(matched)} of {len(restaurants)} restaurants match.")
+                return matched, True
+
+        index = self.semantic_index if semantic else None
+        if index is None:
+            return restaurants, False
+
+        # by dish, so every restaurant serving a close dish is kept
+        hits = index.match_dishes(text)
+        matched = [r for r in restaurants if any(d.lower() in hits for d in r["menu_items"])]
+        if not matched:
+            return restaurants, False
+
+        logging.info(f"[SEMANTIC MATCH] {len(matched)} of {len(restaurants)} restaurants match.")
+        return matched, True
+
+    # ---------------------------------------------------------
+    # Filter planning
+    # ---------------------------------------------------------
+    def _plan_filters(self, t, lat, lon, contexts, preferred_foods,
+                      user_diet, allergy_list, price_level, fits):
+        """
+        Every filter step as a predicate on the original record.
+
+        - nearby / contexts / preferred foods / keywords are pure predicates
+        - diet / allergy / price are pruning predicates (the restaurant has
+          at least one dish that passes); the exact dish transforms still
+          run afterwards, in the original order
+        """
+        stats = self.stats
+        preds = []
+
+        if lat is not None and lon is not None:
+            preds.append(Predicate(
+                "nearby", lambda r: self._distance(r, lat, lon) <= NEARBY_KM,
+                NEARBY_SELECTIVITY, COST["distance"]
+            ))
+
+        candidates = self.context_candidates(contexts)
+        if candidates is not None:
+            preds.append(Predicate(
+                "contexts", lambda r: r["name"] in candidates,
+                stats.names(candidates), COST["names"], names=candidates
+            ))
+
+        if preferred_foods:
+            pf = [p.lower() for p in preferred_foods]
+            preds.append(Predicate(
+                "preferred_foods", lambda r: any(p in " ".join(r["menu_items"]).lower() for p in pf),
+                stats.menu_terms(pf), COST["menu"]
+            ))
+
+        preds.extend(self._keyword_predicates(t))
+
+        if user_diet and user_diet != "nonveg":
+            preds.append(Predicate(
+                "diet", lambda r: any(
+                    not any(m in d.lower() for m in MEAT_WORDS) for d in r["menu_items"]
+                ),
+                stats.veg_ratio, COST["dishes"], pruning=True
+            ))
+
+        if allergy_list:
+            preds.append(Predicate(
+                "allergy", lambda r: any(
+                    not any(a in d.lower() for a in allergy_list) for d in r["menu_items"]
+                ),
+                stats.allergy(allergy_list), COST["dishes"], pruning=True
+            ))
+
+        if fits is not None:
+            def fits_budget(r):
+                if r.get("dish_prices"):
+                    ok = fits.get(r["name"])
+                    return bool(ok) and any(d.lower() in ok for d in r["menu_items"])
+                return not price_level or r.get("price_level", 3) <= price_level
+
+            preds.append(Predicate(
+                "price", fits_budget, stats.max_rupees(fits, price_level), COST["price"], pruning=True
+            ))
+        elif price_level:
+            preds.append(Predicate(
+                "price", lambda r: r.get("price_level", 3) <= price_level,
+                stats.price_level(price_level), COST["price"], pruning=True
+            ))
+
+        # access path: the smallest known name set, read in catalog order
+        sets = [p for p in preds if p.names is not None]
+        access = min(sets, key=lambda p: len(p.names)) if sets else None
+        if access is not None:
+            preds.remove(access)
+
+        return access, order(preds)
+
     # ---------------------------------------------------------
     # Main recommendation function
     # ---------------------------------------------------------
@@ -149,52 +611,176 @@ class FoodRecommenderAgent:
         user_diet=None,
         allergy_list=None,
         price_level=None,
-        preferred_foods=None
+        preferred_foods=None,
+        max_rupees=None,
+        contexts=None,
+        profile=None,
+        semantic=True
     ):
         """
         preferred_foods = list of food items returned by:
            - TasteMoodAgent
            - WeatherFoodAgent
            - PreferenceAgent
+
+        max_rupees = exact budget; priced dishes above it are dropped
+        (price_level still applies to restaurants without dish prices)
+
+        contexts = {"mood": key, "weather": key, "preference": [keys]}
+        → starts from the materialized candidate sets (see context_candidates)
+
+        profile = stored user profile (weights / history / preferences / budget)
+        → personalized ranking instead of the (rating, popularity) sort;
+        a profile without any of those (e.g. diet only) keeps the sort
+
+        Without keyword / context / preferred-food filters, the text's
+        dishes narrow the results ("biryani" → every biryani place);
+        semantic = if no dish is named, narrow to restaurants whose dishes
+        are close to the text (typos, paraphrases, "something cheesy").
+        Both are skipped when nothing that passed the filters matches.
+
+        More than 10 results: recommend_page (cursor pagination).
         """
+        results = self._filtered(
+            text, user_loc, user_diet, allergy_list, price_level,
+            preferred_foods, max_rupees, contexts, semantic
+        )
 
-        t = text.lower()
+        # Final ranking
+        if personalizes(profile) and self.scorer is not None:
+            return self.scorer.rank(results, profile, user_loc, k=10)
+
+        results = sorted(
+            results,
+            key=lambda r: (-r["rating"], -r["popularity"])
+        )
+
+        return results[:10]
 
+    def _filtered(self, text, user_loc=None, user_diet=None, allergy_list=None, price_level=None,
+                  preferred_foods=None, max_rupees=None, contexts=None, semantic=True):
+        """
+        Every restaurant passing the filters, in nearby order (unranked).
+        Spelling correction is only a fallback: the text as typed is tried
+        first; the corrected text is used only when the typed one matched
+        nothing (no keyword / dish hit, or no results) and the
+        corrected one does.
+        """
+        t = text.lower()
+        args = (user_loc, user_diet, allergy_list, price_level, preferred_foods, max_rupees, contexts, semantic)
+        results, matched = self._filtered_text(t, *args)
+        if results and matched:
+            return results
+
+        corrected = self.fuzzy_index.correct(t)
+        if corrected == t:
+            return results
+        fixed, fixed_matched = self._filtered_text(corrected, *args)
+        if not fixed or not fixed_matched:
+            return results
+        logging.info(f"[SPELLING] {text!r} → {corrected!r}")
+        return fixed
+
+    def _filtered_text(self, t, user_loc, user_diet, allergy_list, price_level,
+                       preferred_foods, max_rupees, contexts, semantic):
+        """(results, matched?): matched = a keyword filter or dish match applied."""
         # Location
         lat, lon = (None, None)
         if user_loc:
             lat, lon = user_loc
 
-        # Step 1 — Nearby
-        results = self._nearby(lat, lon)
+        # Step 1 — Plan: nearby, contexts, preferred foods, keywords,
+        # diet, allergy, budget ordered by selectivity / cost
+        fits = self.dishes_under(max_rupees) if max_rupees else None
+        access, preds = self._plan_filters(
+            t, lat, lon, contexts, preferred_foods,
+            user_diet, allergy_list, price_level, fits
+        )
+        if self.debug:
+            logging.info(f"[FILTER PLAN] access={access or 'scan'} → {preds}")
+        applied = [p.name for p in preds + ([access] if access else [])]
+        matched = any(name.startswith("keyword:") for name in applied)
+        explicit = matched or "contexts" in applied or "preferred_foods" in applied
+
+        # Step 2 — Run the predicates on the original records
+        results = self.restaurants if access is None else self._records_named(access.names)
+        if self.debug:
+            logging.info(f"[FILTER STAGE] {access.name if access else 'scan'}: {len(results)}")
+        results = run(results, preds, self.debug)
+
+        # Step 3 — Dish transforms, original order: diet → allergy → budget
+        results = self.filter_diet(results, user_diet)
+        results = self.filter_allergy(results, allergy_list)
+        results = self.filter_price(results, max_rupees, price_level, fits)
 
-        # Step 2 — Preferred foods from mood/weather
-        if preferred_foods:
-            pf = [p.lower() for p in preferred_foods]
-            results = [
-                r for r in results
-                if any(p in " ".join(r["menu_items"]).lower() for p in pf)
-            ]
+        # Step 4 — Dish match on what is left (recall first: only when
+        # nothing else chose the food; soft, so it never empties the list)
+        if not explicit:
+            results, matched = self._dish_match(results, t, semantic)
 
-        # Step 3 — Keyword filtering
-        results = self.keyword_filter(results, t)
+        # Step 5 — Nearby order (stable, same as ordering first)
+        return self._nearby(lat, lon, restaurants=results), matched
 
-        # Step 4 — Diet
-        results = self.filter_diet(results, user_diet)
+    # ---------------------------------------------------------
+    # Paginated recommendations (keyset cursor)
+    # ---------------------------------------------------------
+    def _rank_keys(self, results, profile, user_loc):
+        """
+        Total sort keys, smaller is better; the candidate position breaks
+        ties, so the order matches the stable sorts above.
+        """
+        if personalizes(profile) and self.scorer is not None:
+            scores = self.scorer.score_all(results, profile, user_loc)
+            return [
+                (0, -s, i) if s is not None else (1, 0, i)  # unknown names last
+                for i, s in enumerate(scores)
+            ]
+        return [(-r["rating"], -r["popularity"], i) for i, r in enumerate(results)]
 
-        # Step 5 — Allergy
-        results = self.filter_allergy(results, allergy_list)
+    def recommend_page(self, text, cursor=None, page_size=PAGE_SIZE, profile=None, **filters):
+        """
+        One page of the ranked results for recommend_by_text's query.
 
-        # Step 6 — Budget
-        results = self.filter_budget(results, price_level)
+        filters = recommend_by_text keyword arguments (user_loc, user_diet, ...)
+        cursor  = "cursor" of the previous page (same text + filters)
 
-        # Final sort
-        results = sorted(
-            results,
-            key=lambda r: (-r["rating"], -r["popularity"])
+        Returns {"results": [...], "cursor": str or None (last page)}.
+        Raises pagination.CursorError for a cursor of another query, or
+        one whose ranking can no longer be reproduced (its stream left
+        the cache and the popularity or profile history changed since).
+
+        The ranked stream is computed once per query and profile and
+        cached; later pages only pop their own entries and stay in the
+        order page 1 was ranked in. Pass the same profile for every page
+        of a query.
+        """
+        version = self.version
+        digest = query_digest(text, filters, profile)
+        history = history_digest(profile)
+        after = None
+        if cursor:
+            version_at, history_at, after, _ = decode_cursor(cursor, digest)
+            if (version_at, history_at) != (version, history) and \
+                    self._pages.peek((version_at, digest, history_at)) is None:
+                raise CursorError("catalog or profile changed since this cursor was issued; start again")
+            version, history = version_at, history_at
+
+        def build():
+            results = self._filtered(text, **filters)
+            return RankedStream(results, self._rank_keys(results, profile, filters.get("user_loc")))
+
+        stream, cached = self._pages.get((version, digest, history), build)
+        items, more = stream.page(after, page_size)
+        logging.info(
+            f"[PAGE] {len(items)} of {len(stream)} results "
+            f"({'cached stream' if cached else 'ranked'}){', more' if more else ''}"
         )
 
-        return results[:10]
+        next_cursor = None
+        if more and items:
+            key, last = items[-1]
+            next_cursor = encode_cursor(version, digest, key, last["name"], history)
+        return {"results": [r for _, r in items], "cursor": next_cursor}
 
     # ---------------------------------------------------------
     # Weather-based recommendation helper
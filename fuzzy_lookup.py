@@ -0,0 +1,351 @@
+"""
+Typo- and transliteration-tolerant vocabulary lookup.
+
+    "biriyani" → "biryani"      "pizaa" → "pizza"      "momo" → "momos"
+    "panir"    → "paneer"       "बिरयानी" → "biryani"
+
+- normalize(): Devanagari → Latin (Hinglish spelling, schwa deletion),
+  lowercase, phonetic folding (ee → i, oo → u, aa → a, ...)
+- TrigramIndex: posting lists of padded character trigrams; only terms
+  sharing enough trigrams (q-gram lemma) are verified with a bounded
+  Damerau-Levenshtein distance
+
+Benchmark (index vs brute-force edit distance):
+    python -m agents.fuzzy_lookup --bench 50000
+"""
+import re
+import json
+import time
+import random
+import logging
+import argparse
+import unicodedata
+
+
+# ------------------------------------------------------------
+# Devanagari → Latin
+# ------------------------------------------------------------
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "व": "v", "श": "sh",
+    "ष": "sh", "स": "s", "ह": "h", "ळ": "l",
+    "क़": "q", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "r", "ढ़": "rh", "फ़": "f",
+}
+_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ee", "उ": "u", "ऊ": "oo",
+    "ऋ": "ri", "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au",
+}
+_MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ee", "ु": "u", "ू": "oo", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au",
+}
+_VIRAMA = "्"
+_NUKTA = "़"
+_NASAL = {"ं": "n", "ँ": "n", "ः": "h"}
+
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]+")
+
+
+def _transliterate_word(word):
+    # syllables: [consonant, vowel, inherent?]
+    out = []
+    i = 0
+    while i < len(word):
+        ch = word[i]
+        if i + 1 < len(word) and word[i + 1] == _NUKTA and ch + _NUKTA in _CONSONANTS:
+            ch += _NUKTA
+            i += 1
+        if ch in _CONSONANTS:
+            out.append([_CONSONANTS[ch], "a", True])
+        elif ch in _MATRAS and out:
+            out[-1][1], out[-1][2] = _MATRAS[ch], False
+        elif ch == _VIRAMA and out:
+            out[-1][1], out[-1][2] = "", False
+        elif ch in _VOWELS:
+            out.append(["", _VOWELS[ch], False])
+        elif ch in _NASAL:
+            out.append([_NASAL[ch], "", False])
+        i += 1
+
+    # schwa deletion: word-final, and medial between a vowel and a C+V syllable
+    for j in range(1, len(out)):
+        if not out[j][2]:
+            continue
+        if j == len(out) - 1:
+            out[j][1] = ""
+        elif out[j - 1][1] and out[j + 1][0] and out[j + 1][1]:
+            out[j][1] = ""
+
+    return "".join(c + v for c, v, _ in out)
+
+
+def transliterate(text):
+    return _DEVANAGARI.sub(lambda m: _transliterate_word(m.group(0)), text or "")
+
+
+# Hinglish spelling variants → one canonical spelling
+_FOLDS = [("ee", "i"), ("oo", "u"), ("aa", "a"), ("ii", "i"), ("uu", "u"), ("w", "v"), ("z", "j")]
+
+
+def fold(word):
+    for a, b in _FOLDS:
+        word = word.replace(a, b)
+    return word
+
+
+# Everyday words that sit one typo away from vocabulary terms
+# ("only" ~ "oily", "great" ~ "treat"); never fuzzy-matched on their own.
+COMMON_WORDS = frozenset(fold(w) for w in (
+    "only", "some", "same", "more", "less", "very", "also", "just", "want", "with",
+    "what", "when", "that", "this", "have", "like", "make", "good", "great", "best",
+    "nice", "need", "give", "show", "find", "food", "near", "here", "there", "today",
+    "something", "anything", "please", "mujhe", "kuch", "chahiye", "accha", "bahut",
+    "right", "night", "late", "town", "time", "place", "restaurant", "suggest", "order",
+    "dinner", "lunch", "breakfast", "tonight", "morning", "evening", "tomorrow",
+    "abhi", "aaj", "kya", "hai", "hain", "karo", "wala", "wali", "thoda", "koi", "batao",
+    "yaar", "bhai", "khana", "khaana", "dena", "chalega",
+))
+
+
+# Agents matching free text against small keyword vocabularies: fuzzy
+# matches only on longer keys with the same first letter ("right" must
+# not become "light", "town" not "down")
+FUZZY_RULES = {"min_len": 6, "same_initial": True}
+
+# Words up to SHORT_WORD letters get one edit, and only past a shared
+# prefix: "momo" ~ "momos", "pizaa" ~ "pizza", but not "cake" ~ "cafe"
+SHORT_WORD = 5
+SHORT_PREFIX = 3
+
+
+def normalize(text):
+    """Lowercase Latin text with Hinglish spelling variants folded."""
+    text = unicodedata.normalize("NFC", text or "")
+    text = transliterate(text).lower()
+    return " ".join(fold(w) for w in re.findall(r"[a-z]+", text))
+
+
+# ------------------------------------------------------------
+# Bounded edit distance
+# ------------------------------------------------------------
+def edit_distance(a, b, bound):
+    """
+    Damerau-Levenshtein (optimal string alignment), or bound + 1 as
+    soon as every cell of a row exceeds `bound`.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > bound:
+            return bound + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def max_distance(word):
+    n = len(word)
+    if n <= 3:
+        return 0
+    if n <= SHORT_WORD:
+        return 1
+    if n <= 9:
+        return 2
+    return 3
+
+
+def fuzzy_allowed(key, other, min_len=0, same_initial=False):
+    """May `key` match the (different) vocabulary key `other` at all?"""
+    if len(other.replace(" ", "")) < min_len or (same_initial and other[0] != key[0]):
+        return False
+    return len(key) > SHORT_WORD or other[:SHORT_PREFIX] == key[:SHORT_PREFIX]
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ------------------------------------------------------------
+# Trigram index
+# ------------------------------------------------------------
+class TrigramIndex:
+    """
+    terms: iterable of vocabulary strings (single or multi-word).
+    Keys are normalize()d; lookup() returns the original term.
+    """
+
+    def __init__(self, terms=()):
+        self.terms = []
+        self.keys = []
+        self._by_key = {}
+        self._postings = {}  # trigram → [term ids]
+        self.last_candidates = 0
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, term):
+        key = normalize(term)
+        if not key or key in self._by_key:
+            return
+        tid = len(self.terms)
+        self.terms.append(term)
+        self.keys.append(key)
+        self._by_key[key] = tid
+        for g in trigrams(key):
+            self._postings.setdefault(g, []).append(tid)
+
+    def lookup(self, word, bound=None, min_len=0, same_initial=False):
+        """
+        Closest term within the edit bound, or None.
+        min_len / same_initial restrict fuzzy (non-exact) matches to keys
+        of at least min_len letters starting with the word's first letter;
+        a short word also needs a shared prefix (see fuzzy_allowed).
+        """
+        key = normalize(word)
+        if not key:
+            return None
+        if key in self._by_key:
+            self.last_candidates = 1
+            return self.terms[self._by_key[key]]
+
+        bound = max_distance(key) if bound is None else bound
+        if bound == 0:
+            self.last_candidates = 0
+            return None
+
+        # q-gram lemma: one edit destroys at most 3 trigrams
+        grams = trigrams(key)
+        need = max(1, len(grams) - 3 * bound)
+        shared = {}
+        for g in grams:
+            for tid in self._postings.get(g, ()):
+                shared[tid] = shared.get(tid, 0) + 1
+
+        best, best_d = None, bound + 1
+        candidates = 0
+        for tid, count in shared.items():
+            other = self.keys[tid]
+            if count < need or abs(len(other) - len(key)) > bound:
+                continue
+            if not fuzzy_allowed(key, other, min_len, same_initial):
+                continue
+            candidates += 1
+            d = edit_distance(key, self.keys[tid], min(bound, best_d - 1))
+            if d < best_d:
+                best, best_d = tid, d
+        self.last_candidates = candidates
+
+        return self.terms[best] if best is not None else None
+
+    def find_in_text(self, text, max_words=3, skip=COMMON_WORDS, min_len=0, same_initial=False):
+        """
+        Vocabulary terms mentioned in free text, tolerating typos.
+        Longer phrases win ("pani puri" before "puri").
+        A phrase containing a `skip` word only matches exactly
+        ("night food" is not "light food"); see lookup() for the rest.
+        """
+        words = normalize(text).split()
+        found = []
+        i = 0
+        while i < len(words):
+            for n in range(min(max_words, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + n])
+                if n == 1 and phrase in skip:
+                    continue
+                exact = any(w in skip for w in words[i:i + n])
+                term = self.lookup(phrase, 0 if exact else None, min_len, same_initial)
+                if term is not None:
+                    if term not in found:
+                        found.append(term)
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
+
+    def correct(self, text, skip=COMMON_WORDS):
+        """
+        Rewrites misspelled / Devanagari words to vocabulary spelling,
+        keeping everything else (punctuation, unknown words) as is.
+        """
+        def fix(m):
+            word = m.group(0)
+            key = normalize(word)
+            if not key or key in skip or " " in key:
+                return word
+            term = self.lookup(word)
+            return term if term is not None else word
+
+        return re.sub(r"[A-Za-z]+|[ऀ-ॿ]+", fix, text or "")
+
+
+# ------------------------------------------------------------
+# Benchmark: candidate set size + latency vs brute force
+# ------------------------------------------------------------
+def bench(n_terms=50_000, n_queries=500, brute_queries=20):
+    rng = random.Random(7)
+    letters = "abcdefghijklmnoprstuvy"
+    vocab = {"".join(rng.choice(letters) for _ in range(rng.randint(5, 12))) for _ in range(n_terms)}
+    vocab = sorted(vocab)
+
+    start = time.perf_counter()
+    index = TrigramIndex(vocab)
+    build_s = time.perf_counter() - start
+
+    queries = []
+    for _ in range(n_queries):
+        w = list(rng.choice(vocab))
+        w[rng.randrange(len(w))] = rng.choice(letters)
+        queries.append("".join(w))
+
+    idx_t, brute_t, touched, agree = [], [], 0, 0
+    for n, q in enumerate(queries):
+        start = time.perf_counter()
+        hit = index.lookup(q)
+        idx_t.append(time.perf_counter() - start)
+        touched += index.last_candidates
+
+        if n >= brute_queries:
+            continue  # brute force is ~1000x slower; a sample is enough
+        start = time.perf_counter()
+        key, bound = normalize(q), max_distance(normalize(q))
+        best = min((edit_distance(key, k, bound) for k in index.keys if k == key or fuzzy_allowed(key, k)),
+                   default=bound + 1)
+        brute_t.append(time.perf_counter() - start)
+        agree += (hit is None) == (best > bound)
+
+    idx_t.sort()
+    brute_t.sort()
+    return {
+        "terms": len(index),
+        "build_s": round(build_s, 2),
+        "avg_candidates_verified": round(touched / n_queries, 1),
+        "index_ms_p50": round(idx_t[len(idx_t) // 2] * 1000, 3),
+        "brute_ms_p50": round(brute_t[len(brute_t) // 2] * 1000, 3),
+        "agreement": round(agree / min(brute_queries, n_queries), 3),
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Fuzzy vocabulary lookup")
+    parser.add_argument("--bench", type=int, metavar="N", default=50_000, help="index N synthetic terms")
+    args = parser.parse_args()
+    print(json.dumps(bench(args.bench)))
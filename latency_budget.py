@@ -0,0 +1,143 @@
+"""
+Per-request latency budget: STT → route → recommend → rewrite → TTS.
+
+    budget = LatencyBudget()           # REQUEST_BUDGET_S, default 6 s
+    with budget.stage("rewrite") as s:
+        if s.low:
+            reply = local template      # s.degrade("local")
+        else:
+            reply = llm(deadline=s.allowance)
+    budget.report()
+
+- The clock starts when the user stops speaking (start())
+- A stage may use: remaining time x its share of the stages still to
+  come, so time saved early flows to later stages and an overrun
+  squeezes them; skip() a stage that will not run this turn (typed
+  input → no "stt") so its share goes to the others
+- A stage is "low" when its allowance is below the minimum it needs
+  for the full path; it then degrades (local rewrite, cached audio,
+  text-only, ...)
+- report(): per-stage allowance / usage / degradation, logged and
+  published to metrics (budget.<stage>, budget.degraded.<stage>)
+"""
+import os
+import time
+import logging
+
+from agents.metrics import metrics
+
+
+STAGES = ("stt", "route", "recommend", "rewrite", "tts")
+
+# Share of the budget per stage (normalized over the stages still to run)
+SHARES = {"stt": 0.30, "route": 0.02, "recommend": 0.13, "rewrite": 0.30, "tts": 0.25}
+
+# Below this allowance a stage takes its degraded path (seconds)
+MIN_FULL = {"stt": 0.8, "route": 0.0, "recommend": 0.15, "rewrite": 0.4, "tts": 0.5}
+
+
+class Stage:
+    """One stage's slot: allowance, low?, degrade(); timed by the budget."""
+
+    def __init__(self, name, allowance, minimum):
+        self.name = name
+        self.allowance = allowance
+        self.low = allowance < minimum
+        self.used = None
+        self.degraded = None
+
+    def degrade(self, how):
+        self.degraded = how
+        logging.warning(f"[BUDGET] {self.name}: {self.allowance * 1000:.0f} ms left → {how}")
+
+
+class LatencyBudget:
+    """
+    total  = end-to-end seconds for one request (REQUEST_BUDGET_S)
+    shares = stage → weight (default SHARES)
+    """
+
+    def __init__(self, total=None, shares=None, minimums=None, clock=time.monotonic):
+        self.total = float(total if total is not None else os.getenv("REQUEST_BUDGET_S", 6.0))
+        self.shares = dict(shares or SHARES)
+        self.minimums = dict(minimums or MIN_FULL)
+        self.clock = clock
+        self.stages = {}
+        self.skipped = set()
+        self.start()
+
+    def start(self):
+        """(Re)starts the clock, e.g. once the user stopped speaking."""
+        self.started = self.clock()
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def remaining(self):
+        return max(0.0, self.total - self.elapsed())
+
+    def skip(self, name):
+        """This stage will not run this turn; its share goes to the rest."""
+        if name not in self.stages:
+            self.skipped.add(name)
+
+    def allowance(self, name):
+        pending = [s for s in self.shares if s not in self.stages and s not in self.skipped]
+        weight = sum(self.shares[s] for s in pending) or 1.0
+        return self.remaining() * self.shares.get(name, 0.0) / weight
+
+    # --------------------------------------------------------
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def report(self):
+        stages = {
+            name: {
+                "allowed_s": round(s.allowance, 3),
+                "used_s": round(s.used, 3) if s.used is not None else None,
+                "degraded": s.degraded,
+            }
+            for name, s in self.stages.items()
+        }
+        used = self.elapsed()
+        summary = {
+            "total_s": self.total,
+            "used_s": round(used, 3),
+            "over_budget": used > self.total,
+            "stages": stages,
+        }
+
+        metrics.observe("budget.request", used)
+        if used > self.total:
+            metrics.incr("budget.exceeded")
+        for name, s in self.stages.items():
+            if s.used is not None:
+                metrics.observe(f"budget.{name}", s.used)
+            if s.degraded:
+                metrics.incr(f"budget.degraded.{name}")
+
+        logging.info(
+            f"[BUDGET] {used * 1000:.0f}/{self.total * 1000:.0f} ms | " + " | ".join(
+                f"{name} {v['used_s'] * 1000 if v['used_s'] is not None else 0:.0f}"
+                f"/{v['allowed_s'] * 1000:.0f}" + (f" ({v['degraded']})" if v["degraded"] else "")
+                for name, v in stages.items()
+            )
+        )
+        return summary
+
+
+class _StageTimer:
+    def __init__(self, budget, name):
+        self.budget = budget
+        self.name = name
+
+    def __enter__(self):
+        b = self.budget
+        self.stage = Stage(self.name, b.allowance(self.name), b.minimums.get(self.name, 0.0))
+        b.stages[self.name] = self.stage
+        self.begin = b.clock()
+        return self.stage
+
+    def __exit__(self, *exc):
+        self.stage.used = self.budget.clock() - self.begin
+        return False
@@ -0,0 +1,64 @@
+import itertools
+import logging
+
+
+class LocalRewriter:
+    """
+    Zero-network Hinglish rewriter.
+
+    Fills a rotating set of "X se Y order karlo" style templates
+    from the structured top result:
+        {"name": ..., "cuisine": ..., "dishes": [...]}
+
+    - Restaurant + dish names are inserted verbatim
+    - No LLM, no network → runs in microseconds
+    """
+
+    # {dish2} templates are only used when 2+ dishes are known
+    TEMPLATES = [
+        "{name} se {dish} order karlo, {cuisine} ka full mazaa ghar pe!",
+        "Aaj {name} ka {dish} Zomato se mangwa lo. {cuisine} craving ekdum sorted.",
+        "{dish} ka mann hai? {name} se delivery karwa lo, saath mein {dish2} bhi try karna.",
+        "Zomato kholo aur {name} se {dish} order karlo. {dish2} bhi mast hai yaar!",
+        "{name} ka {cuisine} khana best hai, {dish} abhi order karlo.",
+        "Bhook lagi hai? {name} se {dish} aur {dish2} mangwa lo, maza aa jayega.",
+    ]
+
+    NO_DISH_TEMPLATES = [
+        "{name} se kuch mast {cuisine} order karlo, Zomato pe delivery ready hai.",
+        "Aaj {name} ka {cuisine} khana mangwa lo, pakka pasand aayega.",
+    ]
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    # ---------------------------------------------------------
+    # Rewrite
+    # ---------------------------------------------------------
+    def rewrite(self, fields):
+        """
+        Returns a Hinglish order line, or None if fields are unusable.
+        """
+        if not fields or not fields.get("name"):
+            return None
+
+        dishes = [d for d in fields.get("dishes") or [] if d]
+        values = {
+            "name": fields["name"],
+            "cuisine": fields.get("cuisine") or "khana",
+            "dish": dishes[0] if dishes else "",
+            "dish2": dishes[1] if len(dishes) > 1 else "",
+        }
+
+        if not dishes:
+            pool = self.NO_DISH_TEMPLATES
+        elif len(dishes) > 1:
+            pool = self.TEMPLATES
+        else:
+            pool = [t for t in self.TEMPLATES if "{dish2}" not in t]
+
+        template = pool[next(self._counter) % len(pool)]
+        reply = template.format(**values)
+
+        logging.info(f"[LOCAL REWRITE] {reply}")
+        return reply
@@ -1,7 +1,10 @@
 # main_assistant.py  (updated)
 import os
+import re
 import json
+import time
 import logging
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,7 +13,7 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(mes
 # Agents
 from agents.speech_agent import SpeechAgent
 from agents.voice_agent import VoiceAgent
-from agents.router_agent import route
+from agents.router_agent import route, detect_intents
 from agents.general_food_agent import GeneralFoodAgent
 from agents.food_recommender_agent import FoodRecommenderAgent
 from agents.weather_food_agent import WeatherFoodAgent
@@ -21,11 +24,25 @@ from agents.vision_agent import VisionAgent
 from agents.teamlead_agent import TeamLeadAgent
 from agents.preference_agent import PreferenceAgent
 from agents.tastemood_agent import TasteMoodAgent  # mood agent
+from agents.scoring_engine import HISTORY_SIZE
+from agents.query_plan import QueryPlanner
+from agents.latency_budget import LatencyBudget
 
-# Path for persistent user profile
-USER_PROFILE_PATH = os.path.join(os.path.dirname(__file__), "data", "user_profile.json")
+# Path for persistent user profile (USER_PROFILE_PATH overrides)
+USER_PROFILE_PATH = os.path.abspath(os.getenv("USER_PROFILE_PATH") or os.path.join(os.path.dirname(__file__), "data", "user_profile.json"))
 # Ensure data directory exists
-os.makedirs(os.path.join(os.path.dirname(__file__), "data"), exist_ok=True)
+os.makedirs(os.path.dirname(USER_PROFILE_PATH), exist_ok=True)
+
+# Routes answered by the recommender (its lazy indexes are worth prefetching)
+RECOMMENDER_ROUTES = ("budget", "weather_food", "mood", "recommend")
+
+# "yes, order it" / "book that" / "haan le lo" right after a recommendation:
+# the only turn that puts a restaurant into the order history
+CONFIRM = re.compile(
+    r"(yes|yeah|yep|ok|okay|sure|haan|ha|theek hai)?[\s,.!]*"
+    r"(order (it|that|this|karo|kar do)|book (it|that|this)|(i'?ll|i will) (take|have) (it|that)"
+    r"|go with (it|that)|le lo|mangao|done)( please)?[\s.!]*"
+)
 
 # -----------------------------
 def extract_top1(text: str):
@@ -35,22 +52,33 @@ def extract_top1(text: str):
         return text.split("\n")[0]
     return text
 
+def _menu_names(r):
+    # Extract menu names from dict-based items
+    menu_items = r.get("menu_items", [])
+    if isinstance(menu_items, list) and len(menu_items) > 0:
+        if isinstance(menu_items[0], dict):
+            return [m.get("name", "") for m in menu_items]
+        return menu_items
+    return []
+
+def result_fields(results):
+    """Structured TOP result for the local rewriter."""
+    if not results:
+        return None
+    r = results[0]
+    return {
+        "name": r.get("name"),
+        "cuisine": r.get("cuisine"),
+        "dishes": _menu_names(r)[:3],
+    }
+
 def format_results(results, source=None):
     if not results:
         return "No matching restaurants found."
 
     r = results[0]  # only TOP result
 
-    # Extract menu names from dict-based items
-    menu_items = r.get("menu_items", [])
-    if isinstance(menu_items, list) and len(menu_items) > 0:
-        if isinstance(menu_items[0], dict):
-            menu_names = [m.get("name", "") for m in menu_items]
-        else:
-            menu_names = menu_items
-    else:
-        menu_names = []
-
+    menu_names = _menu_names(r)
     menu_text = ", ".join(menu_names[:3])
 
     line = f"{r['name']} — {r['cuisine']} — Rating: {r.get('rating', 0)} — Popular: {menu_text}"
@@ -62,7 +90,7 @@ def format_results(results, source=None):
 
 # -----------------------------
 class MasterAssistant:
-    def __init__(self, hybrid_mode=True):
+    def __init__(self, hybrid_mode=True, recommender_workers=None):
         api_key = os.getenv("GROQ_API_KEY")
         self.hybrid = hybrid_mode
 
@@ -82,6 +110,34 @@ class MasterAssistant:
         self.pref_agent = PreferenceAgent()
         self.mood_agent = TasteMoodAgent()
 
+        # Precompute candidate restaurants for every mood / weather / preference key
+        self.recommender.register_contexts("mood", self.mood_agent.mood_map)
+        self.recommender.register_contexts("weather", self.weather_food.weather_map())
+        self.recommender.register_contexts("preference", self.pref_agent.pref_map)
+
+        # RECOMMENDER_WORKERS=N → recommendations run in N worker processes
+        # over one shared catalog (worker_pool); 0 = in this process
+        workers = recommender_workers
+        if workers is None:
+            workers = int(os.getenv("RECOMMENDER_WORKERS", "0"))
+        if workers > 0:
+            from agents.worker_pool import RecommenderPool, PooledRecommender
+            pool = RecommenderPool(self.recommender.data_path, workers=workers)
+            self.recommender = PooledRecommender(self.recommender, pool)
+
+        # Multi-intent mode: every constraint in one utterance → one query plan
+        self.multi_intent = os.getenv("MULTI_INTENT", "1") == "1"
+        self.planner = QueryPlanner(
+            self.recommender, self.budget_agent, self.allergy,
+            self.mood_agent, self.weather_food, self.pref_agent
+        )
+
+        # Streaming STT: VAD endpointing + chunked transcription
+        self.streaming_stt = os.getenv("STT_STREAMING", "0") == "1"
+        self.early_route = None         # route() on partial transcript
+        self._prefetch = None           # index warm-up started by it
+        self._served = None             # last top recommendation, until confirmed
+
         # User settings
         self.user_diet = None           # "veg" or "nonveg"
         self.user_allergy = None        # list
@@ -121,20 +177,84 @@ class MasterAssistant:
             logging.exception("Failed to save user profile.")
 
     # -----------------------------
-    def ask_input(self):
+    def _remember(self, results, prefs=None):
+        # stated tastes → preferences (scoring weights); the top result is
+        # only history once the user confirms it (see _confirm), so the
+        # assistant's own picks never boost themselves
+        if results:
+            top = results[0]
+            self._served = {
+                "restaurant": top["name"],
+                "cuisine": top.get("cuisine"),
+                "dish": (_menu_names(top) or [None])[0],
+            }
+        if prefs:
+            self.user_profile = self.user_profile or {}
+            known = self.user_profile.setdefault("preferences", [])
+            new = [p for p in prefs if p not in known]
+            if new:
+                known.extend(new)
+                self._save_user_profile()
+
+    def _confirm(self):
+        # the user took the last recommendation → order history
+        served, self._served = self._served, None
+        self.user_profile = self.user_profile or {}
+        history = self.user_profile.setdefault("history", [])
+        history.append(served)
+        del history[:-HISTORY_SIZE]
+        self._save_user_profile()
+        logging.info(f"[ORDER CONFIRMED] {served['restaurant']}")
+        dish = f" — enjoy the {served['dish']}" if served.get("dish") else ""
+        return f"Great choice! {served['restaurant']} it is{dish}."
+
+    # -----------------------------
+    def ask_input(self, budget=None):
+        # budget clock starts once the user stopped speaking / typing
         # Hybrid: try voice first if enabled
         if self.hybrid:
-            audio = self.speech.record_audio()
-            if audio:
-                text = self.speech.audio_to_text(audio)
-                if text:
-                    logging.info(f"[USER SAID] {text}")
-                    return text
+            if self.streaming_stt:
+                # chunks are transcribed while the user speaks
+                text = self.speech.listen_streaming(on_partial=self._on_partial)
+                if budget:
+                    budget.start()
+                    budget.skip("stt")  # transcribed while the user spoke
+            else:
+                audio = self.speech.record_audio()
+                text = None
+                if audio and budget:
+                    budget.start()
+                    with budget.stage("stt") as stage:
+                        text = self.speech.audio_to_text(audio, timeout=stage.allowance)
+                elif audio:
+                    text = self.speech.audio_to_text(audio)
+            if text:
+                logging.info(f"[USER SAID] {text}")
+                return text
         # fallback to text
         text = input("You (text): ").strip()
+        if budget:
+            budget.start()
+            budget.skip("stt")
         logging.info(f"[USER TYPED] {text}")
         return text
 
+    # -----------------------------
+    def _on_partial(self, text):
+        # route while the user is still speaking; a recommender route
+        # builds the recommender's lazy indexes before the query arrives
+        self.early_route = route(text)
+        logging.info(f"[EARLY ROUTE] {self.early_route} | Partial: {text}")
+        if self._prefetch is None and self.early_route in RECOMMENDER_ROUTES:
+            self._prefetch = threading.Thread(target=self._warm_recommender, name="prefetch", daemon=True)
+            self._prefetch.start()
+
+    def _warm_recommender(self):
+        start = time.perf_counter()
+        self.recommender.fuzzy_index
+        self.recommender.scorer
+        logging.info(f"[PREFETCH] Recommender indexes ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
     # -----------------------------
     def _ensure_diet(self):
         # If diet already saved, skip asking
@@ -169,16 +289,218 @@ class MasterAssistant:
 
         logging.info(f"[DIET SET] User diet: {self.user_diet}")
 
+    # -----------------------------
+    def respond(self, user_input, budget=None):
+        """
+        One turn after the input: route → recommend → rewrite → TTS.
+        Returns (final text, SpeakHandle of the spoken answer) once audio
+        has started (or the tts allowance ran out).
+        """
+        budget = budget or LatencyBudget()
+
+        # route
+        with budget.stage("route"):
+            route_type = route(user_input)
+            if self.multi_intent and QueryPlanner.is_multi_intent(detect_intents(user_input)):
+                route_type = "multi"
+            if self._served and CONFIRM.fullmatch(user_input.lower().strip()):
+                route_type = "confirm"
+        logging.info(f"[ROUTE SELECTED] {route_type} | Input: {user_input}")
+        if self.early_route:
+            logging.info(f"[EARLY ROUTE] {'confirmed' if self.early_route == route_type else 'revised'}")
+
+        fields = None  # structured top result for local rewrite
+
+        # indexes still warming from the early route: finish, don't rebuild
+        if self._prefetch is not None:
+            self._prefetch.join()
+
+        # vision needs a typed path: ask before the clock runs again
+        if route_type == "vision":
+            self.voice.speak("Please type the full image path now.")
+            img_path = input("Image path: ").strip()
+            budget.start()
+
+        # low budget → skip the semantic menu match (recommend / multi
+        # routes only; the others choose the food themselves)
+        with budget.stage("recommend") as stage:
+            semantic = not stage.low
+            if stage.low:
+                stage.degrade("no semantic match")
+
+            try:
+                # ---------- MULTI-INTENT plan (one pipeline pass) ----------
+                if route_type == "multi":
+                    plan = self.planner.plan(user_input, self.user_diet, self.user_allergy)
+
+                    # a diet / allergy said alongside the question is kept,
+                    # like the single-intent diet / allergy routes do
+                    stated = plan["stated"]
+                    if stated["diet"] or stated["allergies"]:
+                        self.user_profile = self.user_profile or {}
+                        if stated["diet"]:
+                            self.user_diet = stated["diet"]
+                            self.user_profile["diet"] = self.user_diet
+                        if stated["allergies"]:
+                            self.user_allergy = sorted(set(self.user_allergy or []) | set(stated["allergies"]))
+                            self.user_profile["allergies"] = self.user_allergy
+                        self._save_user_profile()
+
+                    results = self.planner.execute(plan, profile=self.user_profile, semantic=semantic)
+                    final = format_results(results)
+                    fields = result_fields(results)
+                    self._remember(results, (plan["query"]["contexts"] or {}).get("preference"))
+
+                # ---------- CONFIRM (last recommendation taken) ----------
+                elif route_type == "confirm":
+                    final = self._confirm()
+
+                # ---------- DIET route ----------
+                elif route_type == "diet":
+                    t = user_input.lower()
+                    if "non" in t and "veg" in t:
+                        self.user_diet = "nonveg"
+                    elif "veg" in t or "vegetarian" in t:
+                        self.user_diet = "veg"
+
+                    self.user_profile = self.user_profile or {}
+                    self.user_profile["diet"] = self.user_diet
+                    self._save_user_profile()
+                    final = f"Got it! Your preference is {self.user_diet}."
+
+                # ---------- ALLERGY route ----------
+                elif route_type == "allergy":
+                    detected = self.allergy.detect_allergies(user_input)
+                    self.user_allergy = detected
+                    self.user_profile = self.user_profile or {}
+                    self.user_profile["allergies"] = self.user_allergy
+                    self._save_user_profile()
+                    final = f"Thanks — I'll avoid: {', '.join(self.user_allergy) if self.user_allergy else 'none'}."
+
+                # ---------- BUDGET route ----------
+                elif route_type == "budget":
+                    price_level = self.budget_agent.extract_budget(user_input)
+                    max_rupees = self.budget_agent.extract_rupees(user_input)
+                    results = self.recommender.recommend_by_text(
+                        user_input,
+                        user_diet=self.user_diet,
+                        allergy_list=self.user_allergy,
+                        price_level=price_level,
+                        max_rupees=max_rupees,
+                        profile=self.user_profile,
+                        semantic=False  # the budget / context picks the food
+                    )
+                    final = format_results(results)
+                    fields = result_fields(results)
+                    self._remember(results)
+
+                # ---------- WEATHER FOOD route ----------
+                elif route_type == "weather_food":
+                    foods = self.weather_food.respond(user_input)
+                    weather = self.weather_food.detect_weather_mood(user_input)
+                    results = self.recommender.recommend_by_text(
+                        ", ".join(foods),
+                        user_diet=self.user_diet,
+                        allergy_list=self.user_allergy,
+                        contexts={"weather": weather},
+                        profile=self.user_profile,
+                        semantic=False  # the budget / context picks the food
+                    )
+                    if results:
+                        top = results[0]
+                        final = f"{top['name']} — try their {top['menu_items'][0]}."
+                        fields = result_fields(results)
+                        self._remember(results)
+                    else:
+                        final = "I couldn't find a good place for this weather."
+
+                # ---------- MOOD route ----------
+                elif route_type == "mood":
+                    foods = self.mood_agent.respond(user_input)
+                    mood = self.mood_agent.detect_mood(user_input)
+                    results = self.recommender.recommend_by_text(
+                        ", ".join(foods),
+                        user_diet=self.user_diet,
+                        allergy_list=self.user_allergy,
+                        contexts={"mood": mood} if mood else None,
+                        profile=self.user_profile,
+                        semantic=False  # the budget / context picks the food
+                    )
+                    final = format_results(results)
+                    fields = result_fields(results)
+                    self._remember(results)
+
+                # ---------- VISION route ----------
+                elif route_type == "vision":
+                    detected = self.vision.detect_food(img_path)
+                    if not detected:
+                        final = "I couldn't detect the food in the image."
+                    else:
+                        results = self.recommender.recommend_by_image(
+                            detected,
+                            user_diet=self.user_diet,
+                            user_loc=None
+                        )
+                        final = format_results(results, source=f"Detected: {detected}")
+                        fields = result_fields(results)
+
+                # ---------- RECOMMEND route ----------
+                elif route_type == "recommend":
+                    prefs = self.pref_agent.detect_preference(user_input)
+                    results = self.recommender.recommend_by_text(
+                        user_input,
+                        user_diet=self.user_diet,
+                        allergy_list=self.user_allergy,
+                        price_level=None,
+                        contexts={"preference": prefs} if prefs else None,
+                        profile=self.user_profile,
+                        semantic=semantic
+                    )
+                    final = format_results(results)
+                    fields = result_fields(results)
+                    self._remember(results, prefs)
+
+                # ---------- GENERAL ----------
+                else:
+                    final = self.general.reply(user_input)
+
+            except Exception:
+                logging.exception("Processing error:")
+                final = "Something went wrong while processing your request."
+
+        # ---- rewrite + speak answer ----
+        top1 = extract_top1(final)
+        with budget.stage("rewrite") as stage:
+            if stage.low:
+                stage.degrade("local rewrite")
+            rewritten = self.teamlead.rewrite(
+                user_input, top1,
+                deadline=min(stage.allowance, self.teamlead.deadline),
+                fields=fields, local=stage.low
+            )
+        logging.info(f"[RAW TOP1] {top1}")
+        logging.info(f"[LLM REWRITE] {rewritten}")
+
+        # low budget → cached audio or text-only; wait until audio starts
+        with budget.stage("tts") as stage:
+            if stage.low:
+                stage.degrade("cached audio / text-only")
+            handle = self.voice.speak(rewritten, timeout=stage.allowance or None, cache_only=stage.low)
+            handle.started.wait(stage.allowance)
+        budget.report()
+        return final, handle
+
     # -----------------------------
     def run(self):
         # startup diet question (only if not saved)
         self._ensure_diet()
 
-       # greet user once
+       # greet user once (non-blocking → overlaps with recording)
         self.voice.speak("Hello! Ask me a food question or say 'quit' to exit.")
 
-        # SINGLE QUESTION ONLY
-        user_input = self.ask_input()
+        # SINGLE QUESTION ONLY (one latency budget: STT → ... → TTS)
+        budget = LatencyBudget()
+        user_input = self.ask_input(budget)
 
         if not user_input:
             self.voice.speak("I didn't catch that. Please try again later.")
@@ -189,110 +511,7 @@ class MasterAssistant:
             self.voice.speak("Goodbye! Enjoy your meal.")
             return
 
-        # route
-        route_type = route(user_input)
-        logging.info(f"[ROUTE SELECTED] {route_type} | Input: {user_input}")
-
-        try:
-            # ---------- DIET route ----------
-            if route_type == "diet":
-                t = user_input.lower()
-                if "non" in t and "veg" in t:
-                    self.user_diet = "nonveg"
-                elif "veg" in t or "vegetarian" in t:
-                    self.user_diet = "veg"
-
-                self.user_profile = self.user_profile or {}
-                self.user_profile["diet"] = self.user_diet
-                self._save_user_profile()
-                final = f"Got it! Your preference is {self.user_diet}."
-
-            # ---------- ALLERGY route ----------
-            elif route_type == "allergy":
-                detected = self.allergy.detect_allergies(user_input)
-                self.user_allergy = detected
-                self.user_profile = self.user_profile or {}
-                self.user_profile["allergies"] = self.user_allergy
-                self._save_user_profile()
-                final = f"Thanks — I'll avoid: {', '.join(self.user_allergy) if self.user_allergy else 'none'}."
-
-            # ---------- BUDGET route ----------
-            elif route_type == "budget":
-                price_level = self.budget_agent.extract_budget(user_input)
-                results = self.recommender.recommend_by_text(
-                    user_input,
-                    user_diet=self.user_diet,
-                    allergy_list=self.user_allergy,
-                    price_level=price_level
-                )
-                final = format_results(results)
-
-            # ---------- WEATHER FOOD route ----------
-            elif route_type == "weather_food":
-                foods = self.weather_food.respond(user_input)
-                results = self.recommender.recommend_by_text(
-                    ", ".join(foods),
-                    user_diet=self.user_diet,
-                    allergy_list=self.user_allergy
-                )
-                if results:
-                    top = results[0]
-                    final = f"{top['name']} — try their {top['menu_items'][0]}."
-                else:
-                    final = "I couldn't find a good place for this weather."
-
-            # ---------- MOOD route ----------
-            elif route_type == "mood":
-                foods = self.mood_agent.respond(user_input)
-                results = self.recommender.recommend_by_text(
-                    ", ".join(foods),
-                    user_diet=self.user_diet,
-                    allergy_list=self.user_allergy
-                )
-                final = format_results(results)
-
-            # ---------- VISION route ----------
-            elif route_type == "vision":
-                self.voice.speak("Please type the full image path now.")
-                img_path = input("Image path: ").strip()
-                detected = self.vision.detect_food(img_path)
-                if not detected:
-                    final = "I couldn't detect the food in the image."
-                else:
-                    results = self.recommender.recommend_by_image(
-                        detected,
-                        user_diet=self.user_diet,
-                        user_loc=None
-                    )
-                    final = format_results(results, source=f"Detected: {detected}")
-
-            # ---------- RECOMMEND route ----------
-            elif route_type == "recommend":
-                prefs = self.pref_agent.respond(user_input)
-                results = self.recommender.recommend_by_text(
-                    user_input,
-                    user_diet=self.user_diet,
-                    allergy_list=self.user_allergy,
-                    price_level=None,
-                    preferred_foods=prefs if prefs else None
-                )
-                final = format_results(results)
-
-            # ---------- GENERAL ----------
-            else:
-                final = self.general.reply(user_input)
-
-        except Exception:
-            logging.exception("Processing error:")
-            final = "Something went wrong while processing your request."
-
-        # ---- rewrite + speak answer ----
-        top1 = extract_top1(final)
-        rewritten = self.teamlead.rewrite(user_input, top1)
-        logging.info(f"[RAW TOP1] {top1}")
-        logging.info(f"[LLM REWRITE] {rewritten}")
-
-        self.voice.speak(rewritten)
+        final, _ = self.respond(user_input, budget)
 
         print("\n------- FULL RESPONSE -------")
         print(final)
@@ -300,7 +519,7 @@ class MasterAssistant:
         print('Buy Link: https://example.com/buy')
         print("------------------------------\n")
 
-        # SINGLE SHOT END
+        # SINGLE SHOT END (queued; flushed on exit)
         self.voice.speak("Goodbye! Enjoy your meal.")
         return
     
@@ -309,4 +528,6 @@ class MasterAssistant:
 # RUN SINGLE-SHOT ASSISTANT
 # -----------------------------
 if __name__ == "__main__":
-    MasterAssistant(hybrid_mode=True).run()
\ No newline at end of file
+    assistant = MasterAssistant(hybrid_mode=True)
+    assistant.run()
+    assistant.voice.close()  # let queued speech finish
\ No newline at end of file
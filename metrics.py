@@ -0,0 +1,65 @@
+import threading
+
+
+class Metrics:
+    """
+    Tiny in-process metrics registry shared by all agents.
+
+    Tracks:
+        - counters   (e.g. teamlead.deadline_miss)
+        - timings    (count / total / max seconds per name)
+        - gauges     (last value wins, e.g. breaker state)
+
+    Thread-safe, no external backend needed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+        self.gauges = {}
+
+    # ------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # ------------------------------------------------------
+    # Timings (seconds)
+    # ------------------------------------------------------
+    def observe(self, name, seconds):
+        with self._lock:
+            t = self.timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            t["count"] += 1
+            t["total"] += seconds
+            t["max"] = max(t["max"], seconds)
+
+    # ------------------------------------------------------
+    # Gauges
+    # ------------------------------------------------------
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    # ------------------------------------------------------
+    # Read / reset
+    # ------------------------------------------------------
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timings": {k: dict(v) for k, v in self.timings.items()},
+                "gauges": dict(self.gauges),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.gauges.clear()
+
+
+# Process-wide registry
+metrics = Metrics()
@@ -0,0 +1,354 @@
+"""
+Order-event ingestion → live popularity.
+
+Events (one JSON object per line / datagram):
+    {"restaurant": "Biryani House", "dish": "chicken biryani", "qty": 1, "ts": 1716712345.0}
+
+Sources:
+    - tail of a JSONL file      (OrderEventIngestor.tail_jsonl)
+    - local UDP socket          (OrderEventIngestor.serve_udp)
+
+Counts are kept in sliding-window count-min sketches, so memory stays
+flat no matter how many events or distinct keys arrive. Aggregates are
+published periodically into FoodRecommenderAgent / TrendingAgent.
+
+Benchmark:
+    python -m agents.order_ingest --bench 1000000
+"""
+import os
+import json
+import time
+import random
+import socket
+import logging
+import argparse
+import threading
+from array import array
+
+from agents.metrics import metrics
+
+
+# ------------------------------------------------------------
+# Count-min sketch
+# ------------------------------------------------------------
+class CountMinSketch:
+    """depth x width counters; estimates never undercount."""
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("Q", bytes(8 * width)) for _ in range(depth)]
+
+    def _cols(self, key):
+        h = hash(key)
+        h2 = (h >> 32) | 1
+        return [(h + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, n=1):
+        for row, col in zip(self.rows, self._cols(key)):
+            row[col] += n
+
+    def estimate(self, key):
+        return min(row[col] for row, col in zip(self.rows, self._cols(key)))
+
+    def clear(self):
+        self.rows = [array("Q", bytes(8 * self.width)) for _ in range(self.depth)]
+
+
+class SlidingWindowCounter:
+    """
+    Ring of `buckets` sketches, each covering window_s / buckets
+    seconds. Old buckets are cleared as time moves on.
+
+    Events stamped more than one bucket ahead of the wall clock are
+    rejected: one far-future ts (e.g. milliseconds) would otherwise
+    move the window and drop every real event as too old.
+    """
+
+    def __init__(self, window_s=3600, buckets=12, width=2048, depth=4, clock=time.time):
+        self.bucket_s = window_s / buckets
+        self.sketches = [CountMinSketch(width, depth) for _ in range(buckets)]
+        self.epochs = [-1] * buckets
+        self.latest = -1
+        self.clock = clock
+        self.rejected = 0
+
+    def _bucket(self, ts):
+        if ts > self.clock() + self.bucket_s:
+            self.rejected += 1
+            metrics.incr("ingest.future_events")
+            logging.warning(f"[INGEST] Dropped event from the future (ts={ts})")
+            return None
+        epoch = int(ts // self.bucket_s)
+        if epoch <= self.latest - len(self.sketches):
+            return None  # older than the window: would wipe a live bucket
+        self.latest = max(self.latest, epoch)
+        i = epoch % len(self.sketches)
+        if self.epochs[i] != epoch:
+            if self.epochs[i] != -1:
+                self.sketches[i].clear()
+            self.epochs[i] = epoch
+        return i
+
+    def add(self, key, n=1, ts=None):
+        ts = self.clock() if ts is None else ts
+        i = self._bucket(ts)
+        if i is not None:
+            self.sketches[i].add(key, n)
+
+    def estimate(self, key, now=None):
+        now = self.clock() if now is None else now
+        current = int(now // self.bucket_s)
+        oldest = current - len(self.sketches) + 1
+        return sum(
+            sk.estimate(key)
+            for sk, epoch in zip(self.sketches, self.epochs)
+            if oldest <= epoch <= current
+        )
+
+    def epoch(self, now):
+        return int(now // self.bucket_s)
+
+    def snapshot(self):
+        """
+        Read-only view of the buckets, O(buckets). clear() swaps in new
+        rows, so a bucket expiring later does not change the view;
+        events still counted into a live bucket may show up in it.
+        """
+        return WindowSnapshot(self)
+
+
+class WindowSnapshot:
+    def __init__(self, counter):
+        self.bucket_s = counter.bucket_s
+        self.buckets = [(sk, sk.rows, epoch) for sk, epoch in zip(counter.sketches, counter.epochs)]
+
+    def estimate(self, key, now):
+        current = int(now // self.bucket_s)
+        oldest = current - len(self.buckets) + 1
+        total = 0
+        for sk, rows, epoch in self.buckets:
+            if oldest <= epoch <= current:
+                total += min(row[col] for row, col in zip(rows, sk._cols(key)))
+        return total
+
+
+# ------------------------------------------------------------
+# Ingestor
+# ------------------------------------------------------------
+class OrderEventIngestor:
+    """
+    Aggregates order events and publishes them every `publish_every` s:
+        recommender.apply_popularity(restaurant_counts, dish_counts)
+        trending.record_order(name, weight=new_orders)
+
+    A publish only estimates the keys ordered since the last one, plus
+    (when a bucket has left the window) the keys last published with a
+    non-zero count; the estimates run outside the ingest lock.
+    """
+
+    def __init__(self, recommender=None, trending=None, window_s=3600,
+                 buckets=12, width=2048, depth=4, publish_every=5.0):
+        self.recommender = recommender
+        self.trending = trending
+        self.publish_every = publish_every
+
+        self.restaurants = SlidingWindowCounter(window_s, buckets, width, depth)
+        self.dishes = SlidingWindowCounter(window_s, buckets, width, depth)
+
+        # orders since the last publish, only for catalog restaurants (bounded)
+        self._delta = {}
+        self._touched = set()         # catalog restaurants ordered since the last publish
+        self._touched_dishes = set()  # catalog dishes ordered since the last publish
+        self._live = set()            # published with a count > 0: may expire
+        self._live_dishes = set()
+        self._epoch = None            # window bucket of the last publish
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.events = 0
+
+    def ingest(self, event):
+        name = event.get("restaurant")
+        if not name:
+            return
+        qty = event.get("qty", 1)
+        ts = event.get("ts")
+
+        dish = (event.get("dish") or "").lower()
+        known = not self.recommender or name in self.recommender.by_name
+
+        with self._lock:
+            self.restaurants.add(name, qty, ts)
+            if dish:
+                self.dishes.add(dish, qty, ts)
+            if self.recommender:
+                if known:
+                    self._touched.add(name)
+                if dish and dish in self.recommender.dish_vocabulary():
+                    self._touched_dishes.add(dish)
+            if self.trending is not None and known:
+                self._delta[name] = self._delta.get(name, 0) + qty
+            self.events += 1
+
+    def ingest_line(self, line):
+        try:
+            self.ingest(json.loads(line))
+        except (ValueError, AttributeError, TypeError):
+            metrics.incr("ingest.bad_events")
+
+    # --------------------------------------------------------
+    # Publish aggregates (no catalog reload)
+    # --------------------------------------------------------
+    def publish(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            delta, self._delta = self._delta, {}
+            touched, self._touched = self._touched, set()
+            touched_dishes, self._touched_dishes = self._touched_dishes, set()
+            restaurants, dishes = self.restaurants.snapshot(), self.dishes.snapshot()
+
+        if self.recommender:
+            epoch = self.restaurants.epoch(now)
+            if epoch != self._epoch:
+                # a bucket left the window: live counts may have dropped
+                touched |= self._live
+                touched_dishes |= self._live_dishes
+                self._epoch = epoch
+
+            counts = {n: restaurants.estimate(n, now) for n in touched}
+            dish_counts = {d: dishes.estimate(d, now) for d in touched_dishes}
+            self._live = (self._live - touched) | {n for n, c in counts.items() if c}
+            self._live_dishes = (self._live_dishes - touched_dishes) | {d for d, c in dish_counts.items() if c}
+
+            self.recommender.apply_popularity(counts, dish_counts)
+        if self.trending is not None:
+            for name, n in delta.items():
+                self.trending.record_order(name, ts=now, weight=n)
+
+        metrics.gauge("ingest.events", self.events)
+        metrics.incr("ingest.publishes")
+        logging.info(f"[INGEST] Published aggregates ({self.events} events so far)")
+
+    def _publish_loop(self):
+        while not self._stop.wait(self.publish_every):
+            try:
+                self.publish()
+            except Exception:
+                logging.exception("[INGEST] Publish failed")
+
+    def start(self):
+        threading.Thread(target=self._publish_loop, name="ingest-publish", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # --------------------------------------------------------
+    # Sources
+    # --------------------------------------------------------
+    def tail_jsonl(self, path, from_start=False, poll_s=0.2):
+        """Follows a JSONL file (handles truncation / rotation) until stop()."""
+        f = None
+        inode = None
+        while not self._stop.is_set():
+            if f is None:
+                try:
+                    f = open(path, "rb")
+                    inode = os.fstat(f.fileno()).st_ino
+                    if not from_start:
+                        f.seek(0, os.SEEK_END)
+                    from_start = True  # a rotated file is read from its start
+                except OSError:
+                    self._stop.wait(poll_s)
+                    continue
+
+            line = f.readline()
+            if line.endswith(b"\n"):
+                self.ingest_line(line)
+                continue
+            if line:
+                f.seek(-len(line), os.SEEK_CUR)  # partial line: wait for the rest
+
+            try:
+                st = os.stat(path)
+                if st.st_ino != inode or st.st_size < f.tell():
+                    f.close()
+                    f = None
+                    continue
+            except OSError:
+                pass
+            self._stop.wait(poll_s)
+
+        if f:
+            f.close()
+
+    def serve_udp(self, host="127.0.0.1", port=9999):
+        """One JSON event per datagram (may hold several lines) until stop()."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+        sock.settimeout(0.5)
+        logging.info(f"[INGEST] UDP listening on {host}:{port}")
+        try:
+            while not self._stop.is_set():
+                try:
+                    data, _ = sock.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                for line in data.decode("utf-8", "replace").splitlines():
+                    if line.strip():
+                        self.ingest_line(line)
+        finally:
+            sock.close()
+
+
+# ------------------------------------------------------------
+# Throughput benchmark
+# ------------------------------------------------------------
+def bench(n_events=1_000_000, n_restaurants=5000, n_dishes=20000):
+    rng = random.Random(7)
+    names = [f"restaurant {i}" for i in range(n_restaurants)]
+    dishes = [f"dish {i}" for i in range(n_dishes)]
+    now = time.time()
+    lines = [
+        json.dumps({"restaurant": rng.choice(names), "dish": rng.choice(dishes),
+                    "qty": 1, "ts": now + i * 0.001})
+        for i in range(min(n_events, 200_000))
+    ]
+
+    ing = OrderEventIngestor()
+    start = time.perf_counter()
+    for i in range(n_events):
+        ing.ingest_line(lines[i % len(lines)])
+    seconds = time.perf_counter() - start
+
+    return {
+        "events": n_events,
+        "seconds": round(seconds, 3),
+        "events_per_sec": round(n_events / seconds),
+        "sketch_counters": 2 * len(ing.restaurants.sketches) * 4 * 2048,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Order-event ingestion")
+    parser.add_argument("--bench", type=int, metavar="N", help="ingest N synthetic events")
+    parser.add_argument("--tail", metavar="JSONL", help="follow a JSONL event file")
+    parser.add_argument("--udp", type=int, metavar="PORT", help="listen for UDP events")
+    args = parser.parse_args()
+
+    if args.bench:
+        print(json.dumps(bench(args.bench)))
+    else:
+        from agents.food_recommender_agent import FoodRecommenderAgent
+        from agents.trending_agent import TrendingAgent
+
+        rec = FoodRecommenderAgent()
+        ing = OrderEventIngestor(rec, TrendingAgent(rec.restaurants)).start()
+        if args.tail:
+            ing.tail_jsonl(args.tail)
+        elif args.udp:
+            ing.serve_udp(port=args.udp)
+        else:
+            parser.error("--bench, --tail or --udp required")
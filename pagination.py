@@ -0,0 +1,164 @@
+"""
+Cursor pagination over ranked recommendations.
+
+    page = recommender.recommend_page("biryani", user_diet="veg")
+    more = recommender.recommend_page("biryani", cursor=page["cursor"], user_diet="veg")
+
+- The filtered candidates of a query are ranked lazily (heap): each
+  page pops only its own entries, earlier pages are never re-sorted
+- Streams are cached per (catalog version, query, history); the cursor
+  is opaque and self-contained: version + query digest + history digest
+  + the sort key and name of the last result. The profile's ranking
+  fields are part of the query digest, so one user's personalized order
+  is never served to another
+- A stream is pinned to what it was ranked with: a live popularity
+  update or a new history entry between pages does not break a cursor
+  whose stream is still cached (older streams stay in the LRU)
+- Sort keys are total (ties broken by candidate position), so a worker
+  without the cached stream rebuilds it and seeks past the last key
+  (keyset pagination) with no duplicates or gaps, as long as its
+  version and the profile history still match the cursor's
+"""
+import os
+import json
+import heapq
+import base64
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+
+PAGE_SIZE = 10
+PAGE_CACHE = int(os.getenv("PAGE_CACHE_SIZE", "64"))
+
+
+# Profile fields the ranking reads besides the history (which changes
+# every order, so it is pinned per stream instead of digested)
+RANKING_FIELDS = ("weights", "preferences", "budget")
+
+
+class CursorError(ValueError):
+    """Cursor is malformed, belongs to another query, or to an older catalog."""
+
+
+# ------------------------------------------------------------
+# Cursor
+# ------------------------------------------------------------
+def _sha1(value, n):
+    blob = json.dumps(value, sort_keys=True, default=list, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:n]
+
+
+def query_digest(text, filters, profile=None):
+    """Stable id of a query: text + filters + the profile's ranking fields."""
+    ranking = {f: profile[f] for f in RANKING_FIELDS if (profile or {}).get(f)}
+    return _sha1([text, filters, ranking or None], 16)
+
+
+def history_digest(profile):
+    """The history a stream was ranked with ("" without one)."""
+    history = (profile or {}).get("history")
+    return _sha1(history, 12) if history else ""
+
+
+def encode_cursor(version, digest, key, name, history=""):
+    data = {"v": version, "q": digest, "h": history, "k": list(key), "n": name}
+    blob = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(blob.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, digest):
+    """
+    Returns (version, history, last key, last name) as issued; the
+    caller checks the version. Raises CursorError.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        version, key, name = data["v"], tuple(data["k"]), data["n"]
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("malformed cursor")
+    if data.get("q") != digest:
+        raise CursorError("cursor belongs to a different query")
+    return version, data.get("h", ""), key, name
+
+
+# ------------------------------------------------------------
+# Lazily ranked candidate stream
+# ------------------------------------------------------------
+class RankedStream:
+    """
+    keys[i] = sort key of candidates[i], smaller is better.
+    ranked grows page by page; the rest stays in a heap.
+    """
+
+    def __init__(self, candidates, keys):
+        self.candidates = candidates
+        self._heap = [(k, i) for i, k in enumerate(keys)]
+        heapq.heapify(self._heap)
+        self.ranked = []     # candidate indexes, best first
+        self.ranked_keys = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def _fill(self, n):
+        while len(self.ranked) < n and self._heap:
+            key, i = heapq.heappop(self._heap)
+            self.ranked.append(i)
+            self.ranked_keys.append(key)
+
+    def page(self, after=None, size=PAGE_SIZE):
+        """
+        ([(key, candidate)], more?) following the `after` key (keyset seek).
+        Entries are popped from the heap only up to the end of this page.
+        """
+        with self._lock:
+            start = 0
+            if after is not None:
+                # pop until the seek position is inside the ranked prefix
+                while self._heap and (not self.ranked_keys or self.ranked_keys[-1] <= after):
+                    self._fill(len(self.ranked) + size)
+                start = bisect_right(self.ranked_keys, after)
+
+            self._fill(start + size + 1)  # one extra: is there a next page?
+            end = min(start + size, len(self.ranked))
+            items = [(self.ranked_keys[j], self.candidates[self.ranked[j]]) for j in range(start, end)]
+            return items, len(self.ranked) > end
+
+
+class StreamCache:
+    """LRU of ranked streams keyed by (catalog version, query digest, history)."""
+
+    def __init__(self, size=PAGE_CACHE):
+        self.size = size
+        self._streams = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, key):
+        """The cached stream or None (never builds)."""
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None:
+                self._streams.move_to_end(key)
+            return stream
+
+    def get(self, key, build):
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None:
+                self._streams.move_to_end(key)
+                return stream, True
+        stream = build()
+        with self._lock:
+            stream = self._streams.setdefault(key, stream)  # concurrent build: first wins
+            self._streams.move_to_end(key)
+            while len(self._streams) > self.size:
+                self._streams.popitem(last=False)
+        return stream, False
+
+    def clear(self):
+        with self._lock:
+            self._streams.clear()
@@ -1,5 +1,7 @@
 import logging
 
+from agents.fuzzy_lookup import TrigramIndex, FUZZY_RULES
+
 class PreferenceAgent:
     """
     Detects user taste preferences from natural language:
@@ -46,6 +48,13 @@ class PreferenceAgent:
             "heavy": ["rich food"]
         }
 
+        # Typo / Devanagari tolerant lookup ("chatpataa", "तीखा" → tikha → spicy)
+        self._fuzzy_base = {key: key for key in self.pref_map}
+        for base, words in self.synonyms.items():
+            for w in words:
+                self._fuzzy_base.setdefault(w, base)
+        self._fuzzy = TrigramIndex(self._fuzzy_base)
+
     # -----------------------------------------------------------
     # Expand synonyms → base keyword
     # -----------------------------------------------------------
@@ -73,6 +82,10 @@ class PreferenceAgent:
         if syn:
             found.append(syn)
 
+        # Misspelled / Devanagari keywords
+        if not found:
+            found = [self._fuzzy_base[term] for term in self._fuzzy.find_in_text(text, **FUZZY_RULES)]
+
         # Remove duplicates
         found = list(set(found))
 
@@ -0,0 +1,131 @@
+"""
+Multi-intent query plans.
+
+    "cheap spicy veg food, it's raining"
+        → intents  ["budget", "weather_food", "recommend"]
+        → query    {user_diet: "veg", price_level: 1,
+                    contexts: {"weather": "rain", "preference": ["spicy"]}}
+        → one recommend_by_text() call
+
+- Every extractor (budget, diet, allergy, mood, weather, preference)
+  runs on the same utterance; nothing is dropped because another
+  intent routed first
+- Hard constraints (diet, allergy, budget) always apply; soft ones
+  (mood, weather, preference) become context candidate sets
+- If the soft contexts intersect to nothing they are relaxed at plan
+  time (set lookups only), so the recommender still runs exactly once
+"""
+import re
+import logging
+
+from agents.router_agent import detect_intents
+
+
+# Intents that carry a recommendation constraint (vision / general do not)
+CONSTRAINT_INTENTS = ("diet", "allergy", "budget", "weather_food", "mood", "recommend")
+
+# Soft contexts, dropped in this order when their intersection is empty
+RELAX_ORDER = ("mood", "weather", "preference")
+
+
+class QueryPlanner:
+    """
+    plan(text)     → {"intents", "query", "stated", "relaxed"}
+                     stated = diet / allergies said in this utterance
+                     (the caller saves them to the profile)
+    execute(plan)  → recommend_by_text(**plan["query"])
+    """
+
+    def __init__(self, recommender, budget_agent, allergy_agent, mood_agent, weather_agent, pref_agent):
+        self.recommender = recommender
+        self.budget = budget_agent
+        self.allergy = allergy_agent
+        self.mood = mood_agent
+        self.weather = weather_agent
+        self.pref = pref_agent
+
+    # ------------------------------------------------------------
+    # Constraint extraction
+    # ------------------------------------------------------------
+    @staticmethod
+    def is_multi_intent(intents):
+        return len([i for i in intents if i in CONSTRAINT_INTENTS]) > 1
+
+    @staticmethod
+    def _diet(text):
+        t = text.lower()
+        if re.search(r"\bnon[\s-]?veg|मांसाहारी", t):
+            return "nonveg"
+        if re.search(r"\bveg\b|vegetarian|शाकाहारी", t):
+            return "veg"
+        return None
+
+    def _budget(self, text, intents):
+        # stray numbers ("table for 4") only count when the router saw a budget
+        if "budget" not in intents and re.search(r"\d", text):
+            return None, None
+        return self.budget.extract_budget(text), self.budget.extract_rupees(text)
+
+    def _relax(self, contexts):
+        relaxed = []
+        for kind in RELAX_ORDER:
+            if not contexts or self.recommender.context_candidates(contexts) != frozenset():
+                break
+            if kind in contexts:
+                contexts.pop(kind)
+                relaxed.append(kind)
+        return relaxed
+
+    # ------------------------------------------------------------
+    # Plan
+    # ------------------------------------------------------------
+    def plan(self, text, user_diet=None, user_allergy=None):
+        """
+        user_diet / user_allergy = saved profile settings; the utterance
+        overrides the diet and adds to the allergies.
+        """
+        intents = detect_intents(text)
+
+        stated_diet = self._diet(text)
+        stated_allergies = self.allergy.detect_allergies(text)
+        diet = stated_diet or user_diet
+        allergies = sorted(set(user_allergy or []) | set(stated_allergies))
+        price_level, max_rupees = self._budget(text, intents)
+
+        weather = self.weather.detect_weather_mood(text)
+        contexts = {
+            "mood": self.mood.detect_mood(text),
+            "weather": weather if weather != "normal" else None,
+            "preference": self.pref.detect_preference(text),
+        }
+        contexts = {kind: keys for kind, keys in contexts.items() if keys}
+        relaxed = self._relax(contexts)
+
+        plan = {
+            "intents": intents,
+            "query": {
+                "text": text,
+                "user_diet": diet,
+                "allergy_list": allergies or None,
+                "price_level": price_level,
+                "max_rupees": max_rupees,
+                "contexts": contexts or None,
+            },
+            "stated": {"diet": stated_diet, "allergies": stated_allergies},
+            "relaxed": relaxed,
+        }
+
+        logging.info(
+            f"[QUERY PLAN] intents={intents} diet={diet} allergies={allergies} "
+            f"price_level={price_level} max_rupees={max_rupees} contexts={contexts}"
+            + (f" relaxed={relaxed}" if relaxed else "")
+        )
+        return plan
+
+    def execute(self, plan, user_loc=None, profile=None, semantic=True):
+        return self.recommender.recommend_by_text(
+            user_loc=user_loc, profile=profile, semantic=semantic, **plan["query"]
+        )
+
+    def recommend(self, text, user_diet=None, user_allergy=None, user_loc=None, profile=None):
+        return self.execute(self.plan(text, user_diet, user_allergy), user_loc, profile)
@@ -9,56 +9,76 @@ def route(text: str):
     if not text:
         return "general"
 
-    t = text.lower().strip()
+    # first match wins; nothing matched → GENERAL
+    return next(_intents(text.lower().strip()), "general")
+
+
+def detect_intents(text: str):
+    """
+    Every intent present in the text, in routing priority order.
+    "cheap spicy food, it's raining" → ["budget", "weather_food", "recommend"]
+    """
+    if not text:
+        return []
+
+    found = []
+    for intent in _intents(text.lower().strip()):
+        if intent not in found:
+            found.append(intent)
+    return found
+
+
+def _intents(t):
+    """Yields intents for lowercased text, highest priority first."""
 
     # ---------------------------------------------------------
     # 1. STRICT DIET DETECTION (English + Hindi)
     # ---------------------------------------------------------
     if re.search(r"\b(vegetarian|i am veg|pure veg|only veg|शाकाहारी|वेग)\b", t):
-        return "diet"
+        yield "diet"
 
     if re.search(r"\b(non veg|non-veg|i am non veg|i am non vegetarian|मांसाहारी)\b", t):
-        return "diet"
+        yield "diet"
 
     # ---------------------------------------------------------
     # 2. ALLERGY
     # ---------------------------------------------------------
     if any(k in t for k in ["allergy", "allergic", "एलर्जी", "avoid", "reaction"]):
-        return "allergy"
+        yield "allergy"
 
     # ---------------------------------------------------------
     # 3. BUDGET
     # ---------------------------------------------------------
     if any(k in t for k in ["cheap", "low cost", "affordable", "कम बजट", "सस्ता"]):
-        return "budget"
+        yield "budget"
 
     if "under" in t:
-        return "budget"
+        yield "budget"
 
     # Numbers + food context
     if re.search(r"\b\d{2,4}\b", t):
         if any(w in t for w in ["food", "eat", "dinner", "lunch", "खाना", "meal"]):
-            return "budget"
+            yield "budget"
 
     # ---------------------------------------------------------
     # 4. WEATHER-BASED FOOD
     # ---------------------------------------------------------
     weather_words = ["cold", "rain", "rainy", "hot", "warm", "गरम", "ठंड", "बारिश"]
     if any(w in t for w in weather_words):
-        return "weather_food"
+        yield "weather_food"
 
     # ---------------------------------------------------------
     # 5. VISION (Image Upload)
     # ---------------------------------------------------------
     if any(ext in t for ext in [".jpg", ".jpeg", ".png", "image", "photo", "upload", "तस्वीर"]):
-        return "vision"
+        yield "vision"
 
     # ---------------------------------------------------------
     # 6. MOOD-BASED FOOD
     # ---------------------------------------------------------
     mood_words = ["sad", "happy", "bored", "angry", "stress", "stressed", "mood", "मूड"]
     if any(w in t for w in mood_words):
-        return "mood"
+        yield "mood"
 
     # ---------------------------------------------------------
     # 7. RECOMMENDATION (Hindi + Hinglish + English)
@@ -71,9 +91,5 @@ def route(text: str):
     ]
 
     if any(w in t for w in recommend_words):
-        return "recommend"
+        yield "recommend"
 
-    # ---------------------------------------------------------
-    # 8. GENERAL
-    # ---------------------------------------------------------
-    return "general"
@@ -0,0 +1,308 @@
+"""
+Offline semantic menu search.
+
+    "something cheesy and saucy" → cheese pizza, pasta alfredo ...
+    "biryani jaisa kuch"         → chicken biryani, veg biryani ...
+
+- Dish + cuisine text is embedded with a hashing vectorizer over
+  character n-grams (no model download, no network)
+- Vectors live in one float16 matrix (dim x 2 bytes per dish)
+- Approximate nearest neighbours via an IVF partition: coarse
+  k-means lists, only the closest `nprobe` lists are scanned
+
+Benchmark (recall@10 + latency vs brute force):
+    python -m agents.semantic_index --bench 100000
+"""
+import re
+import json
+import time
+import zlib
+import random
+import logging
+import argparse
+
+try:
+    import numpy as np
+except ImportError:  # optional: semantic stage disabled without numpy
+    np = None
+
+
+# Filler words that carry no dish information (English + Hinglish)
+STOPWORDS = {
+    "a", "an", "and", "the", "or", "with", "for", "of", "in", "on", "to", "me", "i", "my",
+    "some", "something", "anything", "want", "need", "give", "suggest", "recommend",
+    "food", "dish", "like", "similar", "please", "today", "now", "eat", "order",
+    "good", "best", "nice", "tasty", "great",
+    "cheap", "budget", "price", "under", "below", "within", "rupees", "rupee", "rs",  # budget words
+    "hungry", "place", "breakfast", "lunch", "dinner", "tonight",
+    "only", "veg", "nonveg", "non", "vegetarian",  # diet words: handled by filter_diet
+    "kuch", "jaisa", "jaise", "jaisi", "khana", "khaana", "chahiye", "dedo", "do",
+    "mujhe", "hai", "hain", "ka", "ki", "ke", "aur", "ya", "kya", "bhi", "koi",
+}
+
+
+def tokens(text):
+    words = re.findall(r"[a-zऀ-ॿ]+", (text or "").lower())
+    return [w for w in words if w not in STOPWORDS]
+
+
+# ------------------------------------------------------------
+# Hashing vectorizer (character n-grams)
+# ------------------------------------------------------------
+class HashingVectorizer:
+    """
+    Each word is padded (" biryani ") and split into 3..5-char grams.
+    gram → crc32 → (column, ±1); rows are L2-normalized.
+    crc32 keeps vectors identical across processes (unlike hash()).
+    """
+
+    def __init__(self, dim=512, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self._grams = {}  # gram → (column, sign)
+
+    def _slot(self, gram):
+        slot = self._grams.get(gram)
+        if slot is None:
+            h = zlib.crc32(gram.encode("utf-8"))
+            slot = self._grams[gram] = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+        return slot
+
+    def transform_one(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        lo, hi = self.ngram_range
+        for word in tokens(text):
+            w = f" {word} "
+            for n in range(lo, hi + 1):
+                for i in range(len(w) - n + 1):
+                    col, sign = self._slot(w[i:i + n])
+                    vec[col] += sign
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def transform(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float16)
+        for i, text in enumerate(texts):
+            out[i] = self.transform_one(text)
+        return out
+
+
+# ------------------------------------------------------------
+# IVF partition (coarse k-means + probed inverted lists)
+# ------------------------------------------------------------
+class IVFIndex:
+    """
+    Rows are clustered around n_lists unit centroids (spherical
+    k-means on a sample) and stored contiguously per list, float16.
+    Query = the `nprobe` closest lists, scanned exactly.
+    """
+
+    def __init__(self, n_lists=None, nprobe=16, iterations=8, seed=7):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+
+    def build(self, matrix, block=16384):
+        n = len(matrix)
+        n_lists = max(1, min(self.n_lists or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(self.seed)
+
+        sample = matrix[rng.choice(n, min(n, 64 * n_lists), replace=False)].astype(np.float32)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, block):
+            assign[start:start + block] = np.argmax(
+                matrix[start:start + block].astype(np.float32) @ centroids.T, axis=1
+            )
+
+        order = np.argsort(assign, kind="stable")
+        self.ids = order                      # list position → original row
+        self.vectors = matrix[order]          # float16, grouped by list
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=n_lists))))
+        self.centroids = centroids
+        return self
+
+    def __len__(self):
+        return len(self.ids)
+
+    def probe(self, q):
+        """Positions (into self.vectors) of the nprobe closest lists."""
+        lists = np.argsort(-(self.centroids @ q))[:self.nprobe]
+        return np.concatenate([
+            np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists
+        ])
+
+    def scores(self, q, positions=None, block=16384):
+        if positions is not None:
+            return self.vectors[positions].astype(np.float32) @ q
+        out = np.empty(len(self.vectors), dtype=np.float32)
+        for start in range(0, len(self.vectors), block):
+            out[start:start + block] = self.vectors[start:start + block].astype(np.float32) @ q
+        return out
+
+    def search(self, q, k=10, exact=False):
+        """Returns (original rows, scores), best first."""
+        if exact:
+            positions = np.arange(len(self.vectors))
+            scores = self.scores(q)
+        else:
+            positions = self.probe(q)
+            scores = self.scores(q, positions)
+
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self.ids[positions[top]], scores[top]
+
+
+# ------------------------------------------------------------
+# Menu index
+# ------------------------------------------------------------
+class SemanticMenuIndex:
+    """
+    One vector per (restaurant, dish); text = "<dish> <cuisine>".
+    search()  → [(score, restaurant, dish)] best first
+    match()   → {restaurant: best score} for confident hits
+    """
+
+    def __init__(self, restaurants, dim=512, n_lists=None, nprobe=16, min_score=0.15, relative=0.6):
+        self.vectorizer = HashingVectorizer(dim)
+        self.min_score = min_score
+        self.relative = relative  # keep hits within this fraction of the best one
+
+        self.doc_names = []
+        self.doc_dishes = []
+        texts = []
+        for r in restaurants:
+            for dish in r.get("menu_items", []):
+                self.doc_names.append(r["name"])
+                self.doc_dishes.append(dish)
+                texts.append(f"{dish} {r.get('cuisine', '')}")
+
+        self.ivf = IVFIndex(n_lists, nprobe)
+        if texts:
+            self.ivf.build(self.vectorizer.transform(texts))
+
+        logging.info(
+            f"[SEMANTIC INDEX] {len(texts)} dishes, "
+            f"{self.ivf.vectors.nbytes / 1e6 if texts else 0:.1f} MB float16"
+        )
+
+    def search(self, text, k=10, exact=False):
+        q = self.vectorizer.transform_one(text)
+        if not q.any() or not self.doc_names:
+            return []
+        rows, scores = self.ivf.search(q, k, exact)
+        return [(float(s), self.doc_names[i], self.doc_dishes[i]) for i, s in zip(rows, scores)]
+
+    def match(self, text, k=10):
+        """Comma-separated food lists ("pakora, samosa") are matched per item."""
+        return self._match(text, k, by_dish=False)
+
+    def match_dishes(self, text, k=10):
+        """Like match(), keyed by dish (lower case) instead of restaurant."""
+        return self._match(text, k, by_dish=True)
+
+    def _match(self, text, k, by_dish):
+        hits = {}
+        for part in (text or "").split(","):
+            found = self.search(part, k)
+            if not found:
+                continue
+            floor = max(self.min_score, found[0][0] * self.relative)
+            for score, name, dish in found:
+                key = dish.lower() if by_dish else name
+                if score >= floor and score > hits.get(key, 0.0):
+                    hits[key] = score
+        if hits:
+            logging.info(f"[SEMANTIC MATCH] {text!r} → {sorted(hits, key=hits.get, reverse=True)}")
+        return hits
+
+
+# ------------------------------------------------------------
+# Benchmark: recall@10 and latency vs brute force
+# ------------------------------------------------------------
+def _typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    op = rng.choice(("drop", "swap", "double"))
+    if op == "drop":
+        return word[:i] + word[i + 1:]
+    if op == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + word[i] + word[i:]
+
+
+def bench(n_dishes=100_000, n_queries=200, k=10):
+    rng = random.Random(7)
+    styles = ["paneer", "chicken", "veg", "mutton", "egg", "aloo", "mushroom", "prawn", "dal", "gobi"]
+    bases = ["biryani", "tikka", "masala", "korma", "curry", "momos", "noodles", "pizza", "pasta",
+             "dosa", "paratha", "kebab", "pulao", "roll", "sandwich", "burger", "soup", "salad"]
+    extras = ["butter", "spicy", "tandoori", "hyderabadi", "schezwan", "cheese", "garlic", "lemon",
+              "smoky", "crispy", "kadai", "malai", "achari", "peri peri", "chilli"]
+    cuisines = ["north indian", "south indian", "chinese", "italian", "street food", "mughlai"]
+
+    restaurants = []
+    per = 20
+    for i in range(n_dishes // per):
+        menu = [f"{rng.choice(extras)} {rng.choice(styles)} {rng.choice(bases)}" for _ in range(per)]
+        restaurants.append({"name": f"restaurant {i}", "cuisine": rng.choice(cuisines), "menu_items": menu})
+
+    start = time.perf_counter()
+    index = SemanticMenuIndex(restaurants)
+    build_s = time.perf_counter() - start
+
+    queries = []
+    for _ in range(n_queries):
+        words = rng.choice(restaurants)["menu_items"][rng.randrange(per)].split()
+        queries.append(" ".join(_typo(w, rng) for w in rng.sample(words, 2)))
+
+    recall = 0.0
+    ann_t, exact_t = [], []
+    for q in queries:
+        vec = index.vectorizer.transform_one(q)
+
+        start = time.perf_counter()
+        _, exact_scores = index.ivf.search(vec, k, exact=True)
+        exact_t.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        _, ann_scores = index.ivf.search(vec, k)
+        ann_t.append(time.perf_counter() - start)
+
+        # ties at the k-th score count as hits
+        kth = exact_scores[-1] if len(exact_scores) else 0.0
+        recall += min(int((ann_scores >= kth - 1e-6).sum()), k) / k
+
+    ann_t.sort()
+    exact_t.sort()
+    return {
+        "dishes": len(index.ivf),
+        "lists": len(index.ivf.centroids),
+        "matrix_mb": round(index.ivf.vectors.nbytes / 1e6, 1),
+        "build_s": round(build_s, 2),
+        "recall_at_10": round(recall / n_queries, 3),
+        "ann_ms_p50": round(ann_t[len(ann_t) // 2] * 1000, 3),
+        "exact_ms_p50": round(exact_t[len(exact_t) // 2] * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Semantic menu search")
+    parser.add_argument("--bench", type=int, metavar="N", default=100_000, help="index N synthetic dishes")
+    args = parser.parse_args()
+    print(json.dumps(bench(args.bench)))
@@ -1,32 +1,90 @@
+import io
 import os
+import time
+import atexit
 import logging
-import tempfile
 import speech_recognition as sr
 from groq import Groq
 
+from agents.metrics import metrics
+from agents.streaming_stt import StreamingTranscriber
+from agents.circuit_breaker import breaker, GROQ_WHISPER
+
+STT_COMPRESSION_MODES = ("none", "16k", "flac")
+
+
+class _TimedUpload(io.BytesIO):
+    """Upload body that notes when the HTTP client read past its last byte."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.sent_at = None
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        if not chunk:
+            # the client asks again only after writing the last chunk
+            self.sent_at = time.perf_counter()
+        return chunk
+
 
 class SpeechAgent:
     """
     Handles:
         - Recording microphone audio
-        - Converting raw audio → WAV temp file
+        - Encoding audio in memory (optionally 16 kHz / FLAC)
         - Sending to Groq Whisper (whisper-large-v3)
         - Returning clean text
 
     Now optimized for Hinglish (Indian Hindi + English mix).
+
+    STT_COMPRESSION:
+        "none" → raw WAV as recorded
+        "16k"  → 16 kHz mono 16-bit WAV (Whisper's native rate, default)
+        "flac" → 16 kHz FLAC (needs the flac encoder, else falls back to "16k")
+
+    Microphone:
+        - opened once per session and kept open between turns
+        - ambient noise calibrated once, re-calibrated only when the
+          energy threshold drifts (STT_RECALIBRATE_DRIFT ratio) or the
+          calibration is older than STT_RECALIBRATE_AFTER seconds
     """
 
-    def __init__(self, groq_api_key=None, debug=False):
+    def __init__(self, groq_api_key=None, debug=False, compression=None):
         self.debug = debug
         self.recognizer = sr.Recognizer()
 
-        # Initialize Groq client
+        self.compression = (compression or os.getenv("STT_COMPRESSION", "16k")).lower()
+        if self.compression not in STT_COMPRESSION_MODES:
+            logging.warning(f"[STT] Unknown compression '{self.compression}' → using '16k'")
+            self.compression = "16k"
+
+        # Per-request upload/timing report of the last audio_to_text() call
+        self.last_stats = None
+
+        # Session microphone + calibration state
+        self._mic = None
+        self._source = None
+        self._baseline_energy = None
+        self._calibrated_at = 0.0
+        self.recalibrate_drift = float(os.getenv("STT_RECALIBRATE_DRIFT", 2.0))
+        self.recalibrate_after = float(os.getenv("STT_RECALIBRATE_AFTER", 300))
+        atexit.register(self.close)
+
+        # VAD endpointing + chunked transcription (lazy)
+        self._streamer = None
+
+        # Initialize Groq client (GROQ_STT_BASE_URL, else GROQ_BASE_URL,
+        # points it at a stand-in server)
         try:
-            self.groq = Groq(api_key=groq_api_key)
+            self.groq = Groq(api_key=groq_api_key, base_url=os.getenv("GROQ_STT_BASE_URL") or None)
         except Exception as e:
             logging.error(f"[STT INIT ERROR] Failed to init Groq client: {e}")
             self.groq = None
 
+        # Whisper down / rate limiting → skip straight to typed input
+        self.breaker = breaker(GROQ_WHISPER)
+
     # ------------------------------------------------------------
     # Record from microphone
     # ------------------------------------------------------------
@@ -34,17 +92,26 @@ class SpeechAgent:
         """
         Records microphone audio.
         """
+        start = time.perf_counter()
         try:
-            with sr.Microphone() as source:
-                logging.info("Adjusting for ambient noise...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            source = self._open_source()
 
-                logging.info("Listening...")
-                return self.recognizer.listen(
-                    source,
-                    timeout=timeout,
-                    phrase_time_limit=phrase_time_limit
-                )
+            if self._needs_calibration():
+                self.calibrate()
+            else:
+                self._drain(source)
+
+            # dead time before we actually listen (calibration, device open)
+            metrics.observe("stt.record_overhead", time.perf_counter() - start)
+
+            logging.info("Listening...")
+            audio = self.recognizer.listen(
+                source,
+                timeout=timeout,
+                phrase_time_limit=phrase_time_limit
+            )
+            metrics.observe("stt.record", time.perf_counter() - start)
+            return audio
 
         except sr.WaitTimeoutError:
             logging.warning("[STT] Timeout: No speech detected.")
@@ -52,15 +119,123 @@ class SpeechAgent:
 
         except Exception as e:
             logging.error(f"[STT RECORD ERROR] {e}")
+            self.close()  # reopen the device on the next turn
             return None
 
+    # ------------------------------------------------------------
+    # Record + transcribe while the user is still speaking
+    # ------------------------------------------------------------
+    def listen_streaming(self, on_partial=None, timeout=6, phrase_time_limit=15,
+                         source=None, realtime=False):
+        """
+        VAD-endpointed recording with overlapping chunk uploads.
+        on_partial(text) receives the stitched transcript so far.
+
+        `source` defaults to the session microphone; any 16-bit
+        sr.AudioSource works (e.g. sr.AudioFile for WAV fixtures).
+        """
+        if not self.groq:
+            logging.error("[STT ERROR] Groq client not initialized.")
+            return None
+
+        if self._streamer is None:
+            self._streamer = StreamingTranscriber(
+                self.audio_to_text,
+                chunk_s=float(os.getenv("STT_CHUNK_S", 2.0)),
+                overlap_s=float(os.getenv("STT_OVERLAP_S", 0.5))
+            )
+
+        try:
+            if source is None:
+                source = self._open_source()
+                if self._needs_calibration():
+                    self.calibrate()
+                else:
+                    self._drain(source)
+
+            logging.info("Listening (streaming)...")
+            return self._streamer.listen(
+                source,
+                threshold=self.recognizer.energy_threshold,
+                timeout=timeout,
+                phrase_time_limit=phrase_time_limit,
+                on_partial=on_partial,
+                realtime=realtime
+            )
+
+        except sr.WaitTimeoutError:
+            logging.warning("[STT] Timeout: No speech detected.")
+            return None
+
+        except Exception as e:
+            logging.error(f"[STT STREAM ERROR] {e}")
+            return None
+
+    # ------------------------------------------------------------
+    # Session microphone
+    # ------------------------------------------------------------
+    def _open_source(self):
+        if self._source is None:
+            self._mic = sr.Microphone()
+            self._source = self._mic.__enter__()
+            self._baseline_energy = None
+        return self._source
+
+    def close(self):
+        mic, self._mic, self._source = self._mic, None, None
+        if mic:
+            try:
+                mic.__exit__(None, None, None)
+            except Exception as e:
+                logging.error(f"[STT CLOSE ERROR] {e}")
+
+    def _drain(self, source):
+        """Drops audio buffered while we were not listening (e.g. TTS playback)."""
+        try:
+            stale = source.stream.pyaudio_stream.get_read_available()
+            if stale > 0:
+                source.stream.read(stale)
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------
+    # Ambient noise calibration
+    # ------------------------------------------------------------
+    def calibrate(self, duration=0.5):
+        start = time.perf_counter()
+        logging.info("Adjusting for ambient noise...")
+        self.recognizer.adjust_for_ambient_noise(self._open_source(), duration=duration)
+
+        self._baseline_energy = self.recognizer.energy_threshold
+        self._calibrated_at = time.monotonic()
+        metrics.incr("stt.calibrations")
+        metrics.observe("stt.calibrate", time.perf_counter() - start)
+
+    def _needs_calibration(self):
+        if not self._baseline_energy:
+            return True
+
+        if time.monotonic() - self._calibrated_at > self.recalibrate_after:
+            logging.info("[STT] Calibration expired → re-calibrating")
+            return True
+
+        # dynamic_energy_threshold moves the threshold while listening;
+        # a large move means the room changed
+        ratio = self.recognizer.energy_threshold / self._baseline_energy
+        if ratio > self.recalibrate_drift or ratio < 1 / self.recalibrate_drift:
+            logging.info(f"[STT] Energy drifted x{ratio:.2f} → re-calibrating")
+            return True
+
+        return False
+
     # ------------------------------------------------------------
     # Convert audio → Hinglish text (Hindi + English)
     # ------------------------------------------------------------
-    def audio_to_text(self, audio):
+    def audio_to_text(self, audio, timeout=None):
         """
         Uploads audio to Groq Whisper.
         Forces Hinglish parsing using `language='hi'`.
+        timeout = seconds for the request (request latency budget)
         """
 
         if not audio:
@@ -71,34 +246,103 @@ class SpeechAgent:
             logging.error("[STT ERROR] Groq client not initialized.")
             return None
 
-        temp_path = None
-
+        request_start = None
         try:
-            # Save audio temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                tmp.write(audio.get_wav_data())
-                temp_path = tmp.name
+            # Encode in memory (no temp file)
+            start = time.perf_counter()
+            filename, data = self._encode_audio(audio)
+            encode_s = time.perf_counter() - start
+
+            # admitted right before the request: every allowed call
+            # (half-open probes included) records an outcome
+            if not self.breaker.allow():
+                logging.warning("[STT] Whisper circuit open → skipping transcription.")
+                return None
 
             # STT Hinglish mode
-            with open(temp_path, "rb") as f:
-                transcript = self.groq.audio.transcriptions.create(
-                    file=(temp_path, f.read()),
-                    model="whisper-large-v3",
-                    response_format="verbose_json",
-                    language="hi"       # <---- FORCE HINGLISH / HINDI PARSING
-                )
+            body = _TimedUpload(data)
+            start = request_start = time.perf_counter()
+            raw = self.groq.audio.transcriptions.with_raw_response.create(
+                file=(filename, body),
+                model="whisper-large-v3",
+                response_format="verbose_json",
+                language="hi",      # <---- FORCE HINGLISH / HINDI PARSING
+                **({"timeout": timeout} if timeout else {})
+            )
+            transcript = raw.parse()
+            request_s = time.perf_counter() - start
+            self.breaker.record(True, request_s)
+
+            upload_s = body.sent_at - start if body.sent_at else None
+            self._report(len(data), encode_s, request_s, upload_s, raw.headers)
 
             text = transcript.text.strip()
             logging.info(f"STT OUTPUT (Hinglish): {text}")
             return text
 
         except Exception as e:
+            if request_start is not None:
+                self.breaker.record(False, time.perf_counter() - request_start)
             logging.error(f"[STT FAIL] {e}")
             return None
 
-        finally:
+    # ------------------------------------------------------------
+    # In-memory encoding (+ optional compression)
+    # ------------------------------------------------------------
+    def _encode_audio(self, audio):
+        """Returns (filename, bytes) ready for upload."""
+        rate = 16000 if audio.sample_rate > 16000 else None
+
+        if self.compression == "flac":
             try:
-                if temp_path and os.path.exists(temp_path):
-                    os.remove(temp_path)
-            except:
-                pass
+                return "speech.flac", audio.get_flac_data(convert_rate=rate, convert_width=2)
+            except Exception as e:
+                logging.warning(f"[STT] FLAC encode failed ({e}) → using 16 kHz WAV")
+
+        if self.compression in ("16k", "flac"):
+            return "speech.wav", audio.get_wav_data(convert_rate=rate, convert_width=2)
+
+        return "speech.wav", audio.get_wav_data()
+
+    # ------------------------------------------------------------
+    # Upload size + upload vs transcription time
+    # ------------------------------------------------------------
+    def _report(self, upload_bytes, encode_s, request_s, upload_s, headers):
+        """
+        upload_s is timed client-side: request start → the HTTP client
+        finished writing the body (small bodies can still sit in the
+        socket buffer, so it is a lower bound). The rest of the round
+        trip is transcription + response; an `openai-processing-ms`
+        header (the stand-in sends one, Groq may not) replaces it with
+        the server's own transcription time.
+        """
+        transcribe_s = None
+        try:
+            transcribe_s = float(headers.get("openai-processing-ms")) / 1000.0
+        except (TypeError, ValueError):
+            if upload_s is not None:
+                transcribe_s = request_s - upload_s
+
+        self.last_stats = {
+            "upload_bytes": upload_bytes,
+            "compression": self.compression,
+            "encode_s": encode_s,
+            "request_s": request_s,
+            "upload_s": upload_s,
+            "transcribe_s": transcribe_s,
+        }
+
+        metrics.incr("stt.upload_bytes", upload_bytes)
+        metrics.observe("stt.encode", encode_s)
+        metrics.observe("stt.request", request_s)
+        if upload_s is not None:
+            metrics.observe("stt.upload", upload_s)
+        if transcribe_s is not None:
+            metrics.observe("stt.transcribe", transcribe_s)
+
+        logging.info(
+            f"[STT STATS] {upload_bytes} bytes ({self.compression}) | "
+            f"encode {encode_s * 1000:.1f} ms | request {request_s * 1000:.1f} ms"
+            + (f" (upload {upload_s * 1000:.1f} ms, transcribe {transcribe_s * 1000:.1f} ms)"
+               if upload_s is not None and transcribe_s is not None else "")
+        )
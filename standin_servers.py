@@ -0,0 +1,498 @@
+"""
+Local stand-in servers that mimic the external APIs offline.
+
+    WhisperStandin → Groq Whisper  (POST /openai/v1/audio/transcriptions)
+    ChatStandin    → Groq chat     (POST /openai/v1/chat/completions)
+    TTSStandin     → ElevenLabs    (POST /v1/text-to-speech/<voice>/stream)
+
+Point the agents at them with GROQ_STT_BASE_URL / GROQ_CHAT_BASE_URL
+(or GROQ_BASE_URL for both) and ELEVENLABS_BASE_URL=<server.url>.
+
+Response times are drawn from a Latency distribution (lognormal, so
+the tail looks like a real API). Chat and TTS stream their output
+(SSE tokens / chunked MP3) at a configurable pace.
+
+Every stand-in can inject faults (set_faults): a fraction of requests
+answered with an error status (503, 429 + retry-after, ...) and extra
+latency, e.g. to drive the circuit breakers through an outage. A
+token-bucket rate limit (set_rate_limit) answers 429 like the real
+APIs once the request rate is exceeded.
+"""
+import io
+import os
+import re
+import sys
+import json
+import math
+import time
+import wave
+import random
+import email
+import email.policy
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ------------------------------------------------------------
+# Shared server plumbing
+# ------------------------------------------------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        standin = self.server.standin
+        standin.requests += 1
+        if standin.inject_fault(self) or standin.rate_limit_exceeded(self):
+            return
+        standin.handle(self, self.path.split("?")[0], body)
+
+    def send_json(self, status, obj, headers=None):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, status, content_type, chunks, headers=None):
+        """Chunked transfer encoding; every item of `chunks` is sent as it is produced."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        try:
+            for data in chunks:
+                if data:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client timed out / cancelled
+
+    def log_message(self, fmt, *args):
+        logging.debug("[STANDIN] " + fmt % args)
+
+
+class Latency:
+    """
+    Seconds per request: median_s x exp(sigma x N(0, 1)).
+        Latency(0.3)              always 300 ms
+        Latency(0.3, sigma=0.5)   median 300 ms, p99 ~ 0.96 s
+    """
+
+    def __init__(self, median_s=0.0, sigma=0.0):
+        self.median_s = float(median_s)
+        self.sigma = float(sigma)
+
+    @classmethod
+    def parse(cls, value):
+        """Latency / seconds / "median_s[:sigma]" (CLI + env friendly)."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            median, _, sigma = value.partition(":")
+            return cls(median or 0.0, sigma or 0.0)
+        return cls(value or 0.0)
+
+    def sample(self, rng):
+        if not self.median_s or not self.sigma:
+            return self.median_s
+        return self.median_s * math.exp(self.sigma * rng.gauss(0.0, 1.0))
+
+    def __repr__(self):
+        return f"Latency({self.median_s:g}, sigma={self.sigma:g})"
+
+
+class StandinServer:
+    """
+    Runs on 127.0.0.1 in a daemon thread. Subclasses implement handle().
+
+    Faults: error_rate of requests get error_status; fault_latency_s is
+    added before every request (slow backend).
+    Rate limit: rate_limit requests/s with bursts of up to `burst`;
+    over the limit → 429 + retry-after.
+    """
+
+    def __init__(self, port=0, error_rate=0.0, error_status=503, fault_latency_s=0.0,
+                 rate_limit=None, burst=None, seed=None):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.standin = self
+        self._thread = None
+        self.requests = 0
+        self.faults_injected = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._bucket_lock = threading.Lock()
+        self.set_faults(error_rate, error_status, fault_latency_s)
+        self.set_rate_limit(rate_limit, burst)
+
+    def sleep(self, latency):
+        """Waits one sample of a Latency distribution."""
+        delay = latency.sample(self._rng)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def set_faults(self, error_rate=None, status=None, latency_s=None):
+        """Changes fault injection at runtime (None = keep)."""
+        if error_rate is not None:
+            self.error_rate = error_rate
+        if status is not None:
+            self.error_status = status
+        if latency_s is not None:
+            self.fault_latency_s = latency_s
+
+    def inject_fault(self, req):
+        """True if the request was answered with an injected error."""
+        if self.fault_latency_s:
+            time.sleep(self.fault_latency_s)
+        if not self.error_rate or self._rng.random() >= self.error_rate:
+            return False
+
+        self.faults_injected += 1
+        headers = {"retry-after": 1} if self.error_status == 429 else None
+        req.send_json(
+            self.error_status,
+            {"error": {"message": "injected fault", "type": "standin_fault"}},
+            headers=headers
+        )
+        return True
+
+    def set_rate_limit(self, rate_limit=None, burst=None):
+        """rate_limit = requests per second (None / 0 = unlimited)."""
+        with self._bucket_lock:
+            self.rate_limit = rate_limit or None
+            self.burst = float(burst or max(1.0, rate_limit or 1.0))
+            self._tokens = self.burst
+            self._refilled = time.monotonic()
+
+    def rate_limit_exceeded(self, req):
+        """True if the request was answered with 429 (token bucket empty)."""
+        if not self.rate_limit:
+            return False
+
+        with self._bucket_lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate_limit)
+            self._refilled = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return False
+            wait_s = (1.0 - self._tokens) / self.rate_limit
+
+        self.rate_limited += 1
+        req.send_json(
+            429,
+            {"error": {"message": "rate limit reached", "type": "rate_limit_exceeded"}},
+            headers={
+                "retry-after": max(1, math.ceil(wait_s)),
+                "x-ratelimit-limit-requests": self.rate_limit,
+                "x-ratelimit-remaining-requests": 0,
+            }
+        )
+        return True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"[STANDIN] {type(self).__name__} listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle(self, req, path, body):
+        req.send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+
+# ------------------------------------------------------------
+# Whisper stand-in: replays transcripts of WAV fixtures
+# ------------------------------------------------------------
+def _read_wav(data):
+    with wave.open(io.BytesIO(data), "rb") as w:
+        return w.getframerate(), w.getsampwidth(), w.getnchannels(), w.readframes(w.getnframes())
+
+
+class WhisperStandin(StandinServer):
+    """
+    Fixtures: <dir>/<name>.wav (16 kHz mono 16-bit) plus either
+        <name>.json  {"words": [[start_s, end_s, "word"], ...]}
+        <name>.txt   plain transcript, words spread evenly over the clip
+
+    An uploaded clip (full utterance or streaming chunk) is located
+    inside a fixture by its PCM samples; the words whose midpoint falls
+    inside the clip's time range are returned. Unknown audio → "".
+    """
+
+    def __init__(self, fixtures_dir, latency_s=0.0, port=0, **faults):
+        super().__init__(port, **faults)
+        self.latency = Latency.parse(latency_s)
+        self.fixtures = []
+
+        for fname in sorted(os.listdir(fixtures_dir)):
+            if not fname.endswith(".wav"):
+                continue
+            base = os.path.join(fixtures_dir, fname[:-4])
+            with open(base + ".wav", "rb") as f:
+                rate, width, channels, pcm = _read_wav(f.read())
+            if (width, channels) != (2, 1):
+                logging.warning(f"[STANDIN] Skipping {fname}: needs mono 16-bit")
+                continue
+            duration = len(pcm) / (2 * rate)
+            self.fixtures.append({
+                "name": fname[:-4],
+                "rate": rate,
+                "pcm": pcm,
+                "words": self._load_words(base, duration),
+            })
+
+    @staticmethod
+    def _load_words(base, duration):
+        if os.path.exists(base + ".json"):
+            with open(base + ".json", "r", encoding="utf-8") as f:
+                return [tuple(w) for w in json.load(f)["words"]]
+
+        with open(base + ".txt", "r", encoding="utf-8") as f:
+            words = f.read().split()
+        step = duration / max(1, len(words))
+        return [(i * step, (i + 1) * step, w) for i, w in enumerate(words)]
+
+    # --------------------------------------------------------
+    def transcribe(self, pcm, rate):
+        probe = pcm[:min(len(pcm), 640)]
+        for fx in self.fixtures:
+            if fx["rate"] != rate or not probe:
+                continue
+            pos = fx["pcm"].find(probe)
+            while pos != -1 and pos % 2:
+                pos = fx["pcm"].find(probe, pos + 1)
+            if pos == -1:
+                continue
+
+            t0 = pos / (2 * rate)
+            t1 = t0 + len(pcm) / (2 * rate)
+            words = [w for s, e, w in fx["words"] if t0 <= (s + e) / 2 < t1]
+            return " ".join(words)
+        return ""
+
+    def handle(self, req, path, body):
+        if not path.endswith("/audio/transcriptions"):
+            return super().handle(req, path, body)
+
+        start = time.perf_counter()
+
+        msg = email.message_from_bytes(
+            b"Content-Type: " + req.headers["Content-Type"].encode() + b"\r\n\r\n" + body,
+            policy=email.policy.HTTP
+        )
+        upload = None
+        for part in msg.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                upload = part.get_payload(decode=True)
+
+        try:
+            rate, width, channels, pcm = _read_wav(upload or b"")
+        except Exception:
+            return req.send_json(400, {"error": {"message": "expected a WAV upload"}})
+
+        self.sleep(self.latency)
+
+        text = self.transcribe(pcm, rate)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        req.send_json(
+            200,
+            {"text": text, "language": "hi", "duration": len(pcm) / (2 * rate), "segments": []},
+            headers={"openai-processing-ms": f"{elapsed_ms:.0f}"}
+        )
+
+
+# ------------------------------------------------------------
+# Chat stand-in: Groq chat completions (plain JSON or SSE stream)
+# ------------------------------------------------------------
+def order_reply(messages):
+    """Default reply: a short order line around the prompt's restaurant."""
+    prompt = messages[-1].get("content", "") if messages else ""
+    m = re.search(r"^Recommendation:\s*(.+)$", prompt, re.M)
+    name = m.group(1).split(" — ")[0].strip() if m else "Yeh jagah"
+    return f"{name} se Zomato pe order karlo, ekdum mast hai! Delivery bhi jaldi aa jayegi."
+
+
+class ChatStandin(StandinServer):
+    """
+    first_token  Latency until the first token (queue + prefill)
+    token_s      seconds per further token (decode speed)
+    reply        messages → reply text (default: order_reply)
+
+    "stream": true → one SSE chunk per token, else one JSON body once
+    the whole reply is "generated".
+    """
+
+    def __init__(self, first_token=0.25, token_s=0.01, reply=None, port=0, **faults):
+        super().__init__(port, **faults)
+        self.first_token = Latency.parse(first_token)
+        self.token_s = float(token_s)
+        self.reply = reply or order_reply
+        self.completions = 0
+
+    def handle(self, req, path, body):
+        if not path.endswith("/chat/completions"):
+            return super().handle(req, path, body)
+
+        try:
+            payload = json.loads(body or b"{}")
+            messages = payload["messages"]
+        except (ValueError, KeyError):
+            return req.send_json(400, {"error": {"message": "expected {model, messages}"}})
+
+        self.completions += 1
+        model = payload.get("model", "standin")
+        tokens = re.findall(r"\S+\s*", self.reply(messages))
+        meta = {"id": f"chatcmpl-standin-{self.completions}", "created": int(time.time()), "model": model}
+
+        self.sleep(self.first_token)
+        if payload.get("stream"):
+            return req.send_stream(200, "text/event-stream", self._sse(meta, tokens))
+
+        time.sleep(self.token_s * max(0, len(tokens) - 1))
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        req.send_json(200, {
+            **meta,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            },
+        })
+
+    def _sse(self, meta, tokens):
+        def event(delta, finish=None):
+            chunk = {**meta, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            return b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n"
+
+        yield event({"role": "assistant", "content": ""})
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_s)
+            yield event({"content": token})
+        yield event({}, "stop")
+        yield b"data: [DONE]\n\n"
+
+
+# ------------------------------------------------------------
+# TTS stand-in: ElevenLabs streaming endpoint (chunked MP3)
+# ------------------------------------------------------------
+# One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, 26.1 ms
+MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+MP3_FRAME_S = 1152 / 44100
+MP3_BYTES_PER_S = len(MP3_FRAME) / MP3_FRAME_S
+
+
+class TTSStandin(StandinServer):
+    """
+    first_byte   Latency until the first audio chunk
+    speed        rendering speed vs playback (2.0 = audio arrives twice
+                 as fast as it plays; 0 = as fast as the socket allows)
+    chars_per_s  speaking rate → audio duration of a text
+
+    Audio is silent MP3, so a real player can consume it too.
+    """
+
+    def __init__(self, first_byte=0.3, speed=4.0, chars_per_s=15.0, chunk_bytes=4096, port=0, **faults):
+        super().__init__(port, **faults)
+        self.first_byte = Latency.parse(first_byte)
+        self.speed = float(speed)
+        self.chars_per_s = float(chars_per_s)
+        self.chunk_bytes = int(chunk_bytes)
+        self.renders = 0
+
+    def audio_for(self, text):
+        frames = max(1, math.ceil(len(text) / self.chars_per_s / MP3_FRAME_S))
+        return MP3_FRAME * frames
+
+    def handle(self, req, path, body):
+        if not re.search(r"/v1/text-to-speech/[^/]+/stream$", path):
+            return super().handle(req, path, body)
+        if not req.headers.get("xi-api-key"):
+            return req.send_json(401, {"detail": {"status": "invalid_api_key", "message": "missing xi-api-key"}})
+
+        try:
+            text = json.loads(body or b"{}")["text"]
+        except (ValueError, KeyError):
+            text = None
+        if not text:
+            return req.send_json(422, {"detail": {"status": "invalid_text", "message": "text is required"}})
+
+        self.renders += 1
+        self.sleep(self.first_byte)
+        req.send_stream(200, "audio/mpeg", self._chunks(self.audio_for(text)))
+
+    def _chunks(self, audio):
+        pause = self.chunk_bytes / MP3_BYTES_PER_S / self.speed if self.speed else 0.0
+        for i in range(0, len(audio), self.chunk_bytes):
+            if i and pause:
+                time.sleep(pause)
+            yield audio[i:i + self.chunk_bytes]
+
+
+# ------------------------------------------------------------
+# Replay: stream every WAV fixture through SpeechAgent.listen_streaming
+#   python -m agents.standin_servers <fixtures_dir>
+# ------------------------------------------------------------
+def replay_fixtures(fixtures_dir, latency_s=0.2):
+    import speech_recognition as sr
+    from agents.speech_agent import SpeechAgent
+    from agents.router_agent import route
+
+    server = WhisperStandin(fixtures_dir, latency_s=latency_s).start()
+    os.environ["GROQ_BASE_URL"] = server.url
+    agent = SpeechAgent(groq_api_key="standin", compression="16k")
+
+    report = []
+    for fx in server.fixtures:
+        t0 = time.perf_counter()
+        partials = []
+
+        def on_partial(text):
+            partials.append((time.perf_counter() - t0, text, route(text)))
+
+        with sr.AudioFile(os.path.join(fixtures_dir, fx["name"] + ".wav")) as source:
+            text = agent.listen_streaming(on_partial=on_partial, source=source, realtime=True)
+
+        expected = " ".join(w for _, _, w in fx["words"])
+        report.append({
+            "fixture": fx["name"],
+            "text": text,
+            "match": (text or "").split() == expected.split(),
+            "partials": [(round(t, 2), p, r) for t, p, r in partials],
+            "total_s": round(time.perf_counter() - t0, 3),
+        })
+
+    server.stop()
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    for row in replay_fixtures(sys.argv[1]):
+        print(json.dumps(row, ensure_ascii=False))
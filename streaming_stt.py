@@ -0,0 +1,217 @@
+import math
+import time
+import logging
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+from agents.metrics import metrics
+
+
+# ------------------------------------------------------------
+# Energy based voice activity detection
+# ------------------------------------------------------------
+class EnergyVAD:
+    """
+    Frame-level speech / silence decisions.
+
+    - speech starts after `start_s` of frames above threshold
+    - speech ends after `hangover_s` of frames below threshold
+      (much shorter than speech_recognition's 0.8 s pause_threshold)
+    """
+
+    def __init__(self, threshold, frame_s, start_s=0.06, hangover_s=0.35):
+        self.threshold = threshold
+        self.start_frames = max(1, int(round(start_s / frame_s)))
+        self.hangover_frames = max(1, int(round(hangover_s / frame_s)))
+        self.in_speech = False
+        self._above = 0
+        self._below = 0
+
+    @staticmethod
+    def rms(frame):
+        samples = array("h", frame)
+        if not samples:
+            return 0.0
+        return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+    def update(self, frame):
+        """
+        Feeds one frame. Returns "start", "end" or None.
+        """
+        loud = self.rms(frame) > self.threshold
+
+        if not self.in_speech:
+            self._above = self._above + 1 if loud else 0
+            if self._above >= self.start_frames:
+                self.in_speech = True
+                self._below = 0
+                return "start"
+            return None
+
+        self._below = 0 if loud else self._below + 1
+        if self._below >= self.hangover_frames:
+            self.in_speech = False
+            self._above = 0
+            return "end"
+        return None
+
+
+# ------------------------------------------------------------
+# Transcript stitching
+# ------------------------------------------------------------
+def _norm_word(w):
+    return "".join(ch for ch in w.lower() if ch.isalnum())
+
+
+def stitch(prev, new, max_overlap=8):
+    """
+    Joins two partial transcripts whose audio overlapped:
+    drops the longest prefix of `new` that repeats the tail of `prev`.
+    """
+    if not prev:
+        return (new or "").strip()
+    if not new:
+        return prev.strip()
+
+    a = prev.split()
+    b = new.split()
+    na = [_norm_word(w) for w in a[-max_overlap:]]
+    nb = [_norm_word(w) for w in b[:max_overlap]]
+
+    for k in range(min(len(na), len(nb)), 0, -1):
+        if na[-k:] == nb[:k]:
+            b = b[k:]
+            break
+
+    return " ".join(a + b).strip()
+
+
+# ------------------------------------------------------------
+# Chunked streaming transcription
+# ------------------------------------------------------------
+class StreamingTranscriber:
+    """
+    Records with VAD endpointing and transcribes while the user speaks.
+
+    - Every `chunk_s` of speech, a window (with `overlap_s` of the
+      previous audio) is sent to `transcribe_fn` in the background
+    - Partial transcripts are stitched in order and passed to
+      `on_partial(text)` as soon as they arrive
+    - At the endpoint only the last short window is still pending
+
+    transcribe_fn(sr.AudioData) → str | None
+    """
+
+    def __init__(self, transcribe_fn, chunk_s=2.0, overlap_s=0.5,
+                 hangover_s=0.35, preroll_s=0.3, max_workers=2):
+        self.transcribe_fn = transcribe_fn
+        self.chunk_s = chunk_s
+        self.overlap_s = overlap_s
+        self.hangover_s = hangover_s
+        self.preroll_s = preroll_s
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt-chunk")
+
+    def listen(self, source, threshold, timeout=6, phrase_time_limit=15,
+               on_partial=None, realtime=False):
+        """
+        Returns the stitched transcript (or None).
+        Raises sr.WaitTimeoutError if no speech starts within `timeout`.
+
+        realtime=True paces file sources like a live microphone.
+        """
+        if source.SAMPLE_WIDTH != 2:
+            raise ValueError("StreamingTranscriber expects 16-bit audio")
+
+        frame_s = source.CHUNK / source.SAMPLE_RATE
+        vad = EnergyVAD(threshold, frame_s, hangover_s=self.hangover_s)
+
+        preroll = max(1, int(self.preroll_s / frame_s))
+        chunk_frames = max(1, int(self.chunk_s / frame_s))
+        overlap_frames = int(self.overlap_s / frame_s)
+        limit_frames = int(phrase_time_limit / frame_s) if phrase_time_limit else None
+
+        frames = []
+        futures = []
+        next_chunk = 0
+        waited = 0.0
+        started = False
+        state = {"text": "", "done": 0}
+        event = None
+
+        def submit(lo, hi):
+            audio = sr.AudioData(b"".join(frames[lo:hi]), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            futures.append(self.pool.submit(self.transcribe_fn, audio))
+            metrics.incr("stt.stream_chunks")
+
+        def collect(block):
+            # fire partials strictly in chunk order
+            while state["done"] < len(futures):
+                fut = futures[state["done"]]
+                if not block and not fut.done():
+                    return
+                try:
+                    part = fut.result()
+                except Exception as e:
+                    logging.error(f"[STT CHUNK FAIL] {e}")
+                    part = None
+                state["done"] += 1
+                if part:
+                    state["text"] = stitch(state["text"], part)
+                    if on_partial:
+                        on_partial(state["text"])
+
+        while True:
+            frame = source.stream.read(source.CHUNK)
+            if not frame:
+                break
+            if realtime:
+                time.sleep(frame_s)
+
+            event = vad.update(frame)
+            frames.append(frame)
+
+            if not started:
+                if event == "start":
+                    started = True
+                    speech_start = time.perf_counter()
+                    # keep a little audio before the trigger
+                    frames = frames[-(vad.start_frames + preroll):]
+                    next_chunk = 0
+                else:
+                    frames = frames[-(vad.start_frames + preroll):]
+                    waited += frame_s
+                    if timeout and waited > timeout:
+                        raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                continue
+
+            if event == "end" or (limit_frames and len(frames) >= limit_frames):
+                break
+
+            if len(frames) - next_chunk >= chunk_frames:
+                submit(max(0, next_chunk - overlap_frames), len(frames))
+                next_chunk = len(frames)
+
+            collect(block=False)
+
+        if not started:
+            return None
+
+        endpoint = time.perf_counter()
+        metrics.observe("stt.speech", endpoint - speech_start)
+
+        # final window: everything after the last chunk, minus trailing silence
+        end = len(frames) - vad.hangover_frames if event == "end" else len(frames)
+        end = max(end, next_chunk)
+        if end > next_chunk:
+            submit(max(0, next_chunk - overlap_frames), end)
+        elif not futures:
+            submit(0, len(frames))
+
+        collect(block=True)
+        metrics.observe("stt.endpoint_to_text", time.perf_counter() - endpoint)
+
+        text = state["text"].strip()
+        logging.info(f"[STT STREAM] {len(futures)} chunk(s) → {text}")
+        return text or None
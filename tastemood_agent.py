@@ -1,5 +1,7 @@
 import logging
 
+from agents.fuzzy_lookup import TrigramIndex, FUZZY_RULES
+
 class TasteMoodAgent:
     """
     Maps user mood → suggested food types.
@@ -39,6 +41,13 @@ class TasteMoodAgent:
             "stress": ["tense", "anxious"],
         }
 
+        # Typo / Devanagari tolerant lookup ("celebrte", "exhaustd" → mood key)
+        self._fuzzy_base = {mood: mood for mood in self.mood_map}
+        for mood, syns in self.mood_synonyms.items():
+            for s in syns:
+                self._fuzzy_base.setdefault(s, mood)
+        self._fuzzy = TrigramIndex(self._fuzzy_base)
+
     # ----------------------------------------------------------------
     # Map synonyms → official mood key
     # ----------------------------------------------------------------
@@ -56,8 +65,16 @@ class TasteMoodAgent:
                 if s in t:
                     return mood
 
+        # misspelled / Devanagari check
+        for term in self._fuzzy.find_in_text(text, **FUZZY_RULES):
+            return self._fuzzy_base[term]
+
         return None
 
+    def detect_mood(self, text: str):
+        """Official mood key (e.g. "sad") or None."""
+        return self._normalize_mood(text or "")
+
     # ----------------------------------------------------------------
     # Main entry: return list of suggested food items
     # ----------------------------------------------------------------
@@ -1,37 +1,201 @@
 import logging
-from groq import Groq
 import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from groq import Groq
+
+from agents.local_rewriter import LocalRewriter
+from agents.metrics import metrics
+from agents.circuit_breaker import breaker, GROQ_CHAT
+
+REWRITE_POLICIES = ("local", "auto", "llm")
 
 
 class TeamLeadAgent:
     """
     Rewrites restaurant responses into short,
     friendly Zomato-style Hinglish ordering suggestions.
+
+    Latency bounded:
+        - rewrite() waits at most `deadline` seconds for the LLM
+        - on a miss it returns the raw line immediately
+        - the LLM call keeps running in the background and
+          warms the rewrite cache for the next identical request
+        - failed calls are retried a bounded number of times with jitter
+        - circuit breaker (groq_chat): while open, no call is made and
+          the fallback is returned right away
+
+    Rewrite policy (TEAMLEAD_REWRITE_POLICY):
+        - "local" → always use LocalRewriter templates (no network)
+        - "auto"  → LLM, but LocalRewriter when LLM is slow/unavailable
+        - "llm"   → LLM only, raw line on failure
     """
 
-    def __init__(self):
+    def __init__(self, deadline=None, max_retries=None, request_timeout=None,
+                 cache_size=128, policy=None):
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             logging.error("GROQ_API_KEY is missing!")
 
+        # Latency knobs (constructor arg > env > default)
+        self.deadline = float(deadline if deadline is not None
+                              else os.getenv("TEAMLEAD_DEADLINE", 2.5))
+        self.max_retries = int(max_retries if max_retries is not None
+                               else os.getenv("TEAMLEAD_MAX_RETRIES", 1))
+        self.request_timeout = float(request_timeout if request_timeout is not None
+                                     else os.getenv("TEAMLEAD_REQUEST_TIMEOUT", 15))
+        self.retry_backoff = 0.25
+
+        self.policy = (policy or os.getenv("TEAMLEAD_REWRITE_POLICY", "auto")).lower()
+        if self.policy not in REWRITE_POLICIES:
+            logging.warning(f"[TEAMLEAD] Unknown policy '{self.policy}' → using 'auto'")
+            self.policy = "auto"
+        self.local = LocalRewriter()
+        self.breaker = breaker(GROQ_CHAT)
+
+        # (user_query, raw_top1) → rewritten reply
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._inflight = {}
+        self._lock = threading.Lock()
+
         try:
-            self.client = Groq(api_key=api_key)
+            # Retries are handled here (bounded + jitter), not inside the SDK.
+            # GROQ_CHAT_BASE_URL (else GROQ_BASE_URL) → stand-in server
+            self.client = Groq(
+                api_key=api_key, max_retries=0,
+                base_url=os.getenv("GROQ_CHAT_BASE_URL") or None
+            )
         except Exception as e:
             logging.error(f"[TEAMLEAD INIT ERROR] {e}")
             self.client = None
 
+    # ---------------------------------------------------------
+    # Rewrite cache
+    # ---------------------------------------------------------
+    def _cache_get(self, key):
+        with self._lock:
+            reply = self._cache.get(key)
+            if reply is not None:
+                self._cache.move_to_end(key)
+            return reply
+
+    def _cache_put(self, key, reply):
+        with self._lock:
+            self._cache[key] = reply
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    # ---------------------------------------------------------
+    # LLM call with bounded retry + jitter
+    # ---------------------------------------------------------
+    def _call_llm(self, prompt):
+        attempts = self.max_retries + 1
+
+        for attempt in range(attempts):
+            # the first attempt was admitted by rewrite()
+            if attempt and not self.breaker.allow():
+                logging.warning("[TEAMLEAD] Circuit open → no more retries")
+                break
+
+            start = time.perf_counter()
+            try:
+                resp = self.client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=[{"role": "user", "content": prompt}],
+                    timeout=self.request_timeout
+                )
+                self.breaker.record(True, time.perf_counter() - start)
+                return resp.choices[0].message.content.strip()
+
+            except Exception as e:
+                self.breaker.record(False, time.perf_counter() - start)
+                logging.error(f"[TEAMLEAD ERROR] attempt {attempt + 1}/{attempts}: {e}")
+                metrics.incr("teamlead.errors")
+                if attempt + 1 < attempts:
+                    delay = self.retry_backoff * (2 ** attempt)
+                    time.sleep(delay + random.uniform(0, delay))
+
+        return None
+
+    def _background_call(self, key, prompt, done):
+        start = time.perf_counter()
+        try:
+            reply = self._call_llm(prompt)
+            if reply:
+                self._cache_put(key, reply)
+        finally:
+            metrics.observe("teamlead.llm_latency", time.perf_counter() - start)
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def _start_call(self, key, prompt):
+        """
+        Starts (or joins) the background LLM call for this key.
+        Daemon thread → never blocks process exit.
+        """
+        with self._lock:
+            done = self._inflight.get(key)
+            if done:
+                return done
+
+            done = threading.Event()
+            self._inflight[key] = done
+
+        threading.Thread(
+            target=self._background_call,
+            args=(key, prompt, done),
+            daemon=True
+        ).start()
+        return done
+
+    # ---------------------------------------------------------
+    # Fallback: local template (auto/local) or raw line
+    # ---------------------------------------------------------
+    def _fallback(self, raw_top1, fields):
+        if self.policy != "llm":
+            reply = self.local.rewrite(fields)
+            if reply:
+                metrics.incr("teamlead.local_rewrite")
+                return reply
+        return raw_top1
+
     # ---------------------------------------------------------
     # HINGLISH ORDERING REWRITE
     # ---------------------------------------------------------
-    def rewrite(self, user_query: str, raw_top1: str) -> str:
+    def rewrite(self, user_query: str, raw_top1: str, deadline=None, fields=None, local=False) -> str:
         """
         Creates a friendly Hinglish response that tells the user
         to ORDER from the restaurant on Zomato.
+
+        Waits at most `deadline` seconds (default: self.deadline).
+        `fields` = {"name", "cuisine", "dishes"} of the top result,
+        used by the local template rewriter.
+        `local` = skip the LLM for this call (request budget too low).
         """
 
+        if self.policy == "local" or local:
+            return self._fallback(raw_top1, fields)
+
         if not self.client:
             logging.error("[TEAMLEAD] Client unavailable → using fallback.")
-            return raw_top1
+            return self._fallback(raw_top1, fields)
+
+        key = (user_query, raw_top1)
+        cached = self._cache_get(key)
+        if cached:
+            metrics.incr("teamlead.cache_hit")
+            logging.info(f"[TEAMLEAD CACHE HIT] {cached}")
+            return cached
+
+        if key not in self._inflight and not self.breaker.allow():
+            logging.warning("[TEAMLEAD] Groq chat circuit open → using fallback.")
+            return self._fallback(raw_top1, fields)
 
         prompt = f"""
 Rewrite the restaurant recommendation into a short, friendly Hinglish message,
@@ -51,16 +215,17 @@ Rules:
 - Keep it casual, fun, very Indian
 """
 
-        try:
-            resp = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}]
-            )
+        wait_s = self.deadline if deadline is None else deadline
+        done = self._start_call(key, prompt)
 
-            reply = resp.choices[0].message.content.strip()
-            logging.info(f"[TEAMLEAD REWRITE] {reply}")
-            return reply
+        if not done.wait(wait_s):
+            metrics.incr("teamlead.deadline_miss")
+            logging.warning(f"[TEAMLEAD DEADLINE] No reply in {wait_s:.2f}s → using fallback.")
+            return self._fallback(raw_top1, fields)
 
-        except Exception as e:
-            logging.error(f"[TEAMLEAD ERROR] {e}")
-            return raw_top1
+        reply = self._cache_get(key)
+        if not reply:
+            return self._fallback(raw_top1, fields)
+
+        logging.info(f"[TEAMLEAD REWRITE] {reply}")
+        return reply
@@ -0,0 +1,18 @@
+"""
+The repo is the `agents` package (imported as `from agents.x import y`
+from the project that contains it); make that import work from a
+plain checkout too.
+"""
+import os
+import sys
+import types
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "agents" not in sys.modules:
+    try:
+        import agents  # noqa: F401  (checked out inside a project)
+    except ImportError:
+        package = types.ModuleType("agents")
+        package.__path__ = [REPO]
+        sys.modules["agents"] = package
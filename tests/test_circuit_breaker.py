@@ -0,0 +1,152 @@
+"""
+Circuit breaker state machine, and SpeechAgent behind it against a
+fault-injecting Whisper stand-in.
+"""
+import io
+import time
+import wave
+
+import pytest
+
+from agents.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(**config):
+    clock = FakeClock()
+    config = {"window": 10, "min_calls": 4, "error_rate": 0.5, "slow_s": 1.0, "open_s": 5.0, **config}
+    return CircuitBreaker("test", clock=clock, **config), clock
+
+
+def test_closed_open_half_open_closed():
+    br, clock = make_breaker()
+    for _ in range(4):
+        assert br.allow()
+        br.record(False, 0.1)
+    assert br.state == OPEN
+    assert not br.allow()
+
+    clock.now += 5.0
+    assert br.allow()            # the single probe
+    assert br.state == HALF_OPEN
+    assert not br.allow()        # no second probe while it runs
+    br.record(True, 0.1)
+    assert br.state == CLOSED
+    assert br.allow()
+
+
+def test_failed_probe_reopens():
+    br, clock = make_breaker()
+    for _ in range(4):
+        br.allow()
+        br.record(False)
+    clock.now += 5.0
+    assert br.allow()
+    br.record(False)
+    assert br.state == OPEN
+    assert not br.allow()
+
+
+def test_slow_calls_count_as_failures():
+    br, _ = make_breaker()
+    for _ in range(4):
+        br.allow()
+        br.record(True, 2.0)     # succeeded, but slower than slow_s
+    assert br.state == OPEN
+
+
+def test_below_error_rate_stays_closed():
+    br, _ = make_breaker()
+    for ok in (True, True, True, False, True, True):
+        br.allow()
+        br.record(ok, 0.1)
+    assert br.state == CLOSED
+
+
+# ------------------------------------------------------------
+# Against the fault-injecting stand-in
+# ------------------------------------------------------------
+sr = pytest.importorskip("speech_recognition")
+pytest.importorskip("groq")
+
+
+@pytest.fixture
+def whisper(tmp_path, monkeypatch):
+    from agents.standin_servers import WhisperStandin
+    from agents.speech_agent import SpeechAgent
+
+    server = WhisperStandin(str(tmp_path)).start()
+    monkeypatch.setenv("GROQ_STT_BASE_URL", server.url)
+    agent = SpeechAgent(groq_api_key="standin", compression="16k")
+    agent.groq = agent.groq.with_options(max_retries=0)
+    agent.breaker = CircuitBreaker("whisper-test", window=8, min_calls=4, error_rate=0.5,
+                                   slow_s=0.2, open_s=0.3, probes=1)
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\x00\x01" * 1600)
+    audio = sr.AudioData(buf.getvalue()[44:], 16000, 2)
+
+    yield server, agent, audio
+    server.stop()
+
+
+def test_outage_short_circuits_and_recovers(whisper):
+    server, agent, audio = whisper
+
+    server.set_faults(error_rate=1.0, status=503)
+    for _ in range(4):
+        assert agent.audio_to_text(audio) is None
+    assert agent.breaker.state == OPEN
+
+    # open: nothing reaches the server
+    before = server.requests
+    for _ in range(5):
+        assert agent.audio_to_text(audio) is None
+    assert server.requests == before
+
+    # backend healthy again → one probe after open_s closes the circuit
+    server.set_faults(error_rate=0.0)
+    time.sleep(0.35)
+    assert agent.audio_to_text(audio) == ""
+    assert server.requests == before + 1
+    assert agent.breaker.state == CLOSED
+
+
+def test_slow_backend_opens_circuit(whisper):
+    server, agent, audio = whisper
+
+    server.set_faults(latency_s=0.3)
+    for _ in range(4):
+        agent.audio_to_text(audio)
+    assert agent.breaker.state == OPEN
+
+
+def test_encode_failure_does_not_consume_probe(whisper):
+    server, agent, audio = whisper
+    br = agent.breaker
+    for _ in range(4):
+        br.allow()
+        br.record(False)
+    time.sleep(0.35)
+
+    def broken(_audio):
+        raise RuntimeError("encoder failed")
+
+    agent._encode_audio = broken
+    assert agent.audio_to_text(audio) is None
+    del agent._encode_audio
+
+    # the probe is still available and closes the circuit
+    assert agent.audio_to_text(audio) == ""
+    assert br.state == CLOSED
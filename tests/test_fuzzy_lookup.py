@@ -0,0 +1,38 @@
+"""
+TrigramIndex on a dish vocabulary: the misspellings users type are
+found, and short everyday words are not bent into dishes.
+"""
+import pytest
+
+from agents.fuzzy_lookup import TrigramIndex
+
+VOCAB = ["biryani", "veg biryani", "paneer", "paneer tikka", "momos", "pizza", "pasta",
+         "cafe", "ice cream", "masala dosa", "manchurian"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return TrigramIndex(VOCAB)
+
+
+@pytest.mark.parametrize("typed, term", [
+    ("biriyani", "biryani"),
+    ("panir", "paneer"),
+    ("momo", "momos"),
+    ("pizaa", "pizza"),
+    ("manchuriyan", "manchurian"),
+    ("बिरयानी", "biryani"),
+])
+def test_misspellings_are_found(index, typed, term):
+    assert index.lookup(typed) == term
+
+
+@pytest.mark.parametrize("typed", ["cake", "rice", "rasta", "pie", "mono"])
+def test_short_words_stay_as_typed(index, typed):
+    assert index.lookup(typed) is None
+
+
+def test_correct_rewrites_only_misspelled_words(index):
+    assert index.correct("2 pizaa aur momo") == "2 pizza aur momos"
+    assert index.correct("i want cake") == "i want cake"
+    assert index.correct("rice bowl") == "rice bowl"
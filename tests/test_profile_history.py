@@ -0,0 +1,42 @@
+"""
+Order history is the user's choice, not the assistant's: a served
+recommendation only enters the profile once it is confirmed.
+"""
+import json
+
+import pytest
+
+main_assistant = pytest.importorskip("agents.main_assistant")
+
+
+@pytest.fixture
+def assistant(tmp_path, monkeypatch):
+    path = tmp_path / "user_profile.json"
+    monkeypatch.setattr(main_assistant, "USER_PROFILE_PATH", str(path))
+    a = object.__new__(main_assistant.MasterAssistant)  # no speech / voice / network
+    a.user_diet, a.user_allergy, a.user_profile, a._served = "veg", [], None, None
+    return a, path
+
+
+SERVED = [{"name": "Biryani House", "cuisine": "Hyderabadi", "menu_items": ["veg biryani"]}]
+
+
+def test_serving_is_not_history(assistant):
+    a, path = assistant
+    a._remember(SERVED)
+    a._remember(SERVED)
+    assert not (a.user_profile or {}).get("history")
+    assert not path.exists()  # nothing changed → nothing written
+
+
+def test_confirmation_records_the_served_restaurant(assistant):
+    a, path = assistant
+    a._remember(SERVED, prefs=["spicy"])
+    assert main_assistant.CONFIRM.fullmatch("haan, order it please")
+    assert not main_assistant.CONFIRM.fullmatch("spicy paneer tikka order karo")
+
+    a._confirm()
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["history"] == [{"restaurant": "Biryani House", "cuisine": "Hyderabadi", "dish": "veg biryani"}]
+    assert saved["preferences"] == ["spicy"]
+    assert a._served is None
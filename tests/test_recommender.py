@@ -0,0 +1,138 @@
+"""
+FoodRecommenderAgent on a synthetic catalog: dish matching keeps every
+restaurant that serves the dish and never empties a filtered list;
+cursors page past the first 10 and survive live updates between pages.
+"""
+import json
+import random
+
+import pytest
+
+from agents.food_recommender_agent import FoodRecommenderAgent
+from agents.pagination import CursorError
+
+DISHES = ["paneer tikka", "veg biryani", "chicken biryani", "masala dosa", "idli", "momos",
+          "chole bhature", "pav bhaji", "cheese pizza", "pasta", "kulfi", "pani puri", "samosa",
+          "dal makhani", "butter chicken", "fried rice", "noodles", "soup", "salad", "lassi"]
+
+
+def make_catalog(tmp_path_factory):
+    rng = random.Random(7)
+    restaurants = []
+    for i in range(300):
+        menu = rng.sample(DISHES, 6)
+        restaurants.append({
+            "name": f"restaurant {i}",
+            "cuisine": rng.choice(["north indian", "south indian", "chinese", "italian", "street food"]),
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "popularity": rng.randint(0, 5000),
+            "price_level": rng.randint(1, 4),
+            "latitude": 28.6 + rng.uniform(-0.2, 0.2),
+            "longitude": 77.2 + rng.uniform(-0.2, 0.2),
+            "menu_items": menu,
+            "dish_prices": {d: rng.randint(80, 450) for d in menu},
+        })
+    path = tmp_path_factory.mktemp("catalog") / "restaurants.json"
+    path.write_text(json.dumps(restaurants), encoding="utf-8")
+    return restaurants, FoodRecommenderAgent(str(path))
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    return make_catalog(tmp_path_factory)
+
+
+@pytest.fixture
+def fresh(tmp_path_factory):
+    """A recommender whose popularity / page cache the test may change."""
+    return make_catalog(tmp_path_factory)
+
+
+def best(restaurants, k=10):
+    ranked = sorted(restaurants, key=lambda r: (-r["rating"], -r["popularity"]))
+    return [r["name"] for r in ranked[:k]]
+
+
+@pytest.mark.parametrize("text", ["biryani", "biryani jaisa kuch", "suggest some biryani"])
+def test_dish_query_ranks_every_restaurant_serving_it(catalog, text):
+    restaurants, rec = catalog
+    serving = [r for r in restaurants if any("biryani" in d for d in r["menu_items"])]
+    assert len(serving) > 10
+
+    assert [r["name"] for r in rec.recommend_by_text(text)] == best(serving)
+
+
+def test_filler_words_do_not_empty_a_budget_query(catalog):
+    restaurants, rec = catalog
+    for semantic in (True, False):
+        results = rec.recommend_by_text(
+            "cheap veg food under 200 rupees", user_diet="veg", max_rupees=200, semantic=semantic
+        )
+        assert len(results) == 10
+        assert all(r["dish_prices"][d] <= 200 for r in results for d in r["menu_items"])
+
+
+def test_semantic_match_keeps_every_restaurant_serving_the_close_dish(catalog):
+    restaurants, rec = catalog
+    serving = [r for r in restaurants if "cheese pizza" in r["menu_items"]]
+    assert len(serving) > 10
+
+    # no dish named: the semantic stage finds "cheese pizza", not just k hits
+    assert [r["name"] for r in rec.recommend_by_text("something cheesy")] == best(serving)
+
+
+def all_pages(rec, text, between=None, **kwargs):
+    names, cursor = [], None
+    while True:
+        page = rec.recommend_page(text, cursor=cursor, **kwargs)
+        names += [r["name"] for r in page["results"]]
+        cursor = page["cursor"]
+        if not cursor:
+            return names
+        if between:
+            between()
+
+
+def test_pages_past_the_first_ten(catalog):
+    restaurants, rec = catalog
+    serving = [r for r in restaurants if any("biryani" in d for d in r["menu_items"])]
+
+    names = all_pages(rec, "biryani")
+    assert names == best(serving, k=len(serving))
+
+
+def test_cursor_survives_popularity_publishes(fresh):
+    restaurants, rec = fresh
+    expected = all_pages(rec, "samosa")
+    assert len(expected) > 10
+
+    # idle publish: same version, same stream
+    version = rec.version
+    rec.apply_popularity({})
+    assert rec.version == version
+
+    # real change between pages: the cursor keeps the order it started with
+    counts = iter(range(1, 1000))
+    changed = all_pages(rec, "samosa", between=lambda: rec.apply_popularity({expected[-1]: 10000 + next(counts)}))
+    assert changed == expected
+    assert rec.version != version
+
+
+def test_cursor_survives_a_new_history_entry(fresh):
+    _, rec = fresh
+    profile = {"diet": "veg", "history": [{"name": "restaurant 1"}], "preferences": ["spicy"]}
+    expected = all_pages(rec, "samosa", profile=profile)
+
+    names = all_pages(rec, "samosa", profile=profile,
+                      between=lambda: profile["history"].append({"name": "restaurant 2"}))
+    assert names[:10] == expected[:10]
+    assert len(names) == len(set(names)) == len(expected)
+
+
+def test_evicted_stream_of_an_old_version_is_an_error(fresh):
+    _, rec = fresh
+    page = rec.recommend_page("samosa")
+    rec.apply_popularity({page["results"][0]["name"]: 500})
+    rec._pages.clear()
+    with pytest.raises(CursorError):
+        rec.recommend_page("samosa", cursor=page["cursor"])
@@ -0,0 +1,59 @@
+"""
+Streaming STT against the Whisper stand-in, replaying WAV fixtures
+(tests/fixtures/stt: <name>.wav + <name>.txt transcript, <name>.json
+word timings used by the stand-in).
+"""
+import os
+import json
+import time
+
+import pytest
+
+sr = pytest.importorskip("speech_recognition")
+pytest.importorskip("groq")
+
+from agents.standin_servers import WhisperStandin
+from agents.speech_agent import SpeechAgent
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "stt")
+NAMES = sorted(f[:-4] for f in os.listdir(FIXTURES) if f.endswith(".wav"))
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = WhisperStandin(FIXTURES, latency_s=0.05).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def agent(server, monkeypatch):
+    monkeypatch.setenv("GROQ_STT_BASE_URL", server.url)
+    return SpeechAgent(groq_api_key="standin", compression="16k")
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_stitched_transcript_matches_fixture(agent, name):
+    with open(os.path.join(FIXTURES, name + ".txt"), encoding="utf-8") as f:
+        expected = f.read().split()
+    with open(os.path.join(FIXTURES, name + ".json"), encoding="utf-8") as f:
+        speech_end = json.load(f)["words"][-1][1]
+
+    partials = []
+    start = time.perf_counter()
+
+    def on_partial(text):
+        partials.append((time.perf_counter() - start, text))
+
+    with sr.AudioFile(os.path.join(FIXTURES, name + ".wav")) as source:
+        text = agent.listen_streaming(on_partial=on_partial, source=source, realtime=True)
+
+    assert text is not None and text.split() == expected
+
+    # the first partial arrives while the user is still speaking
+    assert partials, "no partial transcript"
+    first_at, first_text = partials[0]
+    assert first_at < speech_end
+    assert len(first_text.split()) < len(expected)
+    assert expected[:len(first_text.split())] == first_text.split()
@@ -0,0 +1,45 @@
+"""
+PooledRecommender: the serving path through RecommenderPool answers
+exactly like the in-process recommender over the same catalog.
+"""
+import pytest
+
+from agents.catalog_snapshot import default_contexts
+from agents.food_recommender_agent import FoodRecommenderAgent
+from agents.worker_pool import RecommenderPool, PooledRecommender, _synthetic_catalog
+
+QUERIES = [
+    ("biryani", {"user_diet": "veg"}),
+    ("something spicy", {"contexts": {"preference": ["spicy"]}}),
+    ("cheap food", {"price_level": 2, "semantic": False}),
+    ("dosa", {"allergy_list": ["peanut"], "profile": {"preferences": ["spicy"]}}),
+]
+
+
+@pytest.fixture(scope="module")
+def served(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("catalog") / "restaurants.json")
+    _synthetic_catalog(300, path)
+    local = FoodRecommenderAgent(path)
+    for kind, mapping in default_contexts().items():
+        local.register_contexts(kind, mapping)
+    pooled = PooledRecommender(local, RecommenderPool(path, workers=2))
+    yield local, pooled
+    pooled.close()
+
+
+@pytest.mark.parametrize("text, kwargs", QUERIES)
+def test_pool_answers_like_the_local_agent(served, text, kwargs):
+    local, pooled = served
+    expected = [r["name"] for r in local.recommend_by_text(text, **kwargs)]
+    assert expected
+    assert [r["name"] for r in pooled.recommend_by_text(text, **kwargs)] == expected
+
+
+def test_pool_pages_and_local_attributes(served):
+    local, pooled = served
+    page = pooled.recommend_page("biryani", user_diet="veg")
+    more = pooled.recommend_page("biryani", cursor=page["cursor"], user_diet="veg")
+    names = [r["name"] for r in page["results"] + more["results"]]
+    assert names == [r["name"] for r in local.recommend_page("biryani", page_size=20, user_diet="veg")["results"]]
+    assert pooled.by_name is local.by_name
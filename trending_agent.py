@@ -1,25 +1,176 @@
 """
-TrendingAgent: simple trending logic based on popularity and recency field (if present).
+TrendingAgent: trending logic based on an exponentially time-decayed
+popularity score, kept in a skip list.
 """
-def rank_trending(candidates):
-    # Simple ranking: popularity then rating
-    return sorted(candidates, key=lambda r: (-r.get("popularity",0), -r.get("rating",0)))
+import math
+import time
+import random
 import logging
 from datetime import datetime
 
 
+def _logaddexp(a, b):
+    if a == -math.inf:
+        return b
+    if b == -math.inf:
+        return a
+    m = max(a, b)
+    return m + math.log1p(math.exp(-abs(a - b)))
+
+
+class _Node:
+    __slots__ = ("order", "name", "next")
+
+    def __init__(self, order, name, level):
+        self.order = order
+        self.name = name
+        self.next = [None] * level
+
+
+class TrendingIndex:
+    """
+    Skip list of restaurants ordered by a time-decayed popularity score.
+
+    score(T) = sum_i w_i * exp(-lam * (T - t_i))
+             = exp(-lam * T) * S,   S = sum_i w_i * exp(lam * t_i)
+
+    The exp(-lam * T) factor is shared by every restaurant, so the
+    ranking only depends on log(S) and never needs a re-sort as time
+    passes. An order event moves one node.
+
+        update / order event : O(log n) expected
+        top_k(k)             : O(k), a walk from the head
+    """
+
+    MAX_LEVEL = 32
+
+    def __init__(self, half_life_hours=72.0, t0=None, seed=0):
+        self.lam = math.log(2) / (half_life_hours * 3600.0)
+        self.t0 = time.time() if t0 is None else t0  # keeps exponents small
+        self._head = _Node(None, None, self.MAX_LEVEL)
+        self._level = 1
+        self._key = {}    # name → (log_score, rating)
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return len(self._key)
+
+    def __contains__(self, name):
+        return name in self._key
+
+    # ------------------------------------------------------
+    # Skip list plumbing
+    # ------------------------------------------------------
+    @staticmethod
+    def _order(name, key):
+        # ascending order = best first; name breaks ties
+        return (-key[0], -key[1], name)
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and self._rng.random() < 0.5:
+            level += 1
+        return level
+
+    def _predecessors(self, order):
+        update = [self._head] * self.MAX_LEVEL
+        node = self._head
+        for lvl in range(self._level - 1, -1, -1):
+            while node.next[lvl] is not None and node.next[lvl].order < order:
+                node = node.next[lvl]
+            update[lvl] = node
+        return update
+
+    def _insert(self, name):
+        order = self._order(name, self._key[name])
+        update = self._predecessors(order)
+        level = self._random_level()
+        self._level = max(self._level, level)
+
+        node = _Node(order, name, level)
+        for lvl in range(level):
+            node.next[lvl] = update[lvl].next[lvl]
+            update[lvl].next[lvl] = node
+
+    def _remove(self, name):
+        order = self._order(name, self._key[name])
+        update = self._predecessors(order)
+        node = update[0].next[0]
+        for lvl in range(len(node.next)):
+            update[lvl].next[lvl] = node.next[lvl]
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+
+    # ------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------
+    def _log_weight(self, weight, ts):
+        return math.log(max(weight, 1e-9)) + self.lam * (ts - self.t0)
+
+    def make_key(self, popularity, rating=0, ts=None):
+        """The key set() would store, without indexing anything."""
+        ts = time.time() if ts is None else ts
+        return (self._log_weight(popularity, ts), rating)
+
+    def set(self, name, popularity, rating=0, ts=None):
+        """(Re)sets a restaurant's base score. O(log n)."""
+        if name in self._key:
+            self._remove(name)
+        self._key[name] = self.make_key(popularity, rating, ts)
+        self._insert(name)
+
+    def add_event(self, name, weight=1.0, ts=None):
+        """One order event (or `weight` orders) at time ts. O(log n)."""
+        if name not in self._key:
+            self.set(name, weight, ts=ts)
+            return
+
+        ts = time.time() if ts is None else ts
+        log_s, rating = self._key[name]
+        self._remove(name)
+        self._key[name] = (_logaddexp(log_s, self._log_weight(weight, ts)), rating)
+        self._insert(name)
+
+    # ------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------
+    def key(self, name):
+        return self._key.get(name)
+
+    def score(self, name, now=None):
+        """Decayed popularity at time `now`."""
+        now = time.time() if now is None else now
+        log_s = self._key[name][0]
+        return math.exp(log_s - self.lam * (now - self.t0))
+
+    def top_k(self, k):
+        """Best k names, best first."""
+        out = []
+        node = self._head.next[0]
+        while node is not None and len(out) < k:
+            out.append(node.name)
+            node = node.next[0]
+        return out
+
+
 class TrendingAgent:
     """
     Ranks restaurants by:
-        1. Popularity (Zomato-like metric)
+        1. Time-decayed popularity (popularity + live order events,
+           fading with a configurable half-life)
         2. Rating
-        3. Optional recency boost if 'last_ordered' or 'updated_at' provided
 
-    Works even if DB does NOT have recency fields.
+    Timestamps ('last_ordered' or 'updated_at') are parsed once at
+    load time. Works even if DB does NOT have recency fields
+    (such restaurants count as active at load time).
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, restaurants=None, half_life_hours=72.0):
+        self.half_life_hours = half_life_hours
+        self.index = TrendingIndex(half_life_hours)
+        self._by_name = {}
+        if restaurants:
+            self.load(restaurants)
 
     # ------------------------------------------------------
     # Parse date safely
@@ -39,42 +190,70 @@ class TrendingAgent:
         except Exception:
             return None
 
+    def _timestamp(self, r):
+        last_time = None
+        if "last_ordered" in r:
+            last_time = self._parse_date(r.get("last_ordered"))
+        elif "updated_at" in r:
+            last_time = self._parse_date(r.get("updated_at"))
+        return last_time.timestamp() if last_time else None
+
     # ------------------------------------------------------
-    # Ranking logic
+    # Build / maintain the index
     # ------------------------------------------------------
-    def rank_trending(self, restaurants):
-        """
-        Returns restaurants sorted by:
-            popularity → rating → recent activity (optional)
-        """
-
-        ranked_list = []
+    def load(self, restaurants):
+        """Parses timestamps once and (re)builds the index."""
+        now = time.time()
+        self.index = TrendingIndex(self.half_life_hours, t0=now)
+        self._by_name = {}
 
         for r in restaurants:
-            popularity = r.get("popularity", 0)
-            rating = r.get("rating", 0)
+            self.upsert(r, now=now)
 
-            # Recency: not required
-            last_time = None
+        logging.info(f"[TRENDING] Indexed {len(self.index)} restaurants.")
 
-            if "last_ordered" in r:
-                last_time = self._parse_date(r.get("last_ordered"))
+    def upsert(self, r, now=None):
+        ts = self._timestamp(r)
+        self._by_name[r["name"]] = r
+        self.index.set(
+            r["name"],
+            r.get("popularity", 0),
+            r.get("rating", 0),
+            ts=ts if ts is not None else (now or time.time())
+        )
 
-            elif "updated_at" in r:
-                last_time = self._parse_date(r.get("updated_at"))
+    def record_order(self, name, ts=None, weight=1.0):
+        """Live order event → O(log n) update."""
+        self.index.add_event(name, weight=weight, ts=ts)
 
-            # Default: very old timestamp
-            timestamp = last_time.timestamp() if last_time else 0
+    def _rank_key(self, r, now):
+        key = self.index.key(r.get("name"))
+        if key is None:
+            ts = self._timestamp(r)
+            key = self.index.make_key(r.get("popularity", 0), r.get("rating", 0), ts if ts is not None else now)
+        return key
 
-            ranked_list.append((popularity, rating, timestamp, r))
+    # ------------------------------------------------------
+    # Ranking logic
+    # ------------------------------------------------------
+    def top_k(self, k=10):
+        return [self._by_name[n] for n in self.index.top_k(k) if n in self._by_name]
 
-        # Sort: popularity ↓, rating ↓, recency ↓
-        ranked_list.sort(
-            key=lambda item: (-item[0], -item[1], -item[2])
-        )
+    def rank_trending(self, restaurants=None):
+        """
+        Returns restaurants sorted by:
+            decayed popularity → rating
 
-        # Extract only restaurant dicts
-        results = [item[3] for item in ranked_list]
+        Without an argument, reads the maintained index.
+        With a list (e.g. filtered copies), orders that list
+        using the indexed keys; unknown restaurants get a key from
+        their own fields but are not added to the index.
+        """
+        if restaurants is None:
+            results = self.top_k(len(self.index))
+        else:
+            now = time.time()
+            results = sorted(restaurants, key=lambda r: self._rank_key(r, now), reverse=True)
 
-        logging.info(f"[TRENDING] Sorted {len(results)} items by popularity, rating & recency.")
+        logging.info(f"[TRENDING] Ranked {len(results)} items by decayed popularity & rating.")
         return results
@@ -0,0 +1,227 @@
+"""
+End-to-end turn benchmark against local stand-in servers (no network,
+no microphone, no speakers).
+
+    python -m agents.turn_bench
+    python -m agents.turn_bench --chat-first-token 0.8:0.6 --budget 4
+    python -m agents.turn_bench --error-rate 0.3 --rounds 3
+
+Each utterance becomes a synthetic WAV clip whose transcript the
+Whisper stand-in knows. A turn is the assistant's real path:
+audio_to_text → MasterAssistant.respond() (route → recommend →
+rewrite via the chat stand-in → speak via the TTS stand-in), with the
+audio streamed into a timing player instead of a speaker.
+
+Per turn (clock starts when the user stopped speaking):
+    first_audio_s   → first audio byte reached the player
+    turn_s          → the whole answer reached the player
+plus per-stage time and degradations from the latency budget.
+Round 1 is cold; later rounds hit the rewrite and audio caches.
+"""
+import os
+import json
+import time
+import wave
+import random
+import logging
+import argparse
+import tempfile
+
+from agents.metrics import metrics
+from agents.standin_servers import WhisperStandin, ChatStandin, TTSStandin
+
+
+UTTERANCES = (
+    "suggest some spicy biryani",
+    "cheap veg food under 200 rupees",
+    "it is raining, want something hot",
+    "i am feeling sad, need something sweet",
+    "best pizza for dinner",
+)
+
+
+class _ClockPlayer:
+    """Takes the place of AudioPlayer: timestamps audio instead of playing it."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.first = None
+        self.bytes = 0
+
+    def write(self, chunk):
+        if chunk:
+            if self.first is None:
+                self.first = self.clock()
+            self.bytes += len(chunk)
+        return True
+
+    def play(self, audio):
+        return self.write(audio)
+
+    def close(self, timeout=None):
+        pass
+
+
+def _write_fixtures(fixtures_dir, utterances, seed=7):
+    """One noise clip per utterance (unique PCM → exact stand-in match) + transcript."""
+    import speech_recognition as sr
+
+    rng = random.Random(seed)
+    clips = []
+    for i, text in enumerate(utterances):
+        pcm = rng.randbytes(int((0.3 + 0.35 * len(text.split())) * 16000) * 2)
+        base = os.path.join(fixtures_dir, f"utt{i:02d}")
+        with wave.open(base + ".wav", "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(pcm)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(text)
+        clips.append(sr.AudioData(pcm, 16000, 2))
+    return clips
+
+
+def _pct(values, q):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# ------------------------------------------------------------
+# Benchmark
+# ------------------------------------------------------------
+def bench(utterances=UTTERANCES, rounds=2, whisper="0.35:0.3", chat_first_token="0.3:0.4",
+          chat_token_s=0.01, tts_first_byte="0.25:0.4", tts_speed=4.0, budget_s=None,
+          error_rate=0.0, rate_limit=None, seed=7):
+    """
+    Latencies are Latency specs ("median_s:sigma"); error_rate and
+    rate_limit (requests/s) apply to every stand-in.
+    Returns one row per turn, then one summary row per round.
+    """
+    faults = {"error_rate": error_rate, "rate_limit": rate_limit, "seed": seed}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures")
+        os.makedirs(fixtures)
+        clips = _write_fixtures(fixtures, utterances, seed)
+
+        servers = {
+            "whisper": WhisperStandin(fixtures, latency_s=whisper, **faults),
+            "chat": ChatStandin(first_token=chat_first_token, token_s=chat_token_s, **faults),
+            "tts": TTSStandin(first_byte=tts_first_byte, speed=tts_speed, **faults),
+        }
+        for server in servers.values():
+            server.start()
+
+        # before the agents are imported / created
+        os.environ.update({
+            "GROQ_API_KEY": "standin",
+            "GROQ_STT_BASE_URL": servers["whisper"].url,
+            "GROQ_CHAT_BASE_URL": servers["chat"].url,
+            "ELEVEN_API_KEY": "standin",
+            "ELEVEN_VOICE_ID": "standin-voice",
+            "ELEVENLABS_BASE_URL": servers["tts"].url,
+            "USER_PROFILE_PATH": os.path.join(tmp, "user_profile.json"),
+        })
+        if budget_s:
+            os.environ["REQUEST_BUDGET_S"] = str(budget_s)
+
+        from agents.audio_cache import AudioCache
+        from agents.latency_budget import LatencyBudget
+        from agents.main_assistant import MasterAssistant
+
+        assistant = MasterAssistant(hybrid_mode=True)
+        assistant.user_diet = assistant.user_diet or "nonveg"
+        assistant.voice.cache = AudioCache(os.path.join(tmp, "tts_cache"))
+        player = assistant.voice.player = _ClockPlayer()
+
+        rows, summaries = [], []
+        for rnd in range(1, rounds + 1):
+            turns = []
+            for text, clip in zip(utterances, clips):
+                player.reset()
+
+                # same STT stage as ask_input(); the clip was just "recorded"
+                budget = LatencyBudget()
+                with budget.stage("stt") as stage:
+                    heard = assistant.speech.audio_to_text(clip, timeout=stage.allowance)
+
+                handle = None
+                if heard:
+                    _, handle = assistant.respond(heard, budget)
+                    handle.wait()
+                done = time.monotonic()
+
+                turns.append({
+                    "round": rnd,
+                    "utterance": text,
+                    "heard": heard,
+                    "first_audio_s": round(player.first - budget.started, 3) if player.first else None,
+                    "turn_s": round(done - budget.started, 3),
+                    "audio_kb": round(player.bytes / 1024, 1),
+                    "stages_ms": {
+                        name: round(s.used * 1000, 1) for name, s in budget.stages.items() if s.used is not None
+                    },
+                    "degraded": {name: s.degraded for name, s in budget.stages.items() if s.degraded},
+                })
+
+            first = [t["first_audio_s"] for t in turns]
+            total = [t["turn_s"] for t in turns]
+            summaries.append({
+                "round": rnd,
+                "turns": len(turns),
+                "no_audio": first.count(None),
+                "first_audio_s_p50": _pct(first, 0.5),
+                "first_audio_s_p95": _pct(first, 0.95),
+                "turn_s_p50": _pct(total, 0.5),
+                "turn_s_p95": _pct(total, 0.95),
+            })
+            rows.extend(turns)
+
+        assistant.voice.flush()
+        servers_report = {
+            name: {"requests": s.requests, "faults": s.faults_injected, "rate_limited": s.rate_limited}
+            for name, s in servers.items()
+        }
+        for server in servers.values():
+            server.stop()
+
+    return rows + summaries + [{"servers": servers_report}]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="End-to-end turn latency against local stand-ins")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--utterance", action="append", help="replaces the default utterances")
+    parser.add_argument("--whisper", default="0.35:0.3", help="Whisper latency, median_s[:sigma]")
+    parser.add_argument("--chat-first-token", default="0.3:0.4", help="chat time to first token, median_s[:sigma]")
+    parser.add_argument("--chat-token-s", type=float, default=0.01)
+    parser.add_argument("--tts-first-byte", default="0.25:0.4", help="TTS time to first byte, median_s[:sigma]")
+    parser.add_argument("--tts-speed", type=float, default=4.0, help="render speed vs playback")
+    parser.add_argument("--budget", type=float, help="REQUEST_BUDGET_S for every turn")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, help="requests/s per stand-in")
+    args = parser.parse_args()
+
+    rows = bench(
+        utterances=tuple(args.utterance) if args.utterance else UTTERANCES,
+        rounds=args.rounds,
+        whisper=args.whisper,
+        chat_first_token=args.chat_first_token,
+        chat_token_s=args.chat_token_s,
+        tts_first_byte=args.tts_first_byte,
+        tts_speed=args.tts_speed,
+        budget_s=args.budget,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+    )
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    print(json.dumps(metrics.snapshot()["counters"]))
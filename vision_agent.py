@@ -1,17 +1,27 @@
 import os
+import time
 import logging
 
+from agents.food_image_index import FoodImageIndex
+from agents.fuzzy_lookup import TrigramIndex
+from agents.metrics import metrics
+
 class VisionAgent:
     """
     A lightweight food-detection module.
 
     - Detects food from image filename
     - Example:  pizza.jpeg  → "pizza"
-    - No ML model needed for demo (fast + offline)
-    - Can be upgraded later to Groq Vision or CLIP
+    - Tolerates typos in filenames (biriyani.jpg → "biryani")
+    - Falls back to image content: perceptual hash lookup in a
+      labelled reference set (IMG_2031.jpg → "biryani")
+    - No ML model, no GPU, no network (fast + offline)
     """
 
-    def __init__(self):
+    def __init__(self, image_index=None):
+        # Content recognizer (built lazily on first unnamed image)
+        self._image_index = image_index
+
         # Common Indian + international items
         self.food_keywords = [
             "biryani", "pizza", "burger", "pasta", "momos", "roll",
@@ -22,6 +32,7 @@ class VisionAgent:
             "chaat", "pakora", "samosa", "poha", "upma",
             "fries", "sandwich"
         ]
+        self._fuzzy = TrigramIndex(self.food_keywords)
 
     # -------------------------------------------------------------------
     # Helper: clean filename
@@ -67,5 +78,26 @@ class VisionAgent:
                 logging.info(f"[VISION DETECTED] {part}")
                 return part
 
+        # misspelled filename parts
+        for word in self._fuzzy.find_in_text(cleaned):
+            logging.info(f"[VISION DETECTED FUZZY] {word}")
+            return word
+
         logging.info("[VISION] No food detected from filename.")
+
+        # content-based fallback
+        start = time.perf_counter()
+        label = self.image_index.recognize(image_path)
+        metrics.observe("vision.content_lookup", time.perf_counter() - start)
+        if label:
+            logging.info(f"[VISION DETECTED FROM CONTENT] {label}")
+            return label
+
+        logging.info("[VISION] No food detected from image content.")
         return None
+
+    @property
+    def image_index(self):
+        if self._image_index is None:
+            self._image_index = FoodImageIndex()
+        return self._image_index
@@ -0,0 +1,182 @@
+"""
+Batch food tagging for whole image directories.
+
+    python -m agents.vision_batch <image_dir> results.jsonl [--workers N]
+    python -m agents.vision_batch <image_dir> --bench
+
+- Images are decoded + classified in worker processes (VisionAgent)
+- At most `workers * 4` images are in flight (backpressure)
+- Results are streamed to JSONL as they complete
+- Files already in the output (same content hash) are skipped
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from agents.food_image_index import IMAGE_EXTS
+
+
+# ------------------------------------------------------------
+# Worker process
+# ------------------------------------------------------------
+_agent = None
+
+
+def _init_worker(refs_dir):
+    global _agent
+    from agents.food_image_index import FoodImageIndex
+    from agents.vision_agent import VisionAgent
+
+    logging.getLogger().setLevel(logging.WARNING)
+    _agent = VisionAgent(image_index=FoodImageIndex(refs_dir) if refs_dir else None)
+
+
+def _classify(path, digest):
+    start = time.perf_counter()
+    label = _agent.detect_food(path)
+    return {
+        "path": path,
+        "sha1": digest,
+        "label": label,
+        "ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+# ------------------------------------------------------------
+# Directory walk + resume
+# ------------------------------------------------------------
+def iter_images(root):
+    for folder, _, files in os.walk(root):
+        for fname in sorted(files):
+            if fname.lower().endswith(IMAGE_EXTS):
+                yield os.path.join(folder, fname)
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_done(out_path):
+    done = set()
+    if not out_path or not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["sha1"])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+# ------------------------------------------------------------
+# Batch run
+# ------------------------------------------------------------
+def classify_directory(root, out_path=None, workers=None, refs_dir=None, max_inflight=None):
+    """
+    Returns {"images", "skipped", "seconds", "images_per_sec"}.
+    With out_path=None results are classified but not written (bench).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or workers * 4
+
+    done = load_done(out_path)
+    seen = set(done)
+    out = open(out_path, "a", encoding="utf-8") if out_path else None
+
+    processed = skipped = 0
+    start = time.perf_counter()
+
+    def drain(pending):
+        nonlocal processed
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in finished:
+            row = fut.result()
+            processed += 1
+            if out:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                out.flush()
+        return pending
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(refs_dir,)) as pool:
+            pending = set()
+            for path in iter_images(root):
+                try:
+                    digest = file_digest(path)
+                except OSError as e:
+                    logging.warning(f"[VISION BATCH] Cannot read {path}: {e}")
+                    continue
+
+                # same content already tagged (this run or earlier run)
+                if digest in seen:
+                    skipped += 1
+                    continue
+                seen.add(digest)
+
+                # backpressure: never queue more than max_inflight images
+                while len(pending) >= max_inflight:
+                    pending = drain(pending)
+
+                pending.add(pool.submit(_classify, path, digest))
+
+            while pending:
+                pending = drain(pending)
+    finally:
+        if out:
+            out.close()
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "images": processed,
+        "skipped": skipped,
+        "seconds": round(seconds, 3),
+        "images_per_sec": round(processed / seconds, 1) if seconds else 0.0,
+    }
+    logging.info(f"[VISION BATCH] {stats}")
+    return stats
+
+
+def bench(root, refs_dir=None):
+    """images/sec for 1, 2, 4, ... workers up to the core count."""
+    cores = os.cpu_count() or 1
+    counts = sorted({1 << i for i in range(cores.bit_length()) if (1 << i) <= cores} | {cores})
+
+    rows = []
+    base = None
+    for n in counts:
+        stats = classify_directory(root, out_path=None, workers=n, refs_dir=refs_dir)
+        base = base or stats["images_per_sec"]
+        stats["workers"] = n
+        stats["speedup"] = round(stats["images_per_sec"] / base, 2) if base else 0.0
+        rows.append(stats)
+    return rows
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Tag a directory of food images.")
+    parser.add_argument("image_dir")
+    parser.add_argument("output", nargs="?", help="JSONL output (appended, resumable)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--refs", default=None, help="reference set dir (default: data/food_refs)")
+    parser.add_argument("--bench", action="store_true", help="report images/sec by worker count")
+    args = parser.parse_args()
+
+    if args.bench:
+        for row in bench(args.image_dir, refs_dir=args.refs):
+            print(json.dumps(row))
+    elif not args.output:
+        parser.error("output path required (or --bench)")
+    else:
+        print(json.dumps(classify_directory(args.image_dir, args.output, args.workers, args.refs)))
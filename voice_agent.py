@@ -1,8 +1,56 @@
 import os
+import time
+import queue
+import atexit
 import logging
+import threading
 import requests
-import tempfile
-import subprocess
+
+from agents.audio_cache import AudioCache
+from agents.audio_player import AudioPlayer
+from agents.metrics import metrics
+from agents.circuit_breaker import breaker, ELEVENLABS
+
+
+# ELEVENLABS_BASE_URL points the agent at a stand-in server
+ELEVENLABS_BASE_URL = "https://api.elevenlabs.io"
+
+
+# Constant phrases every session hits → pre-rendered + pinned in the cache
+FIXED_PHRASES = (
+    "Quick question! Are you veg or non-veg?",
+    "Hello! Ask me a food question or say 'quit' to exit.",
+    "Goodbye! Enjoy your meal.",
+    "I didn't catch that. Please try again later.",
+    "Please type the full image path now.",
+)
+
+
+class SpeakHandle:
+    """
+    Returned by VoiceAgent.speak().
+        wait()    → block until this phrase was played (or skipped)
+        cancel()  → drop it if not played yet / stop streaming it
+        started   → set once audio starts playing (or the phrase is skipped)
+    """
+
+    def __init__(self, text, timeout=None, cache_only=False):
+        self.text = text
+        self.timeout = timeout          # seconds to first audio byte (ElevenLabs)
+        self.cache_only = cache_only    # play only if already rendered
+        self.cancelled = False
+        self.started = threading.Event()
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        self.cancelled = True
+
+    @property
+    def done(self):
+        return self._done.is_set()
 
 
 class VoiceAgent:
@@ -13,29 +61,59 @@ class VoiceAgent:
     ✓ Reads API + Voice ID from .env
     ✓ Fallback to SAPI if ElevenLabs missing
     ✓ Zero change needed in main_assistant.py
+    ✓ Content-addressed audio cache → repeated phrases skip the network
+    ✓ Streaming TTS piped into one persistent player process
+    ✓ Non-blocking speak(): ordered background queue, flushed on exit
+    ✓ Circuit breaker: ElevenLabs down → SAPI / cache without waiting
     """
 
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, cache=None, player=None):
         self.debug = debug
 
         # Load ElevenLabs credentials
         self.eleven_api_key = os.getenv("ELEVEN_API_KEY")
         self.voice_id = os.getenv("ELEVEN_VOICE_ID")
+        self.base_url = os.getenv("ELEVENLABS_BASE_URL", ELEVENLABS_BASE_URL).rstrip("/")
+
+        self.voice_settings = {
+            "stability": 0.4,
+            "similarity_boost": 0.75,
+            "style": 0.55,
+            "use_speaker_boost": True
+        }
 
-        # SAPI fallback engine
+        # Rendered audio cache (fixed phrases pinned, others LRU)
+        try:
+            self.cache = cache or AudioCache()
+        except Exception as e:
+            logging.error(f"[TTS CACHE INIT ERROR] {e}")
+            self.cache = None
+
+        # Long-lived player (spawned lazily on first audio)
+        self.player = player or AudioPlayer()
+
+        # SAPI fallback engine (created on the speech thread:
+        # COM objects are bound to the thread that created them)
         self.sapi_engine = None
+        self._sapi_ready = False
 
         # If ElevenLabs missing → fallback
         if not self.eleven_api_key or not self.voice_id:
             logging.warning("[TTS] ElevenLabs key/voice missing → using SAPI fallback")
-            self._init_sapi()
         else:
             logging.info("[TTS] ElevenLabs voice enabled")
 
+        # Background speech queue (ordered playback)
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        atexit.register(self.close)
+
     # ---------------------------------------------------
     # Optional SAPI Fallback
     # ---------------------------------------------------
     def _init_sapi(self):
+        self._sapi_ready = True
         try:
             import pythoncom
             import win32com.client as wincl
@@ -49,72 +127,227 @@ class VoiceAgent:
             self.sapi_engine = None
 
     # ---------------------------------------------------
-    # Main speak() method
+    # Main speak() method (non-blocking)
     # ---------------------------------------------------
-    def speak(self, text):
+    def speak(self, text, block=False, timeout=None, cache_only=False):
+        """
+        Queues text for playback and returns immediately.
+        Returns a SpeakHandle; call .wait() to block until played.
+
+        timeout    = bound on the ElevenLabs request (latency budget)
+        cache_only = play cached audio or nothing (text-only answer)
+        """
+        handle = SpeakHandle(text, timeout, cache_only)
         if not text:
+            handle.started.set()
+            handle._done.set()
+            return handle
+
+        self._ensure_worker()
+        self._queue.put(handle)
+
+        if block:
+            handle.wait()
+        return handle
+
+    def cancel_pending(self):
+        """Drops every phrase not yet played."""
+        dropped = 0
+        while True:
+            try:
+                handle = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            handle.cancel()
+            handle.started.set()
+            handle._done.set()
+            self._queue.task_done()
+            dropped += 1
+
+        if dropped:
+            logging.info(f"[TTS] Cancelled {dropped} queued phrase(s)")
+        return dropped
+
+    def flush(self):
+        """Blocks until every queued phrase was played."""
+        if self._worker:
+            self._queue.join()
+
+    def close(self):
+        """Flush queue + let the player finish (called at exit)."""
+        self.flush()
+        self.player.close()
+
+    # ---------------------------------------------------
+    # Speech worker thread
+    # ---------------------------------------------------
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run_worker, name="voice-agent", daemon=True)
+            self._worker.start()
+
+    def _run_worker(self):
+        while True:
+            handle = self._queue.get()
+            try:
+                if not handle.cancelled:
+                    self._speak_now(handle)
+            except Exception as e:
+                logging.error(f"[TTS WORKER ERROR] {e}")
+            finally:
+                handle.started.set()
+                handle._done.set()
+                self._queue.task_done()
+
+    def _speak_now(self, handle):
+        text = handle.text
+
+        # Budget too low for a render: cached audio, else text-only
+        if handle.cache_only:
+            audio = self.cache.get(self._cache_key(text)) if self.cache else None
+            if audio:
+                metrics.incr("tts.cache_hit")
+                handle.started.set()
+                self.player.play(audio)
+            else:
+                metrics.incr("tts.text_only")
+                logging.info("[TTS] Not cached → text-only answer")
             return
 
         # Try ElevenLabs first
         if self.eleven_api_key and self.voice_id:
-            success = self._speak_elevenlabs(text)
+            success = self._speak_elevenlabs(text, handle)
             if success:
                 return
 
         # Else fallback to SAPI
+        if not self._sapi_ready:
+            self._init_sapi()
         self._speak_sapi(text)
 
     # ---------------------------------------------------
-    # ElevenLabs TTS
+    # Pre-render fixed phrases (build time or first run)
     # ---------------------------------------------------
-    def _speak_elevenlabs(self, text):
+    def prerender(self, phrases=FIXED_PHRASES):
+        if not self.cache or not (self.eleven_api_key and self.voice_id):
+            logging.warning("[TTS PRERENDER] Skipped (no cache or ElevenLabs config)")
+            return 0
+
+        rendered = 0
+        for text in phrases:
+            key = self._cache_key(text)
+            if self.cache.contains(key):
+                continue
+            audio = self._fetch_elevenlabs(text)
+            if audio:
+                self.cache.put(key, audio, pinned=True)
+                rendered += 1
+
+        logging.info(f"[TTS PRERENDER] {rendered} new phrase(s) rendered")
+        return rendered
+
+    def _cache_key(self, text):
+        return AudioCache.make_key(text, self.voice_id, self.voice_settings)
+
+    # ---------------------------------------------------
+    # ElevenLabs TTS (streaming endpoint)
+    # ---------------------------------------------------
+    def _stream_elevenlabs(self, text, chunk_size=4096, timeout=None):
+        """
+        Yields MP3 chunks as ElevenLabs produces them.
+        timeout bounds the connect and every wait for the next chunk.
+        """
+        url = f"{self.base_url}/v1/text-to-speech/{self.voice_id}/stream"
+        headers = {
+            "xi-api-key": self.eleven_api_key,
+            "Content-Type": "application/json"
+        }
+
+        payload = {
+            "text": text,
+            "voice_settings": self.voice_settings
+        }
+
+        br = breaker(ELEVENLABS)
+        if not br.allow():
+            logging.warning("[TTS] ElevenLabs circuit open → fallback")
+            return
+
+        # Hit ElevenLabs (outcome + time to first chunk → breaker)
+        start = time.perf_counter()
+        recorded = False
         try:
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}"
-            headers = {
-                "xi-api-key": self.eleven_api_key,
-                "Content-Type": "application/json"
-            }
-
-            payload = {
-                "text": text,
-                "voice_settings": {
-                    "stability": 0.4,
-                    "similarity_boost": 0.75,
-                    "style": 0.55,
-                    "use_speaker_boost": True
-                }
-            }
-
-            # Hit ElevenLabs
-            response = requests.post(url, json=payload, headers=headers)
-
-            if response.status_code != 200:
-                logging.error(f"[ELEVENLABS ERROR] {response.status_code}: {response.text}")
-                return False
+            with requests.post(url, json=payload, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code != 200:
+                    recorded = True
+                    br.record(False, time.perf_counter() - start)
+                    logging.error(f"[ELEVENLABS ERROR] {response.status_code}: {response.text}")
+                    return
 
-            # Save temporary MP3
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-                tmp.write(response.content)
-                mp3_path = tmp.name
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        if not recorded:
+                            recorded = True
+                            br.record(True, time.perf_counter() - start)
+                        yield chunk
+        except requests.RequestException:
+            if not recorded:
+                recorded = True
+                br.record(False, time.perf_counter() - start)
+            raise
+        finally:
+            if not recorded:
+                br.record(False, time.perf_counter() - start)  # 200 without audio
 
-            # Play using ffplay (fastest, most reliable, bundled with pip ffmpeg)
-            try:
-                subprocess.run(
-                    ["ffplay", "-nodisp", "-autoexit", mp3_path],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-            except Exception as e:
-                logging.error(f"[FFPLAY ERROR] {e}")
+    def _fetch_elevenlabs(self, text):
+        audio = b"".join(self._stream_elevenlabs(text))
+        return audio or None
+
+    def _speak_elevenlabs(self, text, handle=None):
+        played = False
+        try:
+            key = self._cache_key(text)
+
+            if self.cache:
+                audio = self.cache.get(key)
+                if audio:
+                    metrics.incr("tts.cache_hit")
+                    logging.info("[TTS CACHE HIT] playing without network")
+                    if handle:
+                        handle.started.set()
+                    return self.player.play(audio)
+
+            metrics.incr("tts.cache_miss")
+            start = time.perf_counter()
+            chunks = []
+
+            for chunk in self._stream_elevenlabs(text, timeout=handle.timeout if handle else None):
+                if handle and handle.cancelled:
+                    logging.info("[TTS] Stream cancelled")
+                    return True
+                if not chunks:
+                    metrics.observe("tts.first_chunk", time.perf_counter() - start)
+                    if handle:
+                        handle.started.set()
+                if not self.player.write(chunk):
+                    return played
+                played = True
+                chunks.append(chunk)
+
+            if not chunks:
                 return False
-            finally:
-                os.remove(mp3_path)
 
+            metrics.observe("tts.stream", time.perf_counter() - start)
+            if self.cache:
+                self.cache.put(key, b"".join(chunks), pinned=text in FIXED_PHRASES)
             return True
 
         except Exception as e:
             logging.error(f"[ELEVENLABS PLAYBACK ERROR] {e}")
-            return False
+            # partially played audio is not repeated through SAPI
+            return played
 
     # ---------------------------------------------------
     # SAPI fallback
@@ -132,3 +365,14 @@ class VoiceAgent:
 
         except Exception as e:
             logging.error(f"[SAPI SPEAK ERROR] {e}")
+
+
+# -----------------------------
+# Build step: python -m agents.voice_agent
+# -----------------------------
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    VoiceAgent().prerender()
@@ -65,6 +65,17 @@ class WeatherFoodAgent:
 
         return "normal"
 
+    # ----------------------------------------------------
+    # Weather mood → foods (for precomputed candidate sets)
+    # ----------------------------------------------------
+    def weather_map(self):
+        return {
+            "cold": self.cold_map,
+            "hot": self.hot_map,
+            "rain": self.rain_map,
+            "normal": self.normal_map,
+        }
+
     # ----------------------------------------------------
     # Return a list of weather-based food suggestions
     # ----------------------------------------------------
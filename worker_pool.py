@@ -0,0 +1,304 @@
+"""
+Multi-process recommendation serving.
+
+    pool = RecommenderPool(workers=4)
+    results = pool.recommend("biryani", user_diet="veg")
+    pool.close()
+
+    RECOMMENDER_WORKERS=4 python -m agents.main_assistant   (serving)
+    python -m agents.worker_pool --bench 20000
+
+- The parent compiles the catalog into a binary snapshot and copies it
+  into one multiprocessing.shared_memory block; every worker maps that
+  block (CatalogSnapshot over shm.buf), nothing is duplicated
+- With the "fork" start method the parent also warms the numpy indexes
+  (scoring matrix, semantic vectors) before forking; their buffers are
+  never written afterwards, so copy-on-write keeps them shared
+- On spawn-only platforms workers attach the block and build the lazy
+  indexes themselves
+"""
+import gc
+import os
+import json
+import time
+import atexit
+import random
+import logging
+import argparse
+import tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from agents.catalog_snapshot import CatalogSnapshot, compile_file, default_contexts, SNAPSHOT_EXT
+from agents.food_recommender_agent import FoodRecommenderAgent, DATA_PATH
+
+
+# ------------------------------------------------------------
+# Worker process
+# ------------------------------------------------------------
+_recommender = None   # per worker
+_warm_barrier = None
+
+
+def _attach(shm, size, contexts):
+    rec = FoodRecommenderAgent(snapshot=CatalogSnapshot(shm.buf[:size]))
+    rec._shm = shm  # keep the mapping alive
+    for kind, mapping in contexts.items():
+        rec.register_contexts(kind, mapping)
+    return rec
+
+
+def _init_worker(shm_name, size, contexts, barrier, inherited=None):
+    # fork: `inherited` is the parent's warmed recommender (not pickled)
+    global _recommender, _warm_barrier
+    logging.getLogger().setLevel(logging.WARNING)
+    _warm_barrier = barrier
+    if inherited is not None:
+        _recommender = inherited
+    else:
+        _recommender = _attach(shared_memory.SharedMemory(name=shm_name), size, contexts)
+
+
+def _warm(_):
+    # lazy indexes + one query; the barrier holds this worker until every
+    # worker took one warm task, so each process is started and warm
+    _recommender.scorer
+    _recommender.semantic_index
+    _recommender.fuzzy_index
+    _recommender.recommend_by_text("biryani")
+    _warm_barrier.wait(timeout=120)
+    return os.getpid()
+
+
+def _recommend(text, kwargs):
+    return _recommender.recommend_by_text(text, **kwargs)
+
+
+def _recommend_page(text, cursor, kwargs):
+    return _recommender.recommend_page(text, cursor=cursor, **kwargs)
+
+
+# ------------------------------------------------------------
+# Pool
+# ------------------------------------------------------------
+class RecommenderPool:
+    """
+    N worker processes running recommend_by_text over one shared catalog.
+    """
+
+    def __init__(self, catalog_path=DATA_PATH, workers=None, contexts=None, start_method=None):
+        self.workers = workers or os.cpu_count() or 1
+        contexts = default_contexts() if contexts is None else contexts
+
+        # 1. snapshot bytes → one shared memory block
+        data = self._snapshot_bytes(catalog_path)
+        self.shm = shared_memory.SharedMemory(create=True, size=len(data))
+        self.shm.buf[:len(data)] = data
+        self.size = len(data)
+        del data
+
+        methods = mp.get_all_start_methods()
+        start_method = start_method or ("fork" if "fork" in methods else "spawn")
+        ctx = mp.get_context(start_method)
+
+        # 2. fork: build the numpy indexes once, inherit them copy-on-write
+        self._inherited = None
+        if start_method == "fork":
+            self._inherited = _attach(self.shm, self.size, contexts)
+            self._inherited.scorer
+            self._inherited.semantic_index
+            self._inherited.fuzzy_index
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.shm.name, self.size, contexts, ctx.Barrier(self.workers), self._inherited)
+        )
+
+        atexit.register(self.close)
+        logging.info(
+            f"[WORKER POOL] {self.workers} workers ({start_method}), "
+            f"catalog {self.size / 1e6:.1f} MB in shared memory"
+        )
+
+    @staticmethod
+    def _snapshot_bytes(path):
+        if path.endswith(SNAPSHOT_EXT):
+            with open(path, "rb") as f:
+                return f.read()
+        with tempfile.TemporaryDirectory() as tmp:
+            snap = compile_file(path, os.path.join(tmp, "catalog" + SNAPSHOT_EXT))
+            with open(snap, "rb") as f:
+                return f.read()
+
+    # --------------------------------------------------------
+    def submit(self, text, **kwargs):
+        return self.executor.submit(_recommend, text, kwargs)
+
+    def recommend(self, text, **kwargs):
+        return self.submit(text, **kwargs).result()
+
+    def recommend_page(self, text, cursor=None, **kwargs):
+        """
+        Cursor pagination; any worker can serve any page (a worker without
+        the cached ranked stream rebuilds it and seeks past the cursor key).
+        """
+        return self.executor.submit(_recommend_page, text, cursor, kwargs).result()
+
+    def warm(self):
+        """Starts every worker and builds its indexes (call before timing)."""
+        pids = set(self.executor.map(_warm, range(self.workers)))
+        logging.info(f"[WORKER POOL] {len(pids)} workers warm")
+        return pids
+
+    def map(self, queries):
+        """queries: iterable of (text, kwargs) → results in order."""
+        return list(self.executor.map(_recommend, *zip(*queries)))
+
+    def worker_pids(self):
+        return [p.pid for p in mp.active_children()]
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.executor.shutdown(wait=True)
+        self.executor = self._inherited = None
+        gc.collect()  # snapshot views form reference cycles
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # views still referenced; the mapping goes away with them
+        self.shm.unlink()
+        self.shm = None
+
+
+class PooledRecommender:
+    """
+    Drop-in FoodRecommenderAgent for a serving process: recommendation
+    queries run in the pool, everything else (contexts, stats, fuzzy
+    index, ...) is read from the local agent over the same catalog.
+    Live popularity applied to the local agent does not reach the workers.
+    """
+
+    def __init__(self, local, pool):
+        self.local = local
+        self.pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self.local, name)
+
+    def recommend_by_text(self, text, user_loc=None, user_diet=None, **kwargs):
+        return self.pool.recommend(text, user_loc=user_loc, user_diet=user_diet, **kwargs)
+
+    def recommend_page(self, text, cursor=None, **kwargs):
+        return self.pool.recommend_page(text, cursor=cursor, **kwargs)
+
+    def recommend_for_weather(self, foods, user_loc=None, user_diet=None):
+        return self.recommend_by_text(", ".join(foods), user_loc, user_diet)
+
+    def recommend_by_image(self, dish_name, user_loc=None, user_diet=None):
+        return self.recommend_by_text(dish_name, user_loc, user_diet)
+
+    def close(self):
+        self.pool.close()
+
+
+# ------------------------------------------------------------
+# Benchmark: throughput + per-worker memory by worker count
+# ------------------------------------------------------------
+def _memory_kb(pid):
+    """(rss, pss, private) kB from /proc (Linux only)."""
+    out = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    out[key] = int(rest.split()[0])
+    except OSError:
+        return None
+    return out["Rss"], out["Pss"], out["Private_Clean"] + out["Private_Dirty"]
+
+
+def _synthetic_catalog(n, path):
+    rng = random.Random(7)
+    dishes = ["paneer tikka", "veg biryani", "chicken biryani", "masala dosa", "idli", "momos",
+              "chole bhature", "pav bhaji", "pizza", "pasta", "kulfi", "pani puri", "samosa",
+              "dal makhani", "butter chicken", "fried rice", "noodles", "soup", "salad", "lassi"]
+    restaurants = [
+        {
+            "name": f"restaurant {i}",
+            "cuisine": rng.choice(["north indian", "south indian", "chinese", "italian", "street food"]),
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "popularity": rng.randint(0, 5000),
+            "price_level": rng.randint(1, 4),
+            "latitude": 28.6 + rng.uniform(-0.2, 0.2),
+            "longitude": 77.2 + rng.uniform(-0.2, 0.2),
+            "menu_items": rng.sample(dishes, 6),
+        }
+        for i in range(n)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(restaurants, f)
+
+
+def bench(n_restaurants=20000, n_queries=64, counts=None):
+    """
+    Queries/s and per-worker memory for each worker count (default:
+    powers of two up to the CPU count). Every worker is started and
+    warm before the timed run.
+    """
+    queries = [
+        ("biryani", {"user_diet": "veg"}),
+        ("something spicy", {}),
+        ("pizaa", {"price_level": 2}),
+        ("dosa", {"allergy_list": ["peanut"]}),
+    ] * (n_queries // 4)
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    counts = counts or sorted({1 << i for i in range(cores.bit_length()) if (1 << i) <= cores} | {cores})
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "restaurants.json")
+        _synthetic_catalog(n_restaurants, path)
+
+        base = None
+        for n in counts:
+            pool = RecommenderPool(path, workers=n)
+            pool.warm()
+            pool.map(queries)  # untimed pass: record caches
+
+            start = time.perf_counter()
+            pool.map(queries)
+            seconds = time.perf_counter() - start
+
+            mem = [m for m in (_memory_kb(pid) for pid in pool.worker_pids()) if m]
+            pool.close()
+
+            qps = n_queries / seconds
+            base = base or qps
+            rows.append({
+                "cpus": cores,
+                "workers": n,
+                "queries_per_sec": round(qps, 1),
+                "speedup": round(qps / base, 2),
+                "worker_rss_mb": round(max(m[0] for m in mem) / 1024, 1) if mem else None,
+                "worker_pss_mb": round(max(m[1] for m in mem) / 1024, 1) if mem else None,
+                "worker_private_mb": round(max(m[2] for m in mem) / 1024, 1) if mem else None,
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Multi-process recommendation pool")
+    parser.add_argument("--bench", type=int, metavar="N", default=20000, help="synthetic catalog size")
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default: 1, 2, 4 .. cpus)")
+    args = parser.parse_args()
+
+    for row in bench(args.bench, args.queries, args.workers):
+        print(json.dumps(row))